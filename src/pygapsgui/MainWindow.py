@@ -6,6 +6,7 @@ from qtpy import QtGui as QG
 from qtpy import QtWidgets as QW
 
 from pygapsgui.controllers.IsoController import IsoController
+from pygapsgui.controllers.IsoLoader import IsoLoader
 from pygapsgui.MainWindowUI import MainWindowUI
 from pygapsgui.models.IsoListModel import IsoListModel
 from pygapsgui.widgets.UtilityDialogs import error_dialog
@@ -28,6 +29,13 @@ class MainWindow(QW.QMainWindow):
         self.iso_model = IsoListModel(parent=self)
         self.iso_controller = IsoController(self.ui, self.iso_model)
 
+        # Create background isotherm loader
+        self.iso_loader = IsoLoader(parent=self)
+        self.iso_loader.batch_loaded.connect(self.iso_controller.add_isotherms)
+        self.iso_loader.progress.connect(self.load_progress)
+        self.iso_loader.finished.connect(self.load_finished)
+        self.ui.load_cancel_button.clicked.connect(self.iso_loader.cancel)
+
         # Create and connect menu
         self.connect_menu()
 
@@ -45,6 +53,15 @@ class MainWindow(QW.QMainWindow):
         # Display state
         self.ui.statusbar.showMessage('Ready', 5000)
 
+    def closeEvent(self, event):
+        """Stop any background work before closing."""
+        self.iso_loader.cancel()
+        from pygapsgui.utilities.workers import shutdown_process_pool
+        shutdown_process_pool()
+        from pygapsgui.utilities.parse_cache import evict
+        evict()
+        super().closeEvent(event)
+
     ########################################################
     # Drag & Drop functionality
     ########################################################
@@ -99,6 +116,7 @@ class MainWindow(QW.QMainWindow):
         self.ui.action_theme_auto.triggered.connect(partial(self.color_theme, "auto"))
         self.ui.action_theme_dark.triggered.connect(partial(self.color_theme, "dark"))
         self.ui.action_theme_light.triggered.connect(partial(self.color_theme, "light"))
+        self.ui.action_clear_cache.triggered.connect(self.clear_cache)
 
     def load_recent_files(self):
         """Get recent files from the settings, and place them in the menu."""
@@ -170,10 +188,18 @@ class MainWindow(QW.QMainWindow):
             if not filepaths:
                 return
 
-        for fp in filepaths:
-            self.last_dir = fp.parent
-            self.iso_controller.load(fp, fp.stem, fp.suffix)
-        self.iso_controller.select_last_iso()
+        filepaths = list(filepaths)
+        if not filepaths:
+            return
+        self.last_dir = filepaths[-1].parent
+
+        # Few files are faster to load directly
+        if len(filepaths) < self.iso_loader.min_parallel:
+            for fp in filepaths:
+                self.iso_controller.load(fp, fp.stem, fp.suffix.lower())
+            self.iso_controller.select_last_iso()
+        else:
+            self.iso_loader.load(filepaths)
 
         # Update in recent files
         self.update_recent_files(filepaths)
@@ -196,10 +222,34 @@ class MainWindow(QW.QMainWindow):
             if not filepaths:
                 return
 
-        for fp in filepaths:
-            self.last_dir = fp.parent
-            self.iso_controller.load_import(fp, fp.stem, ftype)
+        filepaths = list(filepaths)
+        self.last_dir = filepaths[-1].parent
+
+        if len(filepaths) < self.iso_loader.min_parallel:
+            for fp in filepaths:
+                self.iso_controller.load_import(fp, fp.stem, ftype)
+            self.iso_controller.select_last_iso()
+        else:
+            self.iso_loader.load_import(filepaths, ftype)
+
+    def load_progress(self, processed, total):
+        """Display progress of background loading."""
+        self.ui.load_progress.setMaximum(total)
+        self.ui.load_progress.setValue(processed)
+        self.ui.load_progress.setVisible(True)
+        self.ui.load_cancel_button.setVisible(True)
+
+    def load_finished(self, failures):
+        """Hide loading progress and report any files which could not be loaded."""
+        self.ui.load_progress.setVisible(False)
+        self.ui.load_cancel_button.setVisible(False)
         self.iso_controller.select_last_iso()
+        if failures:
+            error_dialog(
+                f"Some files could not be loaded ({len(failures)}):<br>" + "<br>".join(failures)
+            )
+        else:
+            self.ui.statusbar.showMessage('Loading finished', 2000)
 
     def save_iso(self, filepath=None):
         """Save isotherm to file."""
@@ -283,15 +333,15 @@ class MainWindow(QW.QMainWindow):
         isotherm = self.iso_controller.iso_current
         if not isotherm:
             return
-        isotherms = self.iso_model.get_checked()
-        if len(isotherms) != 2:
-            error_dialog("Select two isotherms: one to characterize and one for reference.")
-            return
-        isotherms.remove(isotherm)
-        if len(isotherms) != 1:
-            error_dialog("Unexpected isotherm selection error")
+        # a second checked isotherm is the reference, otherwise one from the library
+        isotherms = [iso for iso in self.iso_model.get_checked() if iso is not isotherm]
+        if len(isotherms) > 1:
+            error_dialog(
+                "Select one isotherm to characterize and, optionally, "
+                "one for reference. Other references are in the reference library."
+            )
             return
-        ref_isotherm = isotherms[0]
+        ref_isotherm = isotherms[0] if isotherms else None
 
         from pygapsgui.models.PlotAlphaSModel import PlotAlphaSModel
         from pygapsgui.views.PlotAlphaSDialog import PlotAlphaSDialog
@@ -491,6 +541,12 @@ class MainWindow(QW.QMainWindow):
         from pygapsgui.utilities.color_theme import set_theme
         set_theme()
 
+    def clear_cache(self):
+        """Remove all previously parsed isotherms from the cache."""
+        from pygapsgui.utilities.parse_cache import clear
+        clear()
+        self.ui.statusbar.showMessage('Isotherm cache cleared', 2000)
+
     ########################################################
     # About / examples
     ########################################################
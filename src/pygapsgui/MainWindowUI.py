@@ -292,6 +292,8 @@ class MainWindowUI():
         self.action_theme_dark.setObjectName("action_theme_dark")
         self.action_theme_auto = QW.QAction(main_window)
         self.action_theme_auto.setObjectName("action_theme_auto")
+        self.action_clear_cache = QW.QAction(main_window)
+        self.action_clear_cache.setObjectName("action_clear_cache")
 
         # about and example
         self.action_examples = QW.QAction(main_window)
@@ -346,6 +348,7 @@ class MainWindowUI():
             self.action_adsorbates,
             self.action_materials,
             self.menu_theme.menuAction(),
+            self.action_clear_cache,
         ])
         self.menu_theme.addActions([
             self.action_theme_auto,
@@ -360,6 +363,18 @@ class MainWindowUI():
         self.statusbar.setObjectName("statusbar")
         main_window.setStatusBar(self.statusbar)
 
+        # Loading progress, hidden unless loading in the background
+        self.load_progress = QW.QProgressBar()
+        self.load_progress.setObjectName("load_progress")
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setFormat("%v / %m")
+        self.load_progress.setVisible(False)
+        self.statusbar.addPermanentWidget(self.load_progress)
+        self.load_cancel_button = QW.QPushButton()
+        self.load_cancel_button.setObjectName("load_cancel_button")
+        self.load_cancel_button.setVisible(False)
+        self.statusbar.addPermanentWidget(self.load_cancel_button)
+
     def translate_UI(self, main_window):
         """Set UI text."""
         # yapf: disable
@@ -413,4 +428,6 @@ class MainWindowUI():
         self.action_theme_auto.setText(QW.QApplication.translate("MainWindow", "Auto", None, -1))
         self.action_theme_dark.setText(QW.QApplication.translate("MainWindow", "Dark", None, -1))
         self.action_theme_light.setText(QW.QApplication.translate("MainWindow", "Light", None, -1))
+        self.action_clear_cache.setText(QW.QApplication.translate("MainWindow", "Clear isotherm cache", None, -1))
+        self.load_cancel_button.setText(QW.QApplication.translate("MainWindow", "Cancel loading", None, -1))
         # yapf: enable
@@ -29,7 +29,10 @@ def exception_hook(exctype, exc, trace):
 def process_cl_args():
     """Process known arguments."""
     import argparse
-    parser = argparse.ArgumentParser(description='Directly open isotherms.')
+    parser = argparse.ArgumentParser(
+        description='Directly open isotherms.',
+        epilog="Use 'pygapsgui batch --help' to characterise isotherms without the GUI.",
+    )
     parser.add_argument(
         '--file',
         '-f',
@@ -42,6 +45,11 @@ def process_cl_args():
         action='store',
         help="Open a folder of isotherms.",
     )
+    parser.add_argument(
+        '--clear-cache',
+        action="store_true",
+        help="Remove all cached isotherms then exit.",
+    )
     parser.add_argument(
         '--test',
         action="store_true",
@@ -60,6 +68,15 @@ def process_cl_args():
 def main():
     """Main app entrypoint."""
 
+    # Required for worker processes in frozen executables
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    # Headless batch mode, the GUI is never started
+    if sys.argv[1:2] == ["batch"]:
+        from pygapsgui.batch import batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
     # Set custom exception hook
     sys._excepthook = sys.excepthook
     sys.excepthook = exception_hook
@@ -78,6 +95,11 @@ def main():
         print(version)
         sys.exit()
 
+    if parsed_args.clear_cache:
+        from pygapsgui.utilities.parse_cache import clear
+        clear()
+        sys.exit()
+
     # Create application
     app = QW.QApplication(qt_args)
     app.setOrganizationName("pyGAPS")
@@ -116,7 +138,8 @@ def main():
 
     elif parsed_args.folder:
         folder = pathlib.Path(parsed_args.folder)
-        filepaths = [x for x in folder.iterdir() if not x.is_dir()]
+        from pygapsgui.utilities.isotherm_io import LOAD_EXTENSIONS
+        filepaths = sorted(x for x in folder.iterdir() if x.suffix.lower() in LOAD_EXTENSIONS)
         mainwnd.open_iso(filepaths)
 
     # Show and finish
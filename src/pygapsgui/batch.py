@@ -0,0 +1,374 @@
+"""
+Headless batch characterisation of a folder of isotherms.
+
+Usage: ``pygapsgui batch FOLDER [--methods ...] [--output FILE] [--jobs N]``
+
+Each isotherm is processed by a separate worker process, running the same
+calculations (with the same default settings) as the characterisation
+dialogs. All results are gathered in a single table, one row per isotherm,
+which is written as CSV or JSON.
+"""
+
+import pathlib
+import sys
+
+
+def _ordered(isotherm, branch, loading_unit):
+    """Relative pressure / molar loading, as prepared by the dialogs."""
+    from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+    return get_iso_loading_and_pressure_ordered(
+        isotherm, branch, {
+            "loading_basis": "molar",
+            "loading_unit": loading_unit
+        }, {"pressure_mode": "relative"}
+    )
+
+
+def _psd_summary(prefix, results, material_unit):
+    """Reduce a pore size distribution to a few comparable values."""
+    widths = results["pore_widths"]
+    distribution = results["pore_distribution"]
+    cumulative = results["pore_volume_cumulative"]
+    return {
+        f"{prefix} modal pore width [nm]": widths[distribution.argmax()],
+        f"{prefix} total pore volume [cm3/{material_unit}]": cumulative[-1],
+    }
+
+
+def calc_bet(isotherm):
+    """BET area, as in AreaBETModel."""
+    from pygaps.characterisation.area_bet import area_BET_raw
+    from pygapsgui.models.AreaBETModel import AreaBETModel
+    pressure, loading = _ordered(isotherm, AreaBETModel.branch, "mol")
+    (
+        bet_area,
+        c_const,
+        n_monolayer,
+        p_monolayer,
+        _,
+        _,
+        min_point,
+        max_point,
+        corr_coef,
+    ) = area_BET_raw(
+        pressure,
+        loading,
+        isotherm.adsorbate.get_prop("cross_sectional_area"),
+    )
+    return {
+        f"BET area [m2/{isotherm.material_unit}]": bet_area,
+        "BET R^2": corr_coef,
+        "BET C constant": c_const,
+        f"BET monolayer uptake [mmol/{isotherm.material_unit}]": n_monolayer * 1000,
+        "BET monolayer pressure [p/p0]": p_monolayer,
+        "BET pressure limits": (pressure[min_point], pressure[max_point]),
+    }
+
+
+def calc_langmuir(isotherm):
+    """Langmuir area, as in AreaLangModel."""
+    from pygaps.characterisation.area_lang import area_langmuir_raw
+    from pygapsgui.models.AreaLangModel import AreaLangModel
+    pressure, loading = _ordered(isotherm, AreaLangModel.branch, "mol")
+    (
+        lang_area,
+        k_const,
+        n_monolayer,
+        _,
+        _,
+        min_point,
+        max_point,
+        corr_coef,
+    ) = area_langmuir_raw(
+        pressure,
+        loading,
+        isotherm.adsorbate.get_prop("cross_sectional_area"),
+    )
+    return {
+        f"Langmuir area [m2/{isotherm.material_unit}]": lang_area,
+        "Langmuir R^2": corr_coef,
+        "Langmuir K constant": k_const,
+        f"Langmuir monolayer uptake [mmol/{isotherm.material_unit}]": n_monolayer * 1000,
+        "Langmuir pressure limits": (pressure[min_point], pressure[max_point]),
+    }
+
+
+def calc_tplot(isotherm):
+    """t-plot, as in PlotTModel (first thickness model, first linear region)."""
+    from pygaps.characterisation.models_thickness import _THICKNESS_MODELS
+    from pygaps.characterisation.models_thickness import get_thickness_model
+    from pygaps.characterisation.t_plots import t_plot_raw
+    from pygapsgui.models.PlotTModel import PlotTModel
+    models = [m for m in _THICKNESS_MODELS if m != "zero thickness"]
+    pressure, loading = _ordered(isotherm, PlotTModel.branch, "mmol")
+    results, _ = t_plot_raw(
+        loading,
+        pressure,
+        get_thickness_model(models[0]),
+        isotherm.adsorbate.liquid_density(isotherm.temperature),
+        isotherm.adsorbate.molar_mass(),
+    )
+    if not results:
+        raise ValueError("No linear region found.")
+    return {
+        f"t-plot pore volume [cm3/{isotherm.material_unit}]": results[0].get("adsorbed_volume"),
+        f"t-plot area [m2/{isotherm.material_unit}]": results[0].get("area"),
+        "t-plot R^2": results[0].get("corr_coef"),
+    }
+
+
+def _calc_dada(isotherm, ptype, exponent):
+    """DR/DA plot, as in DADRModel."""
+    from pygaps.characterisation.dr_da_plots import da_plot_raw
+    from pygapsgui.models.DADRModel import DADRModel
+    pressure, loading = _ordered(isotherm, DADRModel.branch, "mol")
+    (
+        microp_volume,
+        potential,
+        exp,
+        _,
+        _,
+        _,
+        _,
+        corr_coef,
+    ) = da_plot_raw(
+        pressure,
+        loading,
+        isotherm.temperature,
+        isotherm.adsorbate.molar_mass(),
+        isotherm.adsorbate.liquid_density(isotherm.temperature),
+        exponent,
+    )
+    results = {
+        f"{ptype} micropore volume [cm3/{isotherm.material_unit}]": microp_volume * 1000,
+        f"{ptype} effective potential [kJ/mol]": potential,
+        f"{ptype} R^2": corr_coef,
+    }
+    if ptype == "DA":
+        results["DA exponent"] = exp
+    return results
+
+
+def calc_dr(isotherm):
+    """Dubinin-Radushkevich plot."""
+    return _calc_dada(isotherm, "DR", 2)
+
+
+def calc_da(isotherm):
+    """Dubinin-Astakov plot, with exponent fitting."""
+    return _calc_dada(isotherm, "DA", None)
+
+
+def calc_psd_meso(isotherm):
+    """Mesoporous PSD, as in PSDMesoModel (first of each model list)."""
+    from pygaps.characterisation.models_kelvin import _KELVIN_MODELS
+    from pygaps.characterisation.models_thickness import _THICKNESS_MODELS
+    from pygaps.characterisation.psd_meso import _MESO_PSD_MODELS
+    from pygaps.characterisation.psd_meso import _PORE_GEOMETRIES
+    from pygaps.characterisation.psd_meso import psd_mesoporous
+    from pygapsgui.models.PSDMesoModel import PSDMesoModel
+    results = psd_mesoporous(
+        isotherm,
+        branch=PSDMesoModel.branch,
+        psd_model=list(_MESO_PSD_MODELS)[0],
+        pore_geometry=list(_PORE_GEOMETRIES)[0],
+        meniscus_geometry=None,
+        thickness_model=list(_THICKNESS_MODELS)[0],
+        kelvin_model=list(_KELVIN_MODELS)[0],
+    )
+    return _psd_summary("Meso PSD", results, isotherm.material_unit)
+
+
+def calc_psd_micro(isotherm):
+    """Microporous PSD, as in PSDMicroModel (first of each model list)."""
+    from pygaps.characterisation.models_hk import _ADSORBENT_MODELS
+    from pygaps.characterisation.psd_micro import _MICRO_PSD_MODELS
+    from pygaps.characterisation.psd_micro import _PORE_GEOMETRIES
+    from pygaps.characterisation.psd_micro import psd_microporous
+    from pygapsgui.models.PSDMicroModel import PSDMicroModel
+    results = psd_microporous(
+        isotherm,
+        branch=PSDMicroModel.branch,
+        psd_model=list(_MICRO_PSD_MODELS)[0],
+        pore_geometry=list(_PORE_GEOMETRIES)[0],
+        material_model=list(_ADSORBENT_MODELS)[0],
+    )
+    return _psd_summary("Micro PSD", results, isotherm.material_unit)
+
+
+def calc_psd_kernel(isotherm):
+    """Kernel fit PSD, as in PSDKernelModel (first available kernel)."""
+    from pygapsgui.models.PSDKernelModel import PSDKernelModel
+    from pygapsgui.utilities.kernel_store import kernel_names
+    from pygapsgui.utilities.kernel_store import kernel_projection
+    projection = kernel_projection(isotherm, kernel_names()[0], PSDKernelModel.branch)
+    results = projection.fit(
+        bspline_order=PSDKernelModel.bspline_order,
+        regularisation=PSDKernelModel.regularisation,
+    )
+    return _psd_summary("Kernel PSD", results, isotherm.material_unit)
+
+
+def calc_guess(isotherm):
+    """Best fitting model, as in IsoModelGuessModel."""
+    from pygaps import ModelIsotherm
+    from pygaps.modelling import _GUESS_MODELS
+    from pygaps.utilities.exceptions import CalculationError
+    from pygapsgui.models.IsoModelGuessModel import IsoModelGuessModel
+    # model isotherms only have the branch they were fitted on
+    branch = getattr(isotherm, "branch", IsoModelGuessModel.branch)
+    pressure = isotherm.pressure(branch=branch)
+    loading = isotherm.loading(branch=branch)
+    iso_params = isotherm.to_dict()
+    # passed explicitly below, or fit settings of a model isotherm
+    for key in ("pressure", "loading", "branch", "model", "plot_fit"):
+        iso_params.pop(key, None)
+
+    attempts = []
+    for model in _GUESS_MODELS:
+        try:
+            attempts.append(
+                ModelIsotherm(
+                    pressure=pressure,
+                    loading=loading,
+                    branch=branch,
+                    model=model,
+                    **iso_params,
+                )
+            )
+        except CalculationError:
+            pass
+    if not attempts:
+        raise ValueError("No model could be reliably fit on the isotherm.")
+    best = min(attempts, key=lambda x: x.model.rmse)
+    return {
+        "Best model": best.model.name,
+        "Best model RMSE": best.model.rmse,
+    }
+
+
+METHODS = {
+    "bet": calc_bet,
+    "langmuir": calc_langmuir,
+    "tplot": calc_tplot,
+    "dr": calc_dr,
+    "da": calc_da,
+    "psd_meso": calc_psd_meso,
+    "psd_micro": calc_psd_micro,
+    "psd_kernel": calc_psd_kernel,
+    "guess": calc_guess,
+}
+
+
+def batch_job(path, methods):
+    """Worker entrypoint: load one isotherm and run all methods on it."""
+    import logging
+    logging.getLogger('pygaps').setLevel(logging.ERROR)
+
+    from pygapsgui.utilities.isotherm_io import isotherm_from_file
+
+    path = pathlib.Path(path)
+    row = {"file": path.name}
+    try:
+        isotherm = isotherm_from_file(path)
+    except Exception as exc:
+        row["error"] = str(exc)
+        return row
+
+    row.update({
+        "material": str(isotherm.material),
+        "adsorbate": str(isotherm.adsorbate),
+        "temperature [K]": isotherm.temperature,
+    })
+    for method in methods:
+        try:
+            row.update(METHODS[method](isotherm))
+        except Exception as exc:
+            row[f"{method} error"] = str(exc)
+    return row
+
+
+def process_batch_args(args):
+    """Process batch mode arguments."""
+    import argparse
+
+    from pygapsgui.utilities.workers import worker_count
+    parser = argparse.ArgumentParser(
+        prog="pygapsgui batch",
+        description="Characterise a folder of isotherms without starting the GUI.",
+    )
+    parser.add_argument(
+        'folder',
+        action='store',
+        help="Folder with isotherm files (aif, json, csv, xls).",
+    )
+    parser.add_argument(
+        '--methods',
+        '-m',
+        action='store',
+        nargs='+',
+        choices=list(METHODS),
+        default=list(METHODS),
+        help="Calculations to run (default: all).",
+    )
+    parser.add_argument(
+        '--output',
+        '-o',
+        action='store',
+        default="results.csv",
+        help="Result table, CSV or JSON depending on extension (default: results.csv).",
+    )
+    parser.add_argument(
+        '--jobs',
+        '-j',
+        action='store',
+        type=int,
+        default=worker_count(),
+        help="Number of worker processes.",
+    )
+    return parser.parse_args(args)
+
+
+def batch_main(args=None):
+    """Batch mode entrypoint, returns an exit code."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures import as_completed
+
+    import pandas
+
+    from pygapsgui.utilities.isotherm_io import LOAD_EXTENSIONS
+
+    parsed_args = process_batch_args(args)
+    folder = pathlib.Path(parsed_args.folder)
+    output = pathlib.Path(parsed_args.output)
+    if output.suffix not in ('.csv', '.json'):
+        print(f"Unknown output format '{output.suffix}', use .csv or .json.", file=sys.stderr)
+        return 2
+    filepaths = sorted(x for x in folder.iterdir() if x.suffix.lower() in LOAD_EXTENSIONS)
+    if not filepaths:
+        print(f"No isotherms found in '{folder}'.", file=sys.stderr)
+        return 1
+
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=max(1, parsed_args.jobs),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = {pool.submit(batch_job, fp, parsed_args.methods): fp for fp in filepaths}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                row = future.result()
+            except Exception as exc:
+                # e.g. a worker process which crashed
+                row = {"file": futures[future].name, "error": str(exc) or repr(exc)}
+            rows.append(row)
+            print(f"[{done}/{len(filepaths)}] {row['file']}", file=sys.stderr)
+
+    table = pandas.DataFrame(rows).sort_values("file")
+    if output.suffix == '.csv':
+        table.to_csv(output, index=False)
+    else:
+        table.to_json(output, orient="records", indent=2)
+    print(f"Results for {len(rows)} isotherms written to '{output}'.", file=sys.stderr)
+    return 0
@@ -8,6 +8,7 @@ from pygaps.units.converter_mode import _PRESSURE_MODE
 from pygaps.units.converter_unit import _TEMPERATURE_UNITS
 from pygaps.utilities import exceptions as pge
 from pygapsgui.models.IsoModel import IsoModel
+from pygapsgui.utilities import conversion_cache
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
@@ -124,7 +125,10 @@ class IsoController():
 
     def iso_display_update(self):
         """Update all the isotherm display."""
+        # the isotherm was modified in place, converted data is stale
+        conversion_cache.modified(self.iso_current)
         self.iso_display_properties()
+        self.graph_view.invalidate(self.iso_current)
         self.graph_view.update()
 
     def clear_iso_display(self):
@@ -235,6 +239,8 @@ class IsoController():
             modified = True
 
         if modified:
+            # Relative pressure depends on adsorbate and temperature
+            conversion_cache.modified(self.iso_current)
             # We need to recalculate units
             self.unit_widget.init_units(self.iso_current)
             # And refresh graph
@@ -310,20 +316,8 @@ class IsoController():
 
     def load(self, path, name, ext):
         """Use pygaps parsing to load an isotherm and add it to the model."""
-
-        isotherm = None
-
-        import pygaps.parsing as pgp
-        if ext == '.csv':
-            isotherm = pgp.isotherm_from_csv(path)
-        elif ext == '.json':
-            isotherm = pgp.isotherm_from_json(path)
-        elif ext == '.xls':
-            isotherm = pgp.isotherm_from_xl(path)
-        elif ext == '.aif':
-            isotherm = pgp.isotherm_from_aif(path)
-        else:
-            raise Exception(f"Unknown isotherm type '{ext}'.")
+        from pygapsgui.utilities.isotherm_io import isotherm_from_file
+        isotherm = isotherm_from_file(path, ext)
 
         if not isotherm:
             return
@@ -334,9 +328,9 @@ class IsoController():
         """Use pygaps parsing to import an isotherm and add it to the model."""
         isotherm = None
 
-        import pygaps.parsing as pgp
+        from pygapsgui.utilities.isotherm_io import isotherm_from_import
         try:
-            isotherm = pgp.isotherm_from_commercial(path=path, **settings)
+            isotherm = isotherm_from_import(path, settings)
         except pge.ParsingError as exc:
             error_dialog(str(exc))
         except BaseException as exc:
@@ -362,6 +356,21 @@ class IsoController():
         # Add to the list model
         self.iso_list_model.appendRow(iso_model)
 
+    def add_isotherms(self, named_isotherms):
+        """Add a batch of (name, isotherm) pairs, refreshing the materials only once."""
+        new_materials = False
+        for name, isotherm in named_isotherms:
+            if isotherm.material not in pygaps.MATERIAL_LIST:
+                pygaps.MATERIAL_LIST.append(isotherm.material)
+                new_materials = True
+
+            iso_model = IsoModel(name)
+            iso_model.setData(isotherm)
+            self.iso_list_model.appendRow(iso_model)
+
+        if new_materials:
+            self.refresh_material_edit(self.mw_widget.material_input.currentText())
+
     def save(self, path, ext):
         """Save isotherm to disk."""
         isotherm = self.iso_current
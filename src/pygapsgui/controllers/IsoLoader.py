@@ -0,0 +1,117 @@
+from qtpy import QtCore as QC
+
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.isotherm_io import import_job
+from pygapsgui.utilities.isotherm_io import load_job
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import process_pool_broken
+
+
+class IsoLoader(QC.QObject):
+    """
+    Load many isotherm files without blocking the GUI.
+
+    Files are parsed on the shared process pool. A timer periodically
+    collects finished jobs and streams the parsed isotherms back in batches,
+    in the same order in which the files were requested. Files that fail
+    to parse are collected and reported once loading is finished.
+
+    Loading only uses worker processes for ``min_parallel`` files or more,
+    as for a few files the process startup is slower than parsing.
+    """
+
+    batch_loaded = QC.Signal(list)  # list of (name, isotherm)
+    progress = QC.Signal(int, int)  # files processed, total files
+    finished = QC.Signal(list)  # list of failure messages
+
+    min_parallel = 4
+    batch_interval = 100  # ms
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.futures = []
+        self.failures = []
+        self.total = 0
+        self.processed = 0
+
+        self.timer = QC.QTimer(self)
+        self.timer.setInterval(self.batch_interval)
+        self.timer.timeout.connect(self.collect)
+
+    def is_running(self):
+        """Whether files are currently being loaded."""
+        return bool(self.futures)
+
+    def load(self, filepaths):
+        """Queue isotherm files to be opened."""
+        self.start([(load_job, fp, fp.stem, fp.suffix.lower()) for fp in filepaths])
+
+    def load_import(self, filepaths, settings):
+        """Queue manufacturer files to be imported."""
+        self.start([(import_job, fp, fp.stem, settings) for fp in filepaths])
+
+    def start(self, jobs):
+        """Submit jobs to the process pool and start collecting results."""
+        if not jobs:
+            return
+        pool = get_process_pool()
+        for job, *args in jobs:
+            self.futures.append(pool.submit(job, *args))
+        self.total += len(jobs)
+        self.progress.emit(self.processed, self.total)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def collect(self):
+        """Gather finished jobs (in order) and emit them as a batch."""
+        ready = 0
+        for future in self.futures:
+            if not future.done():
+                break
+            ready += 1
+        if not ready:
+            return
+
+        finished, self.futures = self.futures[:ready], self.futures[ready:]
+        batch = []
+        for future in finished:
+            if future.cancelled():
+                continue
+            try:
+                name, isotherm, error = future.result()
+            except Exception as exc:
+                # if the pool itself is broken (e.g. a worker crashed)
+                # a new one will be created on next use
+                process_pool_broken(exc)
+                name, isotherm, error = None, None, str(exc)
+            if error:
+                self.failures.append(error)
+            elif isotherm:
+                batch.append((name, isotherm_from_json(isotherm)))
+
+        self.processed += ready
+        if batch:
+            self.batch_loaded.emit(batch)
+        self.progress.emit(self.processed, self.total)
+
+        if not self.futures:
+            self.finish()
+
+    def cancel(self):
+        """Discard all files which are not yet loaded."""
+        if not self.futures:
+            return
+        for future in self.futures:
+            future.cancel()
+        self.failures.append(f"Loading cancelled, {len(self.futures)} file(s) skipped.")
+        self.futures = []
+        self.finish()
+
+    def finish(self):
+        """Stop collecting and report any failures."""
+        self.timer.stop()
+        failures = self.failures
+        self.failures = []
+        self.total = 0
+        self.processed = 0
+        self.finished.emit(failures)
@@ -1,7 +1,10 @@
 """BET area QT model."""
 
+import numpy
+
 from pygaps.characterisation.area_bet import area_BET
 from pygaps.characterisation.area_bet import area_BET_raw
+from pygaps.characterisation.area_bet import bet_parameters
 from pygaps.characterisation.area_bet import bet_transform
 from pygaps.characterisation.area_bet import roq_transform
 from pygaps.characterisation.area_bet import simple_bet
@@ -9,12 +12,25 @@ from pygaps.graphing.calc_graphs import bet_plot
 from pygaps.graphing.calc_graphs import roq_plot
 from pygaps.utilities.exceptions import CalculationError
 from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import limit_window
+from pygapsgui.utilities.linear_windows import window_increasing
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.window_map import plot_window_map
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class AreaBETModel():
-    """BET specific area calculations: QT MVC Model."""
+    """
+    BET specific area calculations: QT MVC Model.
+
+    The BET transform is fitted for every window of points at once
+    (see ``linear_windows``), which gives the map of all windows and an
+    immediate preview of the window under the slider.
+    """
 
     isotherm = None
     view = None
@@ -22,11 +38,17 @@ class AreaBETModel():
     # Settings
     branch = "ads"
     limits = None
+    map_display = "BET area"
+    map_p_tolerance = 0.1  # for the monolayer pressure criterion
 
     # Calculated
     loading = None
     pressure = None
     cross_section = None
+    regression = None
+    bet_map = None
+    map_window = None
+    map_colorbar = None
 
     # Results
     bet_area = None
@@ -50,7 +72,7 @@ class AreaBETModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "BET area cannot be calculated for supercritical "
@@ -71,6 +93,8 @@ class AreaBETModel():
         self.view.label_n_mono.setText(f"Monolayer uptake [mmol/{self.isotherm.material_unit}]:")
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
+        self.view.map_dropdown.addItems(["BET area", "C constant", "Fit (R^2)", "Rouquerol criteria"])
+        self.view.map_dropdown.setCurrentText(self.map_display)
 
         # view graph
         self.view.iso_graph.branch = self.branch
@@ -81,10 +105,16 @@ class AreaBETModel():
         self.view.iso_graph.y2_data = None
         self.view.iso_graph.set_isotherms([self.isotherm])  # always last
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
         self.view.x_select.slider.rangeChanged.connect(self.calc_with_limits)
+        self.view.map_dropdown.currentTextChanged.connect(self.select_map_display)
+        self.view.map_consistent.toggled.connect(self.plot_map)
+        self.view.map_graph.canvas.mpl_connect("button_press_event", self.select_map_window)
         self.view.export_btn.clicked.connect(self.export_results)
         self.view.button_box.accepted.connect(self.view.accept)
         self.view.button_box.rejected.connect(self.view.reject)
@@ -95,6 +125,7 @@ class AreaBETModel():
         self.cross_section = self.isotherm.adsorbate.get_prop("cross_sectional_area")
         # dynamic parameters
         self.prepare_values()
+        self.calc_map()
         # run calculation
         self.calc_auto()
 
@@ -107,11 +138,16 @@ class AreaBETModel():
                 "loading_unit": "mol"
             }, {"pressure_mode": "relative"}
         )
+        self.regression = WindowRegression(self.pressure, bet_transform(self.pressure, self.loading))
 
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.pressure, self.loading, self.limits)
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (self.pressure[self.min_point], self.pressure[self.max_point])
             self.slider_reset()
             self.output_log()
@@ -124,7 +160,12 @@ class AreaBETModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.output_preview()
+        self.calc_worker.submit(self.calculate, self.calc_done, self.pressure, self.loading, self.limits)
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -132,33 +173,66 @@ class AreaBETModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def calculate(self, pressure, loading, limits):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
-            # TODO Should put all these into a dictionary
             try:
-                (
-                    self.bet_area,
-                    self.c_const,
-                    self.n_monolayer,
-                    self.p_monolayer,
-                    self.slope,
-                    self.intercept,
-                    self.min_point,
-                    self.max_point,
-                    self.corr_coef,
-                ) = area_BET_raw(
-                    self.pressure,
-                    self.loading,
+                values = area_BET_raw(
+                    pressure,
+                    loading,
                     self.cross_section,
-                    p_limits=self.limits,
+                    p_limits=limits,
                 )
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = dict(
+                zip((
+                    "bet_area",
+                    "c_const",
+                    "n_monolayer",
+                    "p_monolayer",
+                    "slope",
+                    "intercept",
+                    "min_point",
+                    "max_point",
+                    "corr_coef",
+                ), values)
+            )
+            result.output += log_hook.get_logs()
+            return result
+
+    def calc_map(self):
+        """Evaluate the BET fit and Rouquerol criteria for all windows of points."""
+        slope, intercept, corr_coef = self.regression.fit()
+        start, end = self.regression.grid()
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            n_monolayer, p_monolayer, c_const, bet_area = bet_parameters(
+                slope,
+                intercept,
+                self.cross_section,
+            )
+            p_from_n = numpy.interp(n_monolayer, self.loading, self.pressure)
+            criteria = numpy.stack([
+                c_const > 0,
+                window_increasing(roq_transform(self.pressure, self.loading)),
+                (self.loading[start] < n_monolayer) & (n_monolayer < self.loading[end]),
+                abs(p_from_n - p_monolayer) < self.map_p_tolerance * p_monolayer,
+            ])
+
+        fitted = ~numpy.isnan(slope)
+        passed = numpy.where(fitted, criteria.sum(axis=0), numpy.nan)
+        self.bet_map = {
+            "BET area": bet_area,
+            "C constant": c_const,
+            "Fit (R^2)": corr_coef,
+            "Rouquerol criteria": passed,
+            "consistent": fitted & criteria.all(axis=0),
+        }
+        self.plot_map()
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -170,6 +244,22 @@ class AreaBETModel():
         self.view.result_intercept.setText(f'{self.intercept:.4}')
         self.view.result_r.setText(f'{self.corr_coef:.4}')
 
+    def output_preview(self):
+        """Display the fit of the selected window while it is calculated by pyGAPS."""
+        minimum, maximum = limit_window(self.pressure, self.limits)
+        slope, intercept, corr_coef = self.regression.fit(minimum, maximum)
+        if numpy.isnan(slope):
+            return
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            n_monolayer, p_monolayer, c_const, bet_area = bet_parameters(slope, intercept, self.cross_section)
+        self.view.result_bet.setText(f'{bet_area:g}')
+        self.view.result_c.setText(f'{c_const:.4}')
+        self.view.result_mono_n.setText(f'{n_monolayer * 1000:.4}')
+        self.view.result_mono_p.setText(f'{p_monolayer:.4}')
+        self.view.result_slope.setText(f'{slope:.4}')
+        self.view.result_intercept.setText(f'{intercept:.4}')
+        self.view.result_r.setText(f'{corr_coef:.4}')
+
     def output_log(self):
         """Output text or dialog error/warning/info."""
         self.view.output.setText(self.output)
@@ -181,7 +271,8 @@ class AreaBETModel():
         # Isotherm plot update
         self.view.iso_graph.draw_isotherms()
         self.view.iso_graph.ax.autoscale(enable=False)
-        self.view.iso_graph.ax.plot(
+        self.view.iso_graph.set_line(
+            "fit",
             self.pressure,
             simple_bet(self.pressure, self.n_monolayer * 1000, self.c_const),
             c='yellow',
@@ -216,8 +307,40 @@ class AreaBETModel():
         )
         self.view.rouq_graph.canvas.draw_idle()
 
+        # Mark the window on the map of all windows
+        self.plot_map_window()
+
+    def plot_map(self):
+        """Plot the selected quantity for all windows of points."""
+        values = self.bet_map[self.map_display]
+        if self.view.map_consistent.isChecked():
+            values = numpy.where(self.bet_map["consistent"], values, numpy.nan)
+        self.map_colorbar, self.map_window = plot_window_map(
+            self.view.map_graph.ax,
+            self.pressure,
+            values,
+            self.map_display,
+            colorbar=self.map_colorbar,
+            clip=self.map_display != "Rouquerol criteria",
+        )
+        self.plot_map_window()
+
+    def plot_map_window(self):
+        """Mark the currently selected window on the map."""
+        if self.map_window is None:
+            return
+        if self.max_point is None or self.max_point >= len(self.pressure):
+            self.map_window.set_data([], [])
+        else:
+            self.map_window.set_data(
+                [self.pressure[self.max_point]],
+                [self.pressure[self.min_point]],
+            )
+        self.view.map_graph.canvas.draw_idle()
+
     def plot_clear(self):
         """Reset plots to default values."""
+        self.view.iso_graph.remove_line("fit")
         self.view.iso_graph.draw_isotherms()
         self.view.bet_graph.clear()
         self.view.bet_graph.canvas.draw_idle()
@@ -234,8 +357,28 @@ class AreaBETModel():
         self.branch = self.view.branch_dropdown.currentText()
         self.view.iso_graph.branch = self.branch
         self.prepare_values()
+        self.calc_map()
         self.calc_auto()
 
+    def select_map_display(self, text):
+        """Handle selection of the quantity shown on the map of all windows."""
+        self.map_display = text
+        self.plot_map()
+
+    def select_map_window(self, event):
+        """Use the window clicked on the map as calculation limits."""
+        if event.inaxes != self.view.map_graph.ax or self.view.map_graph.navbar.mode:
+            return
+        midpoints = (self.pressure[1:] + self.pressure[:-1]) / 2
+        first = numpy.searchsorted(midpoints, event.ydata)
+        last = numpy.searchsorted(midpoints, event.xdata)
+        if last - first < 2:
+            return
+        # pyGAPS excludes points at the upper limit
+        self.limits = (self.pressure[first], numpy.nextafter(self.pressure[last], numpy.inf))
+        self.slider_reset()
+        self.calc_with_limits(*self.limits)
+
     def result_dict(self):
         """Return a dictionary of results."""
         return {
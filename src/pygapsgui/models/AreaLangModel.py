@@ -1,16 +1,29 @@
+import numpy
+
 from pygaps.characterisation.area_lang import area_langmuir
 from pygaps.characterisation.area_lang import area_langmuir_raw
+from pygaps.characterisation.area_lang import langmuir_parameters
 from pygaps.characterisation.area_lang import langmuir_transform
 from pygaps.characterisation.area_lang import simple_lang
 from pygaps.graphing.calc_graphs import langmuir_plot
 from pygaps.utilities.exceptions import CalculationError
 from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import limit_window
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class AreaLangModel():
-    """Langmuir specific area calculations: QT MVC Model."""
+    """
+    Langmuir specific area calculations: QT MVC Model.
+
+    The fit of the window under the slider is previewed from the
+    prepared ``WindowRegression`` while pyGAPS calculates it.
+    """
 
     isotherm = None
     view = None
@@ -23,6 +36,7 @@ class AreaLangModel():
     loading = None
     pressure = None
     cross_section = None
+    regression = None
 
     # Results
     lang_area = None
@@ -46,7 +60,7 @@ class AreaLangModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "Langmuir area cannot be defined for supercritical "
@@ -76,6 +90,9 @@ class AreaLangModel():
         self.view.iso_graph.loading_unit = "mmol"
         self.view.iso_graph.set_isotherms([self.isotherm])
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
@@ -102,11 +119,16 @@ class AreaLangModel():
                 "loading_unit": "mol"
             }, {"pressure_mode": "relative"}
         )
+        self.regression = WindowRegression(self.pressure, langmuir_transform(self.pressure, self.loading))
 
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.pressure, self.loading, self.limits)
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (self.pressure[self.min_point], self.pressure[self.max_point])
             self.slider_reset()
             self.output_log()
@@ -119,7 +141,12 @@ class AreaLangModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.output_preview()
+        self.calc_worker.submit(self.calculate, self.calc_done, self.pressure, self.loading, self.limits)
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -127,31 +154,35 @@ class AreaLangModel():
             self.plot_clear()
             self.output_log()
 
-    def calculate(self):
+    def calculate(self, pressure, loading, limits):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
             try:
-                (
-                    self.lang_area,
-                    self.k_const,
-                    self.n_monolayer,
-                    self.slope,
-                    self.intercept,
-                    self.min_point,
-                    self.max_point,
-                    self.corr_coef,
-                ) = area_langmuir_raw(
-                    self.pressure,
-                    self.loading,
+                values = area_langmuir_raw(
+                    pressure,
+                    loading,
                     self.cross_section,
-                    p_limits=self.limits,
+                    p_limits=limits,
                 )
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = dict(
+                zip((
+                    "lang_area",
+                    "k_const",
+                    "n_monolayer",
+                    "slope",
+                    "intercept",
+                    "min_point",
+                    "max_point",
+                    "corr_coef",
+                ), values)
+            )
+            result.output += log_hook.get_logs()
+            return result
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -162,6 +193,21 @@ class AreaLangModel():
         self.view.result_intercept.setText(f'{self.intercept:.4}')
         self.view.result_r.setText(f'{self.corr_coef:.4}')
 
+    def output_preview(self):
+        """Display the fit of the selected window while it is calculated by pyGAPS."""
+        minimum, maximum = limit_window(self.pressure, self.limits)
+        slope, intercept, corr_coef = self.regression.fit(minimum, maximum)
+        if numpy.isnan(slope):
+            return
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            n_monolayer, k_const, lang_area = langmuir_parameters(slope, intercept, self.cross_section)
+        self.view.result_lang.setText(f'{lang_area:.4}')
+        self.view.result_k.setText(f'{k_const:.4}')
+        self.view.result_mono_n.setText(f'{n_monolayer * 1000:.4}')
+        self.view.result_slope.setText(f'{slope:.4}')
+        self.view.result_intercept.setText(f'{intercept:.4}')
+        self.view.result_r.setText(f'{corr_coef:.4}')
+
     def output_log(self):
         """Output text or dialog error/warning/info."""
         self.view.output.setText(self.output)
@@ -178,7 +224,8 @@ class AreaLangModel():
         # Isotherm plot update
         self.view.iso_graph.draw_isotherms()
         self.view.iso_graph.ax.autoscale(enable=False)
-        self.view.iso_graph.ax.plot(
+        self.view.iso_graph.set_line(
+            "fit",
             self.pressure,
             simple_lang(self.pressure, self.n_monolayer * 1000, self.k_const),
             c='yellow',
@@ -200,6 +247,7 @@ class AreaLangModel():
 
     def plot_clear(self):
         """Reset plots to default values."""
+        self.view.iso_graph.remove_line("fit")
         self.view.iso_graph.draw_isotherms()
         self.view.lang_graph.clear()
         self.view.lang_graph.canvas.draw_idle()
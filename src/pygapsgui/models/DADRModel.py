@@ -1,3 +1,6 @@
+import numpy
+from scipy import constants
+
 from pygaps.characterisation.dr_da_plots import da_plot
 from pygaps.characterisation.dr_da_plots import da_plot_raw
 from pygaps.characterisation.dr_da_plots import dr_plot
@@ -6,12 +9,28 @@ from pygaps.characterisation.dr_da_plots import log_v_adj
 from pygaps.graphing.calc_graphs import dra_plot
 from pygaps.utilities.exceptions import CalculationError
 from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import limit_window
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.window_map import plot_window_map
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class DADRModel():
-    """Dubinin-Astakov and Dubinin-Radushkevich calculations: QT MVC Model."""
+    """
+    Dubinin-Astakov and Dubinin-Radushkevich calculations: QT MVC Model.
+
+    The fit of the window under the slider is previewed from a
+    ``WindowRegression`` at the current exponent while pyGAPS calculates it.
+
+    For DA, all windows of points are also fitted at a grid of exponents
+    in one regression. Each window is shown at the exponent pyGAPS would
+    choose (lowest standard error of the slope), and the optimum is the
+    window and exponent with the lowest relative error of the slope.
+    """
 
     isotherm = None
     view = None
@@ -20,6 +39,14 @@ class DADRModel():
     branch = "ads"
     limits = None
     exponent = None
+    regression = None
+    regression_exp = None
+    map_display = "Micropore volume"
+    map_exponents = numpy.linspace(1, 3, 21)  # the pyGAPS exponent bounds
+    map_min_points = 5  # for the optimum
+    da_map = None
+    map_window = None
+    map_colorbar = None
 
     # Results
     microp_volume = None
@@ -46,7 +73,7 @@ class DADRModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "Plot cannot be calculated for supercritical "
@@ -72,11 +99,21 @@ class DADRModel():
         self.view.iso_graph.pressure_mode = "relative"
         self.view.iso_graph.set_isotherms([self.isotherm])
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
         self.view.x_select.slider.rangeChanged.connect(self.calc_with_limits)
         if self.ptype == "DA":
             self.view.dr_exp_input.valueChanged.connect(self.select_exp)
+            self.view.map_dropdown.addItems([
+                "Micropore volume", "Effective potential", "Exponent", "Fit (R^2)"
+            ])
+            self.view.map_dropdown.setCurrentText(self.map_display)
+            self.view.map_dropdown.currentTextChanged.connect(self.select_map_display)
+            self.view.map_optimum_button.clicked.connect(self.select_map_optimum)
+            self.view.map_graph.canvas.mpl_connect("button_press_event", self.select_map_window)
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.export_btn.clicked.connect(self.export_results)
         self.view.button_box.accepted.connect(self.view.accept)
@@ -90,6 +127,8 @@ class DADRModel():
         self.temperature = self.isotherm.temperature
         # dynamic parameters
         self.prepare_values()
+        if self.ptype == "DA":
+            self.calc_map()
         # run calculation
         self.calc_auto()
 
@@ -102,11 +141,23 @@ class DADRModel():
                 "loading_unit": "mol"
             }, {"pressure_mode": "relative"}
         )
+        self.regression = None  # rebuilt at the next preview
 
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_auto_done,
+            self.pressure,
+            self.loading,
+            self.exponent,
+            self.limits,
+        )
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (self.pressure[self.min_point], self.pressure[self.max_point])
             self.slider_reset()
             self.output_log()
@@ -119,7 +170,19 @@ class DADRModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.output_preview()
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_done,
+            self.pressure,
+            self.loading,
+            self.exponent,
+            self.limits,
+        )
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -127,36 +190,74 @@ class DADRModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def calculate(self, pressure, loading, exponent, limits):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
             try:
-                (
-                    self.microp_volume,
-                    self.potential,
-                    exp,
-                    self.slope,
-                    self.intercept,
-                    self.min_point,
-                    self.max_point,
-                    self.corr_coef,
-                ) = da_plot_raw(
-                    self.pressure,
-                    self.loading,
-                    self.isotherm.temperature,
+                values = da_plot_raw(
+                    pressure,
+                    loading,
+                    self.temperature,
                     self.molar_mass,
                     self.liquid_density,
-                    self.exponent,
-                    p_limits=self.limits,
+                    exponent,
+                    p_limits=limits,
                 )
-                if self.ptype == "DA":
-                    self.exponent = exp
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = dict(
+                zip((
+                    "microp_volume",
+                    "potential",
+                    "exponent",
+                    "slope",
+                    "intercept",
+                    "min_point",
+                    "max_point",
+                    "corr_coef",
+                ), values)
+            )
+            if self.ptype != "DA":
+                del result.values["exponent"]
+            result.output += log_hook.get_logs()
+            return result
+
+    def calc_map(self):
+        """Fit all windows of points at all exponents of the map."""
+        exponents = self.map_exponents[:, None, None]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            regression = WindowRegression(
+                log_p_exp(self.pressure, self.map_exponents[:, None]),
+                log_v_adj(self.loading, self.molar_mass, self.liquid_density),
+            )
+            slope, intercept, corr_coef = regression.fit()
+            npts = regression.points()
+            rel_error = numpy.sqrt((1 / corr_coef**2 - 1) / (npts - 2))
+            # the standard error of the slope, as minimised by pyGAPS
+            std_error = numpy.abs(slope) * rel_error
+            potential = (
+                -numpy.log(10)**(exponents - 1) *
+                (constants.gas_constant * self.temperature)**exponents / slope
+            )**(1 / exponents) / 1000
+
+        fitted = numpy.isfinite(std_error)
+        best = numpy.argmin(numpy.where(fitted, std_error, numpy.inf), axis=0)[None]
+        fitted = fitted.any(axis=0)
+
+        def at_best(values):
+            return numpy.where(fitted, numpy.take_along_axis(values, best, axis=0)[0], numpy.nan)
+
+        self.da_map = {
+            "Micropore volume": at_best(10**intercept),
+            "Effective potential": at_best(potential),
+            "Exponent": at_best(numpy.broadcast_to(exponents, slope.shape)),
+            "Fit (R^2)": at_best(corr_coef**2),
+            "error": at_best(numpy.where(npts >= self.map_min_points, rel_error, numpy.nan)),
+        }
+        self.plot_map()
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -170,6 +271,32 @@ class DADRModel():
         self.view.result_slope.setText(f'{self.slope:.4}')
         self.view.result_intercept.setText(f'{self.intercept:.4}')
 
+    def output_preview(self):
+        """Display the fit of the selected window while it is calculated by pyGAPS."""
+        if self.exponent is None:
+            return
+        if self.regression is None or self.regression_exp != self.exponent:
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                self.regression = WindowRegression(
+                    log_p_exp(self.pressure, self.exponent),
+                    log_v_adj(self.loading, self.molar_mass, self.liquid_density),
+                )
+            self.regression_exp = self.exponent
+        minimum, maximum = limit_window(self.pressure, self.limits)
+        slope, intercept, corr_coef = self.regression.fit(minimum, maximum)
+        if numpy.isnan(slope):
+            return
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            potential = (
+                -numpy.log(10)**(self.exponent - 1) *
+                (constants.gas_constant * self.temperature)**(self.exponent) / slope
+            )**(1 / self.exponent) / 1000
+        self.view.result_r.setText(f'{corr_coef:.4}')
+        self.view.result_microporevol.setText(f"{10**intercept:g}")
+        self.view.result_adspotential.setText(f"{potential:g}")
+        self.view.result_slope.setText(f'{slope:.4}')
+        self.view.result_intercept.setText(f'{intercept:.4}')
+
     def output_log(self):
         """Output text or dialog error/warning/info."""
         self.view.output.setText(self.output)
@@ -193,6 +320,34 @@ class DADRModel():
         )
         self.view.rgraph.canvas.draw_idle()
 
+        # Mark the window on the map of all windows
+        if self.ptype == "DA":
+            self.plot_map_window()
+
+    def plot_map(self):
+        """Plot the selected quantity for all windows of points."""
+        self.map_colorbar, self.map_window = plot_window_map(
+            self.view.map_graph.ax,
+            self.pressure,
+            self.da_map[self.map_display],
+            self.map_display,
+            colorbar=self.map_colorbar,
+        )
+        self.plot_map_window()
+
+    def plot_map_window(self):
+        """Mark the currently selected window on the map."""
+        if self.map_window is None:
+            return
+        if self.max_point is None or self.max_point >= len(self.pressure):
+            self.map_window.set_data([], [])
+        else:
+            self.map_window.set_data(
+                [self.pressure[self.max_point]],
+                [self.pressure[self.min_point]],
+            )
+        self.view.map_graph.canvas.draw_idle()
+
     def plot_clear(self):
         """Reset plots to default values."""
         self.view.iso_graph.draw_isotherms()
@@ -221,8 +376,47 @@ class DADRModel():
         self.branch = self.view.branch_dropdown.currentText()
         self.view.iso_graph.branch = self.branch
         self.prepare_values()
+        if self.ptype == "DA":
+            self.calc_map()
         self.calc_auto()
 
+    def select_map_display(self, text):
+        """Handle selection of the quantity shown on the map of all windows."""
+        self.map_display = text
+        self.plot_map()
+
+    def select_map_window(self, event):
+        """Use the window clicked on the map, and its exponent, for the calculation."""
+        if event.inaxes != self.view.map_graph.ax or self.view.map_graph.navbar.mode:
+            return
+        midpoints = (self.pressure[1:] + self.pressure[:-1]) / 2
+        first = numpy.searchsorted(midpoints, event.ydata)
+        last = numpy.searchsorted(midpoints, event.xdata)
+        self.select_window(first, last)
+
+    def select_map_optimum(self):
+        """Use the window and exponent with the lowest relative error of the slope."""
+        error = self.da_map["error"]
+        if numpy.isnan(error).all():
+            error_dialog(f"No window of at least {self.map_min_points} points could be fitted.")
+            return
+        first, last = numpy.unravel_index(numpy.nanargmin(error), error.shape)
+        self.select_window(first, last)
+
+    def select_window(self, first, last):
+        """Calculate with the window of points [first, last] at its best exponent."""
+        exponent = self.da_map["Exponent"][first, last]
+        if last - first < 2 or numpy.isnan(exponent):
+            return
+        self.exponent = float(exponent)
+        self.view.dr_exp_input.blockSignals(True)
+        self.view.dr_exp_input.setValue(self.exponent)
+        self.view.dr_exp_input.blockSignals(False)
+        # pyGAPS excludes points at the upper limit
+        self.limits = (self.pressure[first], numpy.nextafter(self.pressure[last], numpy.inf))
+        self.slider_reset()
+        self.calc_with_limits(*self.limits)
+
     def result_dict(self):
         """Return a dictionary of results."""
         results = {
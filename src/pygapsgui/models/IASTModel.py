@@ -1,16 +1,28 @@
 import numpy as np
+from qtpy import QtCore as QC
 from qtpy import QtWidgets as QW
 
 import pygaps
 from pygaps.graphing.iast_graphs import plot_iast
 from pygaps.graphing.labels import label_units_iso
-from pygaps.iast.pgiast import iast_point_fraction
-from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.iast_batch import iast_rows
+from pygapsgui.utilities.iast_batch import split_rows
+from pygapsgui.utilities.spreading_tables import tabulated
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import picklable
+from pygapsgui.utilities.workers import process_pool_broken
+from pygapsgui.utilities.workers import worker_count
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IASTModel():
-    """IAST general multicomponent prediction: QT MVC Model."""
+    """
+    IAST general multicomponent prediction: QT MVC Model.
+
+    Tables with many rows are split into blocks of consecutive rows,
+    which are solved in parallel on the shared process pool. Progress is
+    reported as blocks finish, and results are displayed once all are done.
+    """
 
     isotherms = None
     view = None
@@ -19,8 +31,18 @@ class IASTModel():
     setting_data = None
     branch = "ads"
 
+    # Calculation jobs
+    min_parallel = 8  # rows, fewer are calculated directly
+    jobs_per_worker = 4  # smaller blocks give smoother progress
+    collect_interval = 100  # ms
+    jobs = None  # list of (start row, end row, future)
+    job_timer = None
+
     # Results
     results = None
+    errors = None
+    pressures = None
+    fractions = None
     output = ""
     success = True
 
@@ -31,7 +53,7 @@ class IASTModel():
         self.view = view
 
         if any(isinstance(i, pygaps.PointIsotherm) for i in isotherms):
-            self.output = '<font color="magenta">Careful, using PointIsotherms interpolates then numerically calculates spreading pressure. Calculations may be slow.</font>'
+            self.output = '<font color="magenta">Careful, using PointIsotherms interpolates then numerically calculates spreading pressure.</font>'
             self.view.output.setText(self.output)
 
         if not all(i.temperature == isotherms[0].temperature for i in isotherms):
@@ -45,56 +67,122 @@ class IASTModel():
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
 
+        # parallel jobs are collected periodically
+        self.jobs = []
+        self.job_timer = QC.QTimer(self.view)
+        self.job_timer.setInterval(self.collect_interval)
+        self.job_timer.timeout.connect(self.collect_jobs)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.calc_button.clicked.connect(self.calc_auto)
         self.view.button_box.accepted.connect(self.export_results)
         self.view.button_box.rejected.connect(self.view.reject)
+        self.view.finished.connect(self.calc_stop)
 
         # Calculation
 
     def calc_auto(self):
         """Automatic calculation."""
-        if self.calculate():
+        if not self.calculate():
             self.output_log()
-            self.output_results()
-            self.plot_results()
-        else:
+            self.plot_clear()
+
+    def calc_done(self):
+        """Display results once all rows are calculated."""
+        if self.errors:
+            rows = ", ".join(str(row + 1) for row, _ in self.errors)
+            self.output += f'<font color="red">Model failed for row(s) {rows}! <br> {self.errors[0][1]}</font><br>'
+        if np.all(np.isnan(self.results)):
+            self.results = None
             self.output_log()
             self.plot_clear()
+            return
+        self.output_log()
+        self.output_results()
+        self.plot_results()
 
     def calculate(self):
-        """Call pyGAPS to perform main calculation."""
+        """Call pyGAPS to perform main calculation, in parallel for large tables."""
+        self.calc_stop()
 
         pressures_t = self.view.data_table.data["Total P"].to_numpy()
         pressures_p = self.view.data_table.data.iloc[:, 1:].to_numpy()
-        fractions = np.apply_along_axis(lambda x: x / np.sum(x), 1, pressures_p)
 
-        if pressures_t is None:
+        if pressures_t is None or not len(pressures_t):
             error_dialog("First specify total pressure and partial pressures.")
-            return
+            return False
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fractions = pressures_p / np.sum(pressures_p, axis=1, keepdims=True)
+
+        self.pressures = pressures_t
+        self.fractions = fractions
+        self.results = np.full(fractions.shape, np.nan)
+        self.errors = []
+
+        try:
+            isotherms = tabulated(self.isotherms, self.branch)
+        except Exception as e:
+            self.output += f'<font color="red">Model failed! <br> {e}</font>'
+            return False
+
+        nrows = len(pressures_t)
+        if nrows < self.min_parallel or not picklable(isotherms):
+            self.job_done(0, nrows, iast_rows(isotherms, fractions, pressures_t, self.branch))
+            self.calc_done()
+            return True
 
-        with log_hook:
+        pool = get_process_pool()
+        for start, end in split_rows(nrows, worker_count() * self.jobs_per_worker):
+            future = pool.submit(iast_rows, isotherms, fractions[start:end], pressures_t[start:end], self.branch)
+            self.jobs.append((start, end, future))
+
+        self.view.progress_bar.setRange(0, nrows)
+        self.view.progress_bar.setValue(0)
+        self.view.progress_bar.setVisible(True)
+        self.job_timer.start()
+        return True
+
+    def job_done(self, start, end, result):
+        """Store the results of a block of rows."""
+        loadings, errors, logs = result
+        self.results[start:end] = loadings
+        self.errors.extend((start + row, msg) for row, msg in errors)
+        self.output += logs
+
+    def collect_jobs(self):
+        """Gather finished blocks of rows and update progress."""
+        pending = []
+        for start, end, future in self.jobs:
+            if not future.done():
+                pending.append((start, end, future))
+                continue
             try:
-                # Generate the array of partial pressures
-                results = np.zeros(pressures_p.shape)
-
-                for ind, fraction in enumerate(fractions):
-                    results[ind, :] = iast_point_fraction(
-                        self.isotherms,
-                        gas_mole_fraction=fraction,
-                        total_pressure=pressures_t[ind],
-                        branch=self.branch,
-                    )
-                self.results = results
-                self.pressures = pressures_t
-                self.fractions = fractions
-            # We catch any errors or warnings and display them to the user
-            except Exception as e:
-                self.output += f'<font color="red">Model failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                self.job_done(start, end, future.result())
+            except Exception as exc:
+                # if the pool itself is broken (e.g. a worker crashed)
+                # a new one will be created on next use
+                process_pool_broken(exc)
+                self.errors.extend((row, str(exc)) for row in range(start, end))
+        self.jobs = pending
+
+        nrows = len(self.pressures)
+        self.view.progress_bar.setValue(nrows - sum(end - start for start, end, _ in pending))
+        if not self.jobs:
+            self.job_timer.stop()
+            self.view.progress_bar.setVisible(False)
+            self.calc_done()
+
+    def calc_stop(self):
+        """Discard any running calculation."""
+        if not self.jobs:
+            return
+        for _, _, future in self.jobs:
+            future.cancel()
+        self.jobs = []
+        self.job_timer.stop()
+        self.view.progress_bar.setVisible(False)
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -125,6 +213,7 @@ class IASTModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calc_stop()
         self.branch = self.view.branch_dropdown.currentText()
         self.plot_clear()
 
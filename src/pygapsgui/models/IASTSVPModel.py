@@ -1,15 +1,30 @@
-from qtpy import QtWidgets as QW
+import numpy
 
 import pygaps
 from pygaps.graphing.iast_graphs import plot_iast_svp
 from pygaps.graphing.labels import label_units_iso
-from pygaps.iast import iast_binary_svp
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.adaptive_curve import PointStore
+from pygapsgui.utilities.adaptive_curve import nearest
+from pygapsgui.utilities.adaptive_curve import point_key
+from pygapsgui.utilities.adaptive_curve import refine
+from pygapsgui.utilities.iast_batch import solve_point
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.spreading_tables import tabulated
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IASTSVPModel():
-    """IAST selectivity versus pressure prediction: QT MVC Model."""
+    """
+    IAST selectivity versus pressure prediction: QT MVC Model.
+
+    The selectivity is first calculated at the pressures in the table.
+    In progressive mode, points are then added in passes between the
+    pressures where the curve bends, each pass being displayed when done.
+    Solved points are kept for each adsorbate, branch and fraction.
+    """
 
     isotherms = None
     view = None
@@ -19,6 +34,14 @@ class IASTSVPModel():
     mole_fractions = None
     pressure_points = None
     branch = "ads"
+    progressive = True
+
+    # Progressive calculation
+    refine_points = 50  # maximum number of points added
+    bend_tolerance = 0.005
+    point_store = None
+    curve = None  # solved points of the current settings
+    positions = None  # pressures requested so far
 
     # Results
     results = None
@@ -46,6 +69,10 @@ class IASTSVPModel():
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
 
+        # calculations run in the background, one pass at a time
+        self.point_store = PointStore()
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.data_table.set_data(props=["Pressure"], data=self.pressure_points)
@@ -57,44 +84,122 @@ class IASTSVPModel():
 
     def calc_auto(self):
         """Automatic calculation."""
-        if self.calculate():
-            self.output_log()
-            self.output_results()
-            self.plot_results()
-        else:
-            self.output_log()
-            self.plot_clear()
-
-    def calculate(self):
-        """Call pyGAPS to perform main calculation."""
         self.pressure_points = self.view.data_table.data["Pressure"].to_numpy()
-        if self.pressure_points is None:
+        if self.pressure_points is None or not len(self.pressure_points):
             error_dialog("First specify pressure points.")
             return
         slider = float(self.view.fraction_slider.getValue())
         self.mole_fractions = [slider, 1 - slider]
         self.main_adsorbate = self.view.adsorbate_input.currentText()
+        self.progressive = self.view.progressive_box.isChecked()
         self.isotherms = sorted(
             self.isotherms,
             key=lambda x: x.adsorbate == self.main_adsorbate,
             reverse=True,
         )
+        self.curve = self.point_store.curve((self.main_adsorbate, self.branch, slider))
+        self.positions = list(self.pressure_points)
+        self.output = ""
+        self.calc_submit()
+
+    def calc_submit(self):
+        """Solve the requested positions, given the settings and the points known so far."""
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_done,
+            dict(self.curve),
+            list(self.positions),
+            self.isotherms,
+            self.mole_fractions,
+            self.branch,
+        )
 
+    def calc_done(self, result):
+        """Store the new points and display the curve so far, then start the next refinement pass."""
+        if result.success:
+            self.curve.update(result.values.pop("points"))
+        if not result.apply(self):
+            self.output_log()
+            self.plot_clear()
+            return
+        self.output_log()
+        self.output_results()
+        self.plot_results()
+
+        remaining = len(self.pressure_points) + self.refine_points - len(self.positions)
+        if self.progressive and remaining > 0:
+            new = refine(self.results["pressure"], self.results["selectivity"], self.bend_tolerance)[:remaining]
+            if new:
+                self.positions += new
+                self.calc_submit()
+
+    def calculate(self, curve, positions, isotherms, mole_fractions, branch):
+        """Call pyGAPS to solve the requested points which are not in ``curve``."""
+        result = CalcResult()
+        mole_fractions = numpy.asarray(mole_fractions)
+        try:
+            isotherms = tabulated(isotherms, branch)
+        except Exception as e:
+            result.output += f'<font color="red">Model failed! <br> {e}</font>'
+            return result
+
+        points = {}  # newly solved
+        failed = []
         with log_hook:
-            try:
-                self.results = iast_binary_svp(
-                    self.isotherms,
-                    mole_fractions=self.mole_fractions,
-                    pressures=self.pressure_points,
-                    branch=self.branch,
-                    warningoff=False,
-                )
-            # We catch any errors or warnings and display them to the user
-            except Exception as e:
-                self.output += f'<font color="red">Model failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+            for pressure in positions:
+                key = point_key(pressure)
+                if key in curve:
+                    continue
+                if self.calc_worker.cancelled():
+                    return result
+                try:
+                    points[key] = curve[key] = solve_point(
+                        isotherms,
+                        mole_fractions,
+                        pressure,
+                        branch=branch,
+                        guess=self.guess(curve, pressure),
+                        warningoff=False,
+                    )
+                # Wrong settings will fail for every point
+                except ParameterError as e:
+                    result.output += f'<font color="red">Model failed! <br> {e}</font>'
+                    return result
+                except Exception as e:
+                    points[key] = curve[key] = numpy.full(2, numpy.nan)
+                    failed.append((pressure, e))
+            result.output += log_hook.get_logs()
+
+        if failed:
+            pressures = ", ".join(f"{pressure:.3g}" for pressure, _ in failed)
+            result.output += f'<font color="red">Model failed at pressure(s) {pressures}! <br> {failed[0][1]}</font><br>'
+        solved = self.solved(curve, positions)
+        if not len(solved):
+            return result
+
+        result.values = {
+            "results": dict(
+                pressure=solved[:, 0],
+                selectivity=(solved[:, 1] / mole_fractions[0]) / (solved[:, 2] / mole_fractions[1]),
+            ),
+            "points": points,
+        }
+        return result
+
+    @staticmethod
+    def guess(curve, pressure):
+        """Adsorbed fractions of the closest solved point, to start from."""
+        loading = nearest(curve, pressure)
+        if loading is None:
+            return None
+        return loading / numpy.sum(loading)
+
+    @staticmethod
+    def solved(curve, positions):
+        """Rows of (pressure, loadings) of the requested points which succeeded."""
+        rows = sorted((key, *curve[key]) for key in set(map(point_key, positions)) if key in curve)
+        rows = numpy.array(rows).reshape(-1, 3)
+        return rows[numpy.all(numpy.isfinite(rows), axis=1)]
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -126,6 +231,7 @@ class IASTSVPModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calc_worker.cancel()
         self.branch = self.view.branch_dropdown.currentText()
         self.plot_clear()
 
@@ -1,13 +1,30 @@
+import numpy
+
 import pygaps
 from pygaps.graphing.iast_graphs import plot_iast_vle
-from pygaps.iast import iast_binary_vle
-from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.adaptive_curve import PointStore
+from pygapsgui.utilities.adaptive_curve import nearest
+from pygapsgui.utilities.adaptive_curve import point_key
+from pygapsgui.utilities.adaptive_curve import refine
+from pygapsgui.utilities.iast_batch import solve_point
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.spreading_tables import tabulated
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IASTVLEModel():
-    """IAST vapour-liquid equilibrium prediction: QT MVC Model."""
+    """
+    IAST vapour-liquid equilibrium prediction: QT MVC Model.
+
+    In progressive mode, the curve is first solved on a coarse grid, then
+    refined in passes which only add points where it bends, until the
+    requested number of points is reached. Each pass is displayed as soon
+    as it is done. Solved points are kept for each set of settings, so
+    going back to previous settings or adding points is cheap.
+    """
 
     isotherms = None
     view = None
@@ -17,6 +34,14 @@ class IASTVLEModel():
     total_pressure = None
     number_points = None
     branch = "ads"
+    progressive = True
+
+    # Progressive calculation
+    coarse_points = 9
+    bend_tolerance = 0.005
+    point_store = None
+    curve = None  # solved points of the current settings
+    positions = None  # gas fractions requested so far
 
     # Results
     results = None
@@ -48,54 +73,145 @@ class IASTVLEModel():
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
 
+        # calculations run in the background, one pass at a time
+        self.point_store = PointStore()
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.calc_button.clicked.connect(self.calc_auto)
         self.view.pressure_input.valueChanged.connect(self.calc_autobox)
         self.view.point_input.valueChanged.connect(self.calc_autobox)
+        self.view.progressive_box.toggled.connect(self.calc_autobox)
         self.view.button_box.accepted.connect(self.export_results)
         self.view.button_box.rejected.connect(self.view.reject)
 
     def calc_auto(self):
         """Automatic calculation."""
-        if self.calculate():
-            self.output_log()
-            self.output_results()
-            self.plot_results()
-        else:
-            self.output_log()
-            self.plot_clear()
-
-    def calc_autobox(self):
-        if self.view.calc_autobox.isChecked():
-            self.calc_auto()
-
-    def calculate(self):
-        """Call pyGAPS to perform main calculation."""
         self.total_pressure = self.view.pressure_input.value()
         self.number_points = self.view.point_input.value()
         self.main_adsorbate = self.view.adsorbate_input.currentText()
+        self.progressive = self.view.progressive_box.isChecked()
         self.isotherms = sorted(
             self.isotherms,
             key=lambda x: x.adsorbate == self.main_adsorbate,
             reverse=True,
         )
+        self.curve = self.point_store.curve((self.main_adsorbate, self.branch, self.total_pressure))
+        self.output = ""
 
+        if self.progressive:
+            # start from the coarse grid and any points already refined
+            grid = numpy.linspace(0.01, 0.99, min(self.coarse_points, self.number_points))
+            known = [x for x, value in self.curve.copy().items() if numpy.all(numpy.isfinite(value))]
+            extra = [x for x in known if point_key(x) not in set(map(point_key, grid))]
+            self.positions = list(grid) + extra[:max(0, self.number_points - len(grid))]
+        else:
+            self.positions = list(numpy.linspace(0.01, 0.99, self.number_points))
+        self.calc_submit()
+
+    def calc_submit(self):
+        """Solve the requested positions, given the settings and the points known so far."""
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_done,
+            dict(self.curve),
+            list(self.positions),
+            self.isotherms,
+            self.total_pressure,
+            self.branch,
+        )
+
+    def calc_autobox(self):
+        if self.view.calc_autobox.isChecked():
+            self.calc_auto()
+
+    def calc_done(self, result):
+        """Store the new points and display the curve so far, then start the next refinement pass."""
+        if result.success:
+            self.curve.update(result.values.pop("points"))
+        if not result.apply(self):
+            self.output_log()
+            self.plot_clear()
+            return
+        self.output_log()
+        self.output_results()
+        self.plot_results()
+
+        remaining = self.number_points - len(self.positions)
+        if self.progressive and remaining > 0:
+            new = refine(self.results["y"][1:-1], self.results["x"][1:-1], self.bend_tolerance)[:remaining]
+            if new:
+                self.positions += new
+                self.calc_submit()
+
+    def calculate(self, curve, positions, isotherms, total_pressure, branch):
+        """Call pyGAPS to solve the requested points which are not in ``curve``."""
+        result = CalcResult()
+        try:
+            isotherms = tabulated(isotherms, branch)
+        except Exception as e:
+            result.output += f'<font color="red">Model failed! <br> {e}</font>'
+            return result
+
+        points = {}  # newly solved
+        failed = []
         with log_hook:
-            try:
-                self.results = iast_binary_vle(
-                    self.isotherms,
-                    total_pressure=self.total_pressure,
-                    npoints=self.number_points,
-                    branch=self.branch,
-                    warningoff=False,
-                )
-            # We catch any errors or warnings and display them to the user
-            except Exception as e:
-                self.output += f'<font color="red">Model failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+            for fraction in positions:
+                key = point_key(fraction)
+                if key in curve:
+                    continue
+                if self.calc_worker.cancelled():
+                    return result
+                try:
+                    points[key] = curve[key] = solve_point(
+                        isotherms,
+                        [fraction, 1 - fraction],
+                        total_pressure,
+                        branch=branch,
+                        guess=self.guess(curve, fraction),
+                        warningoff=False,
+                    )
+                # Wrong settings will fail for every point
+                except ParameterError as e:
+                    result.output += f'<font color="red">Model failed! <br> {e}</font>'
+                    return result
+                except Exception as e:
+                    points[key] = curve[key] = numpy.full(2, numpy.nan)
+                    failed.append((fraction, e))
+            result.output += log_hook.get_logs()
+
+        if failed:
+            fractions = ", ".join(f"{fraction:.3g}" for fraction, _ in failed)
+            result.output += f'<font color="red">Model failed at gas fraction(s) {fractions}! <br> {failed[0][1]}</font><br>'
+        solved = self.solved(curve, positions)
+        if not len(solved):
+            return result
+
+        x_data = solved[:, 1] / (solved[:, 1] + solved[:, 2])
+        result.values = {
+            "results": dict(
+                x=numpy.concatenate([[0], x_data, [1]]),
+                y=numpy.concatenate([[0], solved[:, 0], [1]]),
+            ),
+            "points": points,
+        }
+        return result
+
+    @staticmethod
+    def guess(curve, fraction):
+        """Adsorbed fractions of the closest solved point, to start from."""
+        loading = nearest(curve, fraction)
+        if loading is None:
+            return None
+        return loading / numpy.sum(loading)
+
+    @staticmethod
+    def solved(curve, positions):
+        """Rows of (gas fraction, loadings) of the requested points which succeeded."""
+        rows = sorted((key, *curve[key]) for key in set(map(point_key, positions)) if key in curve)
+        rows = numpy.array(rows).reshape(-1, 3)
+        return rows[numpy.all(numpy.isfinite(rows), axis=1)]
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -127,6 +243,7 @@ class IASTVLEModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calc_worker.cancel()
         self.branch = self.view.branch_dropdown.currentText()
         self.plot_clear()
 
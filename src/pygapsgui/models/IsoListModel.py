@@ -18,65 +18,107 @@ class IsoListModel(QG.QStandardItemModel):
 
     """
 
-    checked_changed = QC.Signal()
+    checked_delta = QC.Signal(list, list)  # isotherms (checked, unchecked)
     index_selected = None
+    _checked = None  # id(item) -> item, for all checked items
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._checked = {}
         # this emits when any checked are changed
         self.itemChanged.connect(self.handle_check_change)
 
+    def _set_check_state(self, item, state):
+        """
+        Change the check state of an item without emitting ``itemChanged``.
+
+        Returns True if the item was added to or removed from the checked set.
+        """
+        self.blockSignals(True)
+        item.setCheckState(state)
+        self.blockSignals(False)
+        return self._track(item)
+
+    def _track(self, item):
+        """Keep the checked set in sync with the item state."""
+        checked = item.checkState() == QC.Qt.Checked
+        if checked == (id(item) in self._checked):
+            return False
+        if checked:
+            self._checked[id(item)] = item
+        else:
+            del self._checked[id(item)]
+        return True
+
+    def _emit_checks(self, checked, unchecked):
+        """Notify views of check changes, only if something changed."""
+        if not checked and not unchecked:
+            return
+        self.checked_delta.emit(checked, unchecked)
+
+    def _repaint(self, first, last):
+        """
+        Signal views that the check boxes of some rows must be redrawn.
+
+        The model turns ``dataChanged`` into an ``itemChanged`` for each row,
+        so the check handler is disconnected meanwhile: the checked set is
+        already up to date.
+        """
+        self.itemChanged.disconnect(self.handle_check_change)
+        self.dataChanged.emit(self.index(first, 0), self.index(last, 0), [QC.Qt.CheckStateRole])
+        self.itemChanged.connect(self.handle_check_change)
+
     def handle_check_change(self, item):
         """If an item got checked, we need to check why."""
         # Can never uncheck a selected item so we re-mark it as checked
         if item.index() == self.index_selected:
-            self.blockSignals(True)
-            item.setCheckState(QC.Qt.Checked)
-            self.blockSignals(False)
+            if item.checkState() != QC.Qt.Checked:
+                self._set_check_state(item, QC.Qt.Checked)
+                self._repaint(item.row(), item.row())
             return
-        # Otherwise emit change
-        self.checked_changed.emit()
+        # Otherwise emit change (not on other edits, like a rename)
+        if self._track(item):
+            if item.checkState() == QC.Qt.Checked:
+                self._emit_checks([item.data()], [])
+            else:
+                self._emit_checks([], [item.data()])
 
     def handle_item_select(self, new_index, old_index):
         """When isotherm is selected, ensure it is marked checked."""
+        checked = []
+        unchecked = []
+        changed = []
 
         # Restore previous item check state to user state
         old_item = self.itemFromIndex(old_index)
         if old_item:
-            self.blockSignals(True)
-            old_item.setCheckState(old_item.userCheckState)
-            self.blockSignals(False)
+            if self._set_check_state(old_item, old_item.userCheckState):
+                unchecked.append(old_item.data())
+            changed.append(old_item.row())
 
         # Save user check state and mark selected item as checked
         new_item = self.itemFromIndex(new_index)
         if new_item:
             # Before any changes, store old state
             new_item.userCheckState = new_item.checkState()
-
-            self.blockSignals(True)
-            new_item.setCheckState(QC.Qt.Checked)
-            self.blockSignals(False)
+            if self._set_check_state(new_item, QC.Qt.Checked):
+                checked.append(new_item.data())
+            changed.append(new_item.row())
 
             # store index
             self.index_selected = new_index
 
-            # improve performance by emitting check change only if something changed
-            # TODO what about when it is deleted?
-            if (
-                old_item and old_item.checkState() == QC.Qt.Checked
-                and new_item.userCheckState == QC.Qt.Checked
-            ):
-                return
-            self.checked_changed.emit()
+        # repaint once the selection is stored
+        for row in changed:
+            self._repaint(row, row)
+
+        # only emit if the set of checked isotherms changed
+        self._emit_checks(checked, unchecked)
 
     def get_checked(self):
-        """Return list of checked isotherms."""
-        # There is no standard method for this
-        return [
-            self.item(row).data()
-            for row in range(self.rowCount())
-            if self.item(row).checkState() == QC.Qt.Checked
-        ]
+        """Return list of checked isotherms, in list order."""
+        items = sorted(self._checked.values(), key=lambda item: item.row())
+        return [item.data() for item in items]
 
     def check_all(self):
         """Tick all items and mark them for display."""
@@ -84,14 +126,14 @@ class IsoListModel(QG.QStandardItemModel):
         if not nrows:
             return
 
-        self.blockSignals(True)
+        checked = []
         for row in range(nrows):
             item = self.item(row)
-            item.setCheckState(QC.Qt.Checked)
-        self.blockSignals(False)
+            if self._set_check_state(item, QC.Qt.Checked):
+                checked.append(item.data())
 
-        self.layoutChanged.emit()  # let models know something changed
-        self.checked_changed.emit()  # and that checked state changed
+        self._repaint(0, nrows - 1)  # let views know something changed
+        self._emit_checks(checked, [])  # and that checked state changed
 
     def uncheck_all(self):
         """Un-tick all items and update selection."""
@@ -99,24 +141,24 @@ class IsoListModel(QG.QStandardItemModel):
         if not nrows:
             return
 
-        self.blockSignals(True)
-        for row in range(nrows):
-            item = self.item(row)
+        unchecked = []
+        for item in list(self._checked.values()):
             # only untick non-selected isotherms
             if item.index() != self.index_selected:
-                item.setCheckState(QC.Qt.Unchecked)
-        self.blockSignals(False)
+                if self._set_check_state(item, QC.Qt.Unchecked):
+                    unchecked.append(item.data())
 
-        self.layoutChanged.emit()  # let models know something changed
-        self.checked_changed.emit()  # and that checked state changed
+        self._repaint(0, nrows - 1)  # let views know something changed
+        self._emit_checks([], unchecked)  # and that checked state changed
 
     def removeRow(self, row, parent=QC.QModelIndex()):
         """Remove isotherm from model."""
-        # LayoutChanged called automatically BEFORE actual removal
-        # Therefore must ensure old isotherm is not ticked
-        self.blockSignals(True)
-        self.item(row).setCheckState(QC.Qt.Unchecked)
-        self.blockSignals(False)
+        # Ensure old isotherm is not ticked, then remove it from the display
+        item = self.item(row)
+        unchecked = []
+        if item and self._set_check_state(item, QC.Qt.Unchecked):
+            unchecked.append(item.data())
 
         # Call method for removal
         super().removeRow(row, parent)
+        self._emit_checks([], unchecked)
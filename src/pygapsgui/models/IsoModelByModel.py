@@ -1,10 +1,21 @@
+import copy
+
 from pygaps import ModelIsotherm
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IsoModelByModel():
-    """Fit an isotherm by a specific isotherm model: QT MVC Model."""
+    """
+    Fit an isotherm by a specific isotherm model: QT MVC Model.
+
+    Fitted models are memoised by (model, branch, limits, bounds), so that
+    returning to a previous selection is instant. When moving the limits
+    to a new position, the fit is seeded with the parameters found for the
+    closest limits, which converges much faster than the default guess.
+    """
 
     isotherm = None
     isotherm_params: dict = None
@@ -16,17 +27,25 @@ class IsoModelByModel():
     limits: "tuple[float, float]" = None
     auto: bool = True
     bounds: bool = False
+    model_name: str = None
+    model = None
+    param_bounds: dict = None
 
     # Results
     output = ""
     success = True
 
+    # Previous fits
+    fit_cache: dict = None  # key -> fitted model
+    fit_cache_size: int = 200
+
     def __init__(self, isotherm, view):
         """First init"""
         # Save refs
         self.isotherm = isotherm
         self.isotherm_params = isotherm.to_dict()
         self.view = view
+        self.fit_cache = {}
 
         # Fail condition
         if isinstance(isotherm, ModelIsotherm):
@@ -48,6 +67,9 @@ class IsoModelByModel():
         self.limits = self.view.iso_graph.x_range
         self.view.iso_graph.draw_isotherms()
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.model_edit.changed.connect(self.calculate_manual)
         self.view.x_select.slider.rangeChanged.connect(self.calculate_with_limits)
@@ -57,13 +79,12 @@ class IsoModelByModel():
     def calculate_auto(self):
         """Automatic calculation."""
         self.auto = True
-        if self.calculate():
-            self.output_log()
-            self.output_results()
-            self.plot_results()
+        self.model_name = self.view.model_edit.current_model.name
+        if self.bounds:
+            self.param_bounds = self.view.model_edit.get_model_bounds()
         else:
-            self.output_log()
-            self.plot_clear()
+            self.param_bounds = None
+        self.calc_worker.submit(self.calculate, self.calculate_done, self.read_settings())
 
     def calculate_with_limits(self, left, right):
         """Set limits on calculation."""
@@ -79,7 +100,15 @@ class IsoModelByModel():
     def calculate_manual(self):
         """Use model parameters."""
         self.auto = False
-        if self.calculate():
+        self.model = self.view.model_edit.current_model
+        self.calc_worker.submit(self.calculate, self.calculate_done, self.read_settings())
+
+    def calculate_done(self, result):
+        """Display results of the calculation."""
+        self.model_isotherm = None
+        if result.apply(self):
+            if self.auto:
+                self.view.model_edit.set_fitting_model(self.model_isotherm.model)
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -87,50 +116,104 @@ class IsoModelByModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def read_settings(self):
+        """Settings used by ``calculate``, read on the GUI thread."""
+        return {
+            "auto": self.auto,
+            "model": self.model,
+            "model_name": self.model_name,
+            "param_bounds": self.param_bounds,
+            "branch": self.branch,
+            "limits": tuple(self.limits),
+            "span": abs(self.view.iso_graph.x_range[1] - self.view.iso_graph.x_range[0]) or 1,
+        }
+
+    def calculate(self, settings):
         """Call pyGAPS to perform main calculation."""
-        self.model_isotherm = None
+        result = CalcResult()
         with log_hook:
             try:
-                if self.auto:
-                    pressure = self.isotherm.pressure(
-                        branch=self.branch,
-                        limits=self.limits,
-                        indexed=True,
-                    )
-                    loading = self.isotherm.loading(
-                        branch=self.branch,
-                        indexed=True,
-                    )
-                    loading = loading[pressure.index]
-
-                    if self.bounds:
-                        param_bounds = self.view.model_edit.get_model_bounds()
-                    else:
-                        param_bounds = None
-
-                    self.model_isotherm = ModelIsotherm(
-                        pressure=pressure.values,
-                        loading=loading.values,
-                        branch=self.branch,
-                        model=self.view.model_edit.current_model.name,
-                        param_bounds=param_bounds,
-                        **self.isotherm_params
-                    )
-                    self.view.model_edit.set_fitting_model(self.model_isotherm.model)
+                if settings["auto"]:
+                    model_isotherm = self.fit_model(settings)
                 else:
-                    self.model_isotherm = ModelIsotherm(
-                        model=self.view.model_edit.current_model,
-                        branch=self.branch,
+                    model_isotherm = ModelIsotherm(
+                        model=settings["model"],
+                        branch=settings["branch"],
                         **self.isotherm_params,
                     )
             # We catch any errors or warnings and display them to the user
             except Exception as err:
-                self.output += f'<font color="red">Model fitting failed! <br> {err}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            self.output += self.view.model_edit.current_model.__str__().replace("\n", "<br>")
-            return True
+                result.output += f'<font color="red">Model fitting failed! <br> {err}</font>'
+                return result
+            result.values = {"model_isotherm": model_isotherm}
+            result.output += log_hook.get_logs()
+            result.output += model_isotherm.model.__str__().replace("\n", "<br>")
+            return result
+
+    def fit_key(self, settings):
+        """Everything which determines the result of a fit."""
+        bounds = None
+        if settings["param_bounds"]:
+            bounds = tuple(sorted((param, tuple(bound)) for param, bound in settings["param_bounds"].items()))
+        return (settings["model_name"], settings["branch"], settings["limits"], bounds)
+
+    def closest_fit(self, key, span):
+        """Cached model with the same settings and the nearest limits, if any."""
+        closest, distance = None, None
+        for (name, branch, limits, bounds), model in self.fit_cache.items():
+            if (name, branch, bounds) != (key[0], key[1], key[3]):
+                continue
+            dist = (abs(limits[0] - key[2][0]) + abs(limits[1] - key[2][1])) / span
+            if distance is None or dist < distance:
+                closest, distance = model, dist
+        return closest
+
+    def fit_model(self, settings):
+        """Fit the model in ``settings``, reusing or warm-starting from previous fits."""
+        key = self.fit_key(settings)
+        branch = settings["branch"]
+
+        # exact hit: copy, as the parameters are edited in place by the GUI
+        cached = self.fit_cache.get(key)
+        if cached:
+            return ModelIsotherm(model=copy.deepcopy(cached), branch=branch, **self.isotherm_params)
+
+        pressure = self.isotherm.pressure(
+            branch=branch,
+            limits=settings["limits"],
+            indexed=True,
+        )
+        loading = self.isotherm.loading(
+            branch=branch,
+            indexed=True,
+        )
+        loading = loading[pressure.index]
+
+        def fit(param_guess=None):
+            return ModelIsotherm(
+                pressure=pressure.values,
+                loading=loading.values,
+                branch=branch,
+                model=settings["model_name"],
+                param_guess=param_guess,
+                param_bounds=settings["param_bounds"],
+                **self.isotherm_params
+            )
+
+        closest = self.closest_fit(key, settings["span"])
+        model_isotherm = None
+        if closest:
+            try:
+                model_isotherm = fit(dict(closest.params))
+            except Exception:
+                pass  # the default guess may still work
+        if model_isotherm is None:
+            model_isotherm = fit()
+
+        if len(self.fit_cache) >= self.fit_cache_size:
+            del self.fit_cache[next(iter(self.fit_cache))]
+        self.fit_cache[key] = copy.deepcopy(model_isotherm.model)
+        return model_isotherm
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -4,19 +4,39 @@ from qtpy import QtWidgets as QW
 from pygaps import ModelIsotherm
 from pygaps.modelling import _GUESS_MODELS
 from pygaps.modelling import _MODELS
-from pygaps.utilities.exceptions import CalculationError
-from pygapsgui.utilities.log_hook import log_hook
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.model_fitting import fit_job
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import process_pool_broken
+from pygapsgui.utilities.workers import worker_count
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IsoModelGuessModel():
-    """Automatic isotherm fit by several models: QT MVC Model."""
+    """
+    Automatic isotherm fit by several models: QT MVC Model.
+
+    Each model is fitted in a separate job on the shared process pool.
+    Results are collected by a timer and added to a ranking table as
+    they arrive, with the best fit so far displayed on the graph. Fits
+    taking longer than ``fit_timeout`` are interrupted by their worker
+    (where the platform allows it), and the user can stop at any time
+    and keep the current best fit.
+    """
 
     isotherm = None
     model_isotherm = None
     model_attempts = None
+    model_failures = None
     view = None
 
+    # Fitting jobs
+    fit_timeout = 60  # seconds allowed for each model, once started
+    fit_interval = 100  # ms between collecting results
+    fit_timer = None
+    fit_pending = None  # models not yet submitted
+    fit_running = None  # model -> future
+
     # Calculated
     iso_params = None
     loading = None
@@ -63,10 +83,20 @@ class IsoModelGuessModel():
         self.view.iso_graph.set_isotherms([self.isotherm])
         self.limits = self.view.iso_graph.x_range
 
+        # fits are collected periodically
+        self.fit_pending = []
+        self.fit_running = {}
+        self.fit_timer = QC.QTimer(self.view)
+        self.fit_timer.setInterval(self.fit_interval)
+        self.fit_timer.timeout.connect(self.collect_fits)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.x_select.slider.rangeChanged.connect(self.calculate_with_limits)
         self.view.calc_auto_button.clicked.connect(self.calculate_auto)
+        self.view.calc_stop_button.clicked.connect(self.calculate_stop)
+        self.view.ranking_table.itemSelectionChanged.connect(self.select_fit)
+        self.view.finished.connect(self.cancel_fits)
 
         # populate initial
         self.prepare_values()
@@ -91,13 +121,7 @@ class IsoModelGuessModel():
     def calculate_auto(self):
         """Automatic calculation."""
         self.auto = True
-        if self.calculate():
-            self.output_log()
-            self.output_results()
-            self.plot_results()
-        else:
-            self.output_log()
-            self.plot_clear()
+        self.calculate()
 
     def calculate_with_limits(self, left, right):
         """Set limits on calculation."""
@@ -105,46 +129,127 @@ class IsoModelGuessModel():
         self.prepare_values()
 
     def calculate(self):
-        """Call pyGAPS to perform main calculation."""
+        """Submit a fit of each checked model to the process pool."""
+        self.cancel_fits()
         self.model_attempts = []
-        checked_models = [
+        self.model_failures = []
+        self.model_isotherm = None
+        self.fit_pending = [
             self.view.model_list.item(row).data(QC.Qt.DisplayRole)
             for row in range(self.view.model_list.count())
             if self.view.model_list.item(row).checkState() == QC.Qt.Checked
         ]
-        with log_hook:
-            try:
-                for model in checked_models:
-                    try:
-                        isotherm = ModelIsotherm(
-                            pressure=self.pressure,
-                            loading=self.loading,
-                            branch=self.branch,
-                            model=model,
-                            verbose=True,
-                            plot_fit=False,
-                            **self.iso_params,
-                        )
-                        self.model_attempts.append(isotherm)
-                    except CalculationError as err:
-                        log_hook.logger.info(
-                            f'<font color="red">Modelling using {model} failed.</font>'
-                        )
-                # We catch any errors or warnings and display them to the user
-            except Exception as err:
-                self.output += f'<font color="red">Model fitting failed! <br> {err}</font>'
-                return False
-            self.output += log_hook.get_logs()
-
-            if not self.model_attempts:
-                self.output += '<font color="red">No model could be reliably fit on the isotherm.</font><br>'
-                return False
-
-            errors = [x.model.rmse for x in self.model_attempts]
-            self.model_isotherm = self.model_attempts[errors.index(min(errors))]
-            self.output += f'<font color="green">Best model fit is {self.model_isotherm.model.name}.</font><br>'
-            self.output += self.model_isotherm.model.__str__().replace("\n", "<br>")
-            return True
+        if not self.fit_pending:
+            self.output += '<font color="red">No models selected.</font><br>'
+            self.output_log()
+            return
+
+        self.output_results()
+        self.plot_clear()
+        self.submit_fits()
+        self.view.calc_auto_button.setEnabled(False)
+        self.view.calc_stop_button.setEnabled(True)
+        self.fit_timer.start()
+
+    def submit_fits(self):
+        """Keep every worker busy with a fit, so that jobs start when submitted."""
+        pool = get_process_pool()
+        while self.fit_pending and len(self.fit_running) < worker_count():
+            model = self.fit_pending.pop(0)
+            future = pool.submit(
+                fit_job,
+                model,
+                self.pressure,
+                self.loading,
+                self.branch,
+                self.iso_params,
+                self.fit_timeout,
+            )
+            self.fit_running[model] = future
+
+    def collect_fits(self):
+        """Gather finished fits."""
+        changed = False
+        for model, future in list(self.fit_running.items()):
+            if future.done():
+                del self.fit_running[model]
+                self.fit_done(model, future)
+                changed = True
+
+        if changed:
+            self.output_results()
+        self.submit_fits()
+        if not self.fit_running and not self.fit_pending:
+            self.calculate_done()
+
+    def fit_done(self, model, future):
+        """Record the result of a single fit."""
+        try:
+            _, isotherm, logs, error = future.result()
+        except Exception as exc:
+            # if the pool itself is broken (e.g. a worker crashed)
+            # a new one will be created on next use
+            process_pool_broken(exc)
+            isotherm, logs, error = None, "", f"Modelling using {model} failed: {exc}"
+
+        self.output += logs
+        if isotherm is None:
+            self.model_failures.append((model, "failed"))
+            self.output += f'<font color="red">{error}</font><br>'
+            return
+
+        isotherm = isotherm_from_json(isotherm)
+
+        self.model_attempts.append(isotherm)
+        self.model_attempts.sort(key=lambda x: x.model.rmse)
+        if self.model_isotherm is None or isotherm.model.rmse < self.model_isotherm.model.rmse:
+            self.model_isotherm = isotherm
+            self.plot_results()
+
+    def cancel_fits(self):
+        """Cancel queued fits and ignore running ones. Returns the number of skipped models."""
+        self.fit_timer.stop()
+        for future in self.fit_running.values():
+            future.cancel()
+        skipped = len(self.fit_running) + len(self.fit_pending)
+        self.fit_running = {}
+        self.fit_pending = []
+        return skipped
+
+    def calculate_stop(self):
+        """Stop fitting, keeping the models fitted so far."""
+        if not self.fit_running and not self.fit_pending:
+            return
+        skipped = self.cancel_fits()
+        self.output += f'<font color="red">Fitting stopped, {skipped} model(s) skipped.</font><br>'
+        self.calculate_done()
+
+    def calculate_done(self):
+        """Display the best model once all fits are finished or stopped."""
+        self.fit_timer.stop()
+        self.view.calc_auto_button.setEnabled(True)
+        self.view.calc_stop_button.setEnabled(False)
+
+        if not self.model_attempts:
+            self.output += '<font color="red">No model could be reliably fit on the isotherm.</font><br>'
+            self.output_log()
+            self.plot_clear()
+            return
+
+        self.model_isotherm = self.model_attempts[0]
+        self.output += f'<font color="green">Best model fit is {self.model_isotherm.model.name}.</font><br>'
+        self.output += self.model_isotherm.model.__str__().replace("\n", "<br>")
+        self.output_log()
+        self.output_results()
+        self.plot_results()
+
+    def select_fit(self):
+        """Display the model selected in the ranking table."""
+        rows = self.view.ranking_table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.model_attempts):
+            return
+        self.model_isotherm = self.model_attempts[rows[0].row()]
+        self.plot_results()
 
     def plot_results(self):
         """Fill in any GUI plots with results."""
@@ -153,11 +258,24 @@ class IsoModelGuessModel():
 
     def plot_clear(self):
         """Reset plots to default values."""
+        self.view.iso_graph.model_isotherm = None
         self.view.iso_graph.draw_isotherms()
 
     def output_results(self):
-        """Fill in any GUI text output with results"""
-        pass
+        """Fill the ranking table: fitted models by RMSE, then failures."""
+        table = self.view.ranking_table
+        rows = [(iso.model.name, f"{iso.model.rmse:.4g}", "fitted") for iso in self.model_attempts or []]
+        rows += [(model, "", status) for model, status in self.model_failures or []]
+        rows += [(model, "", "fitting") for model in self.fit_running or {}]
+
+        table.blockSignals(True)
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                table.setItem(row, col, QW.QTableWidgetItem(value))
+        if self.model_isotherm in (self.model_attempts or []):
+            table.selectRow(self.model_attempts.index(self.model_isotherm))
+        table.blockSignals(False)
 
     def output_log(self):
         """Output text or dialog error/warning/info."""
@@ -171,6 +289,7 @@ class IsoModelGuessModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calculate_stop()
         self.branch = self.view.branch_dropdown.currentText()
         self.view.iso_graph.branch = self.branch
         self.model_isotherm = None
@@ -1,13 +1,33 @@
 import numpy
+from qtpy import QtCore as QC
 
 from pygaps.characterisation.isosteric_enth import isosteric_enthalpy
 from pygaps.graphing.calc_graphs import isosteric_enthalpy_plot
+from pygapsgui.utilities.iast_batch import split_rows
+from pygapsgui.utilities.isosteric_bootstrap import bootstrap_enthalpy
+from pygapsgui.utilities.isosteric_bootstrap import bootstrap_points
+from pygapsgui.utilities.isosteric_cache import isosteric_enthalpy_at
+from pygapsgui.utilities.isosteric_cache import loading_range
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import process_pool_broken
+from pygapsgui.utilities.workers import worker_count
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class IsostericModel():
-    """Isosteric enthalpy calculations: QT MVC Model."""
+    """
+    Isosteric enthalpy calculations: QT MVC Model.
+
+    The inverse of each isotherm is prepared once per branch and reused
+    (see ``isosteric_cache``), so that moving the limits or changing the
+    number of points only evaluates the requested loading points.
+
+    Confidence bands are found by bootstrap (see ``isosteric_bootstrap``),
+    with blocks of resamples run in parallel on the shared process pool.
+    """
 
     # Refs
     isotherms = None
@@ -18,9 +38,19 @@ class IsostericModel():
     limits = None
     loading_points = None
     loading_point_no = 50
+    bootstrap_replicates = 2000
+    bootstrap_percentiles = (2.5, 97.5)
+
+    # Bootstrap jobs
+    jobs_per_worker = 4  # smaller blocks give smoother progress
+    collect_interval = 100  # ms
+    jobs = None  # list of (replicates, future)
+    job_timer = None
 
     # Results
     results = None
+    curves = None  # list of resampled enthalpy curves
+    bands = None
     output = ""
     success = True
 
@@ -39,16 +69,28 @@ class IsostericModel():
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
         self.view.points_input.setValue(self.loading_point_no)
+        self.view.bootstrap_input.setValue(self.bootstrap_replicates)
 
         # plot setup
         self.view.iso_graph.branch = self.branch
         self.view.iso_graph.lgd_keys = ["temperature"]
         self.view.iso_graph.set_isotherms(self.isotherms)
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
+        # bootstrap jobs are collected periodically
+        self.jobs = []
+        self.job_timer = QC.QTimer(self.view)
+        self.job_timer.setInterval(self.collect_interval)
+        self.job_timer.timeout.connect(self.collect_jobs)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.points_input.lineEdit().editingFinished.connect(self.select_points)
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
+        self.view.bootstrap_button.clicked.connect(self.calc_bootstrap)
+        self.view.finished.connect(self.calc_bootstrap_stop)
         self.view.y_select.slider.rangeChanged.connect(self.calc_with_limits)
         self.view.button_box.accepted.connect(self.export_results)
         self.view.button_box.rejected.connect(self.view.reject)
@@ -62,13 +104,19 @@ class IsostericModel():
         """Automatic calculation."""
         self.limits = None
         self.loading_points = None
-        if self.calculate():
+        self.calc_bootstrap_stop()
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.branch, self.loading_points)
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (self.results["loading"][0], self.results["loading"][-1])
             self.slider_reset()
             self.output_log()
             self.output_results()
             self.plot_results()
         else:
+            self.limits = None
             self.output_log()
             self.plot_clear()
 
@@ -76,30 +124,119 @@ class IsostericModel():
         """Set limits on calculation."""
         self.limits = [down, up]
         self.loading_points = numpy.linspace(down, up, self.loading_point_no)
-        if self.calculate():
+        self.calc_bootstrap_stop()
+        self.calc_worker.submit(self.calculate, self.calc_done, self.branch, self.loading_points)
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
         else:
+            self.limits = None
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def calculate(self, branch, loading_points):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
             try:
-                self.results = isosteric_enthalpy(
-                    self.isotherms,
-                    branch=self.branch,
-                    loading_points=self.loading_points,
-                )
+                if loading_points is None:
+                    loading_points = numpy.linspace(*loading_range(self.isotherms, branch), self.loading_point_no)
+                results = isosteric_enthalpy_at(self.isotherms, loading_points, branch=branch)
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                self.limits = None
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {"results": results}
+            result.output += log_hook.get_logs()
+            return result
+
+    def calc_bootstrap(self):
+        """Resample the isotherms at the current loading points, in parallel blocks."""
+        self.calc_bootstrap_stop()
+        if not self.results:
+            error_dialog("First calculate the isosteric enthalpy.")
+            return
+        self.bootstrap_replicates = self.view.bootstrap_input.value()
+
+        try:
+            points = bootstrap_points(self.isotherms, self.branch)
+        except Exception as e:
+            error_dialog(f"Bootstrap failed! <br> {e}")
+            return
+        temperatures = [iso.temperature for iso in self.isotherms]
+        loading = numpy.asarray(self.results["loading"])
+
+        blocks = split_rows(self.bootstrap_replicates, worker_count() * self.jobs_per_worker)
+        seeds = numpy.random.SeedSequence().spawn(len(blocks))
+        pool = get_process_pool()
+        for (start, end), seed in zip(blocks, seeds):
+            future = pool.submit(bootstrap_enthalpy, points, temperatures, loading, end - start, seed)
+            self.jobs.append((end - start, future))
+
+        self.view.bootstrap_button.setEnabled(False)
+        self.view.progress_bar.setRange(0, self.bootstrap_replicates)
+        self.view.progress_bar.setValue(0)
+        self.view.progress_bar.setVisible(True)
+        self.job_timer.start()
+
+    def collect_jobs(self):
+        """Gather finished blocks of resamples and update progress."""
+        pending = []
+        for replicates, future in self.jobs:
+            if not future.done():
+                pending.append((replicates, future))
+                continue
+            try:
+                self.curves.append(future.result())
+            except Exception as exc:
+                # if the pool itself is broken (e.g. a worker crashed)
+                # a new one will be created on next use
+                process_pool_broken(exc)
+                for _, other in self.jobs:
+                    other.cancel()
+                self.output += f'<font color="red">Bootstrap failed! <br> {exc}</font>'
+                self.curves = []
+                pending = []
+                break
+        self.jobs = pending
+
+        self.view.progress_bar.setValue(self.bootstrap_replicates - sum(rep for rep, _ in pending))
+        if not self.jobs:
+            self.calc_bootstrap_done()
+
+    def calc_bootstrap_done(self):
+        """Reduce the resampled curves to percentile bands and display them."""
+        curves = self.curves
+        self.calc_bootstrap_stop()
+        if curves:
+            curves = numpy.concatenate(curves)
+            valid = numpy.sum(numpy.isfinite(curves), axis=0)
+            if numpy.any(valid < 0.5 * len(curves)):
+                self.output += '<font color="magenta">Warning: Less than half of the resamples cover some loading points.</font><br>'
+            with numpy.errstate(all="ignore"):
+                lower, upper = numpy.nanpercentile(curves, self.bootstrap_percentiles, axis=0)
+            self.bands = {
+                "loading": numpy.asarray(self.results["loading"]),
+                "lower": lower,
+                "upper": upper,
+            }
+            self.plot_results()
+        self.output_log()
+
+    def calc_bootstrap_stop(self):
+        """Discard any running bootstrap, and its bands."""
+        for _, future in self.jobs:
+            future.cancel()
+        self.jobs = []
+        self.curves = []
+        self.bands = None
+        self.job_timer.stop()
+        self.view.progress_bar.setVisible(False)
+        self.view.bootstrap_button.setEnabled(True)
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -124,6 +261,19 @@ class IsostericModel():
             units=self.isotherms[0].units,
             ax=self.view.res_graph.ax,
         )
+        if self.bands is not None:
+            low, high = self.bootstrap_percentiles
+            self.view.res_graph.ax.fill_between(
+                self.bands["loading"],
+                self.bands["lower"],
+                self.bands["upper"],
+                alpha=0.3,
+                label=f"Bootstrap {high - low:g}% band",
+            )
+            top = numpy.nanmax(self.bands["upper"]) * 1.05
+            if top > self.view.res_graph.ax.get_ylim()[1]:
+                self.view.res_graph.ax.set_ylim(top=top)
+            self.view.res_graph.ax.legend()
         self.view.res_graph.canvas.draw_idle()
 
     def plot_clear(self):
@@ -165,6 +315,10 @@ class IsostericModel():
             "Standard Error [kJ/mol]":
             self.results.get("std_errs"),
         }
+        if self.bands is not None:
+            low, high = self.bootstrap_percentiles
+            results[f"Bootstrap {low:g}% [kJ/mol]"] = self.bands["lower"]
+            results[f"Bootstrap {high:g}% [kJ/mol]"] = self.bands["upper"]
         serialize(results, how="V", parent=self.view)
 
     def help_dialog(self):
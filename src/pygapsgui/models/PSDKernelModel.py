@@ -1,13 +1,28 @@
-from pygaps.characterisation.psd_kernel import psd_dft
-from pygaps.data import KERNELS
+import numpy
+
 from pygaps.graphing.calc_graphs import psd_plot
 from pygaps.utilities.exceptions import CalculationError
+from pygapsgui.utilities.kernel_store import KernelProjection
+from pygapsgui.utilities.kernel_store import kernel_names
+from pygapsgui.utilities.kernel_store import kernel_projection
+from pygapsgui.utilities.kernel_store import register_kernel
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class PSDKernelModel():
-    """Pore size distribution calculations with kernel fitting: QT MVC Model."""
+    """
+    Pore size distribution calculations with kernel fitting: QT MVC Model.
+
+    Kernels come from the kernel store, and their interpolation on the
+    isotherm points is kept between calculations, so that moving the
+    pressure limits only re-fits the selected points.
+
+    The regularisation strength can be picked automatically from the
+    corner of the L-curve, swept over ``sweep_points`` strengths.
+    """
 
     # Refs
     isotherm = None
@@ -17,11 +32,14 @@ class PSDKernelModel():
     branch = "ads"
     kernel = None
     bspline_order = 2
+    regularisation = 0
+    sweep_points = 50
     limit_indices = None
     limits = None
 
     # Results
     results = None
+    sweep = None
     output = ""
     success = True
 
@@ -38,7 +56,7 @@ class PSDKernelModel():
         )
         self.view.branch_dropdown.addItems(["ads", "des"])
         self.view.branch_dropdown.setCurrentText(self.branch)
-        self.view.kernel_dropdown.addItems(KERNELS)
+        self.view.kernel_dropdown.addItems(kernel_names())
         self.view.smooth_input.setValue(self.bspline_order)
 
         # plot setup
@@ -50,10 +68,15 @@ class PSDKernelModel():
         self.view.iso_graph.loading_unit = "mmol"
         self.view.iso_graph.set_isotherms([self.isotherm])
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
+        self.view.calc_sweep_button.clicked.connect(self.calc_sweep)
         self.view.x_select.slider.rangeChanged.connect(self.calc_with_limits)
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
+        self.view.kernel_add_button.clicked.connect(self.add_kernel)
         self.view.export_btn.clicked.connect(self.export_results)
         self.view.button_box.accepted.connect(self.view.accept)
         self.view.button_box.rejected.connect(self.view.reject)
@@ -68,7 +91,11 @@ class PSDKernelModel():
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.read_settings())
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (
                 self.pressure[self.limit_indices[0]],
                 self.pressure[self.limit_indices[1]],
@@ -84,7 +111,11 @@ class PSDKernelModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_done, self.read_settings())
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -92,32 +123,96 @@ class PSDKernelModel():
             self.output_log()
             self.plot_clear()
 
+    def calc_sweep(self):
+        """Choose the regularisation from the L-curve, then calculate."""
+        self.calc_worker.submit(self.calculate_sweep, self.calc_sweep_done, self.read_settings())
+
+    def calc_sweep_done(self, result):
+        """Display the L-curve and the results with the chosen regularisation."""
+        sweep = result.values and result.values.get("sweep")
+        self.calc_done(result)
+        if sweep:
+            self.view.regularisation_input.setValue(self.regularisation)
+            self.plot_sweep()
+
     def prepare_values(self):
         """Preliminary calculation of values that rarely change."""
         # Pressure
         self.pressure = self.isotherm.pressure(branch=self.branch)
 
-    def calculate(self):
+    def read_settings(self):
+        """Read calculation settings from the GUI, and return those used by ``calculate``."""
+        self.branch = self.view.branch_dropdown.currentText()
+        self.kernel = self.view.kernel_dropdown.currentText()
+        self.bspline_order = int(self.view.smooth_input.cleanText())
+        self.regularisation = self.view.regularisation_input.value()
+        return {
+            "branch": self.branch,
+            "kernel": self.kernel,
+            "limits": self.limits,
+            "bspline_order": self.bspline_order,
+            "regularisation": self.regularisation,
+        }
+
+    def calculate(self, settings):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
-            self.branch = self.view.branch_dropdown.currentText()
-            self.kernel = self.view.kernel_dropdown.currentText()
-            self.bspline_order = int(self.view.smooth_input.cleanText())
             try:
-                self.results = psd_dft(
-                    self.isotherm,
-                    branch=self.branch,
-                    kernel=self.kernel,
-                    bspline_order=self.bspline_order,
-                    p_limits=self.limits,
+                projection = kernel_projection(self.isotherm, settings["kernel"], settings["branch"])
+                results = projection.fit(
+                    p_limits=settings["limits"],
+                    bspline_order=settings["bspline_order"],
+                    regularisation=settings["regularisation"],
                 )
-                self.limit_indices = self.results.get('limits')
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {
+                "results": results,
+                "pressure": projection.pressure,
+                "limit_indices": results.get('limits'),
+            }
+            result.output += log_hook.get_logs()
+            return result
+
+    def calculate_sweep(self, settings):
+        """Sweep regularisation strengths and pick the corner of the L-curve."""
+        try:
+            projection = kernel_projection(self.isotherm, settings["kernel"], settings["branch"])
+            sweep = projection.l_curve(
+                p_limits=settings["limits"],
+                strengths=numpy.logspace(-6, 0, self.sweep_points),
+            )
+        except Exception as e:
+            return CalcResult(output=f'<font color="red">Calculation failed! <br> {e}</font>')
+        regularisation = sweep["strengths"][sweep["corner"]]
+        result = self.calculate(dict(settings, regularisation=regularisation))
+        if result.success:
+            result.values.update(sweep=sweep, regularisation=regularisation)
+        return result
+
+    def add_kernel(self):
+        """Add a kernel file to the kernel store, and select it."""
+        from pygapsgui.widgets.UtilityDialogs import open_files_dialog
+        paths = open_files_dialog(
+            self.view,
+            "Add a DFT kernel",
+            ".",
+            filter="Kernel files (*.csv)",
+        )
+        if not paths:
+            return
+        for path in paths:
+            try:
+                name = register_kernel(path)
+            except Exception as e:
+                error_dialog(f"Could not add kernel! <br> {e}")
+                continue
+            if self.view.kernel_dropdown.findText(name) < 0:
+                self.view.kernel_dropdown.addItem(name)
+            self.view.kernel_dropdown.setCurrentText(name)
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -145,15 +240,35 @@ class PSDKernelModel():
 
         # Isotherm plot
         self.view.iso_graph.draw_isotherms()
-        self.view.iso_graph.ax.plot(
+        self.view.iso_graph.set_line(
+            "fit",
             self.pressure[self.limit_indices[0]:self.limit_indices[1] + 1],
             self.results['kernel_loading'],
             c='yellow',
             label="fit",
         )
 
+    def plot_sweep(self):
+        """Plot the L-curve of the last sweep, marking the chosen strength."""
+        corner = self.sweep["corner"]
+        self.view.lcurve_graph.clear()
+        ax = self.view.lcurve_graph.ax
+        ax.loglog(self.sweep["residual_norm"], self.sweep["solution_norm"], "o-", markersize=3)
+        ax.loglog(
+            self.sweep["residual_norm"][corner],
+            self.sweep["solution_norm"][corner],
+            "o",
+            c="red",
+            label=f"regularisation = {self.regularisation:.3g}",
+        )
+        ax.set_xlabel("Residual norm")
+        ax.set_ylabel("Solution norm")
+        ax.legend()
+        self.view.lcurve_graph.canvas.draw_idle()
+
     def plot_clear(self):
         """Reset plots to default values."""
+        self.view.iso_graph.remove_line("fit")
         self.view.iso_graph.draw_isotherms()
         self.view.res_graph.clear()
         self.view.res_graph.canvas.draw_idle()
@@ -191,6 +306,6 @@ class PSDKernelModel():
         serialize(results, how="V", parent=self.view)
 
     def help_dialog(self):
-        """Display a dialog with the pyGAPS help."""
+        """Display a dialog with the help of the kernel fit."""
         from pygapsgui.widgets.UtilityDialogs import help_dialog
-        help_dialog(psd_dft)
+        help_dialog(KernelProjection.fit)
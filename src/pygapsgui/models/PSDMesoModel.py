@@ -1,17 +1,47 @@
+import numpy
+from qtpy import QtCore as QC
+from qtpy import QtWidgets as QW
+
 from pygaps.characterisation.models_kelvin import _KELVIN_MODELS
+from pygaps.characterisation.models_kelvin import get_kelvin_model
+from pygaps.characterisation.models_kelvin import get_meniscus_geometry
 from pygaps.characterisation.models_thickness import _THICKNESS_MODELS
+from pygaps.characterisation.models_thickness import get_thickness_model
 from pygaps.characterisation.psd_meso import _MENISCUS_GEOMETRIES
 from pygaps.characterisation.psd_meso import _MESO_PSD_MODELS
 from pygaps.characterisation.psd_meso import _PORE_GEOMETRIES
 from pygaps.characterisation.psd_meso import psd_mesoporous
 from pygaps.graphing.calc_graphs import psd_plot
 from pygaps.utilities.exceptions import CalculationError
+from pygapsgui.utilities.branch_data import branch_data
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.meso_sweep import CurveLookup
+from pygapsgui.utilities.meso_sweep import model_curves
+from pygapsgui.utilities.meso_sweep import psd_combinations
+from pygapsgui.utilities.meso_sweep import psd_curves
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import process_pool_broken
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class PSDMesoModel():
-    """Pore size distribution calculations with Kelvin-based theory: QT MVC Model."""
+    """
+    Pore size distribution calculations with Kelvin-based theory: QT MVC Model.
+
+    The branch points are prepared once (see ``branch_data``) and the
+    thickness and Kelvin curves are evaluated once on all of them, so that
+    moving the limits only slices these arrays before calling the PSD method.
+
+    Besides the selected combination, every combination of PSD method, pore
+    and meniscus geometry, thickness and Kelvin model can be compared.
+    Each method and pore geometry is a job on the process pool, with the
+    thickness and Kelvin curves evaluated once beforehand. Combinations
+    are ranked by how well their cumulative pore volume fits the isotherm.
+    """
 
     # Refs
     isotherm = None
@@ -26,9 +56,18 @@ class PSDMesoModel():
     kelvin_model = None
     limit_indices = None
     limits = None
+    kelvin_args = None  # adsorbate properties
+    curves = None  # (branch, version, models) -> (thickness, kelvin)
+
+    # Comparison
+    compare_jobs = None
+    compare_timer = None
+    compare_interval = 100  # ms between collecting results
+    compare_shown = 10  # best distributions overlaid
 
     # Results
     results = None
+    compare_results = None
     output = ""
     success = True
 
@@ -40,7 +79,7 @@ class PSDMesoModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "PSD cannot be calculated for supercritical "
@@ -71,8 +110,22 @@ class PSDMesoModel():
         self.view.iso_graph.pressure_mode = "relative"
         self.view.iso_graph.set_isotherms([self.isotherm])
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+        self.curves = {}
+
+        # comparisons are collected periodically
+        self.compare_jobs = []
+        self.compare_results = []
+        self.compare_timer = QC.QTimer(self.view)
+        self.compare_timer.setInterval(self.compare_interval)
+        self.compare_timer.timeout.connect(self.collect_compare)
+
         # connect signals
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
+        self.view.calc_compare_button.clicked.connect(self.calc_compare)
+        self.view.compare_table.itemSelectionChanged.connect(self.select_combination)
+        self.view.finished.connect(self.calc_compare_stop)
         self.view.x_select.slider.rangeChanged.connect(self.calc_with_limits)
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.export_btn.clicked.connect(self.export_results)
@@ -87,10 +140,12 @@ class PSDMesoModel():
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
-            pressure = self.isotherm.pressure(branch=self.branch, pressure_mode="relative")
-            if self.branch == 'des':
-                pressure = pressure[::-1]
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.read_settings())
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
+            pressure = self.branch_data().pressure
             self.limits = (pressure[self.limit_indices[0]], pressure[self.limit_indices[1]])
             self.slider_reset()
             self.output_log()
@@ -103,7 +158,11 @@ class PSDMesoModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_done, self.read_settings())
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -111,35 +170,225 @@ class PSDMesoModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
-        """Call pyGAPS to perform main calculation."""
+    def read_settings(self):
+        """Read calculation settings from the GUI, and return those used by ``calculate``."""
+        self.psd_model = self.view.tmodel_dropdown.currentText()
+        self.pore_geometry = self.view.geometry_dropdown.currentText()
+        self.meniscus_geometry = self.view.mgeometry_dropdown.currentText()
+        if self.meniscus_geometry == "auto":
+            self.meniscus_geometry = None
+        self.thickness_model = self.view.thickness_dropdown.currentText()
+        self.kelvin_model = self.view.kmodel_dropdown.currentText()
+        return {
+            "branch": self.branch,
+            "limits": self.limits,
+            "psd_model": self.psd_model,
+            "pore_geometry": self.pore_geometry,
+            "meniscus_geometry": self.meniscus_geometry,
+            "thickness_model": self.thickness_model,
+            "kelvin_model": self.kelvin_model,
+        }
+
+    def branch_data(self, branch=None):
+        """Selected (or given) branch, with the loading as liquid volume."""
+        return branch_data(self.isotherm, branch or self.branch, "volume_liquid", "cm3")
+
+    def adsorbate_properties(self):
+        """Adsorbate properties for the Kelvin models, read once."""
+        if self.kelvin_args is None:
+            adsorbate = self.isotherm.adsorbate
+            self.kelvin_args = {
+                "temperature": self.isotherm.temperature,
+                "liquid_density": adsorbate.liquid_density(self.isotherm.temperature),
+                "adsorbate_molar_mass": adsorbate.molar_mass(),
+                "adsorbate_surface_tension": adsorbate.surface_tension(self.isotherm.temperature),
+            }
+        return self.kelvin_args
+
+    def model_curves(self, data, settings):
+        """Thickness and Kelvin radius of the models in ``settings``, on all points of the branch."""
+        branch = settings["branch"]
+        meniscus_geometry = settings["meniscus_geometry"] or get_meniscus_geometry(branch, settings["pore_geometry"])
+        key = (branch, version(self.isotherm), settings["thickness_model"], settings["kelvin_model"], meniscus_geometry)
+        curves = self.curves.get(key)
+        if curves is None:
+            t_model = get_thickness_model(settings["thickness_model"])
+            k_model = get_kelvin_model(
+                settings["kelvin_model"],
+                meniscus_geometry=meniscus_geometry,
+                **self.adsorbate_properties(),
+            )
+            curves = self.curves[key] = (
+                CurveLookup(data.pressure, t_model(data.pressure)),
+                CurveLookup(data.pressure, k_model(data.pressure)),
+            )
+        return curves
+
+    def calculate(self, settings):
+        """Calculate the PSD of the selected points, as pyGAPS ``psd_mesoporous``."""
+        result = CalcResult()
         with log_hook:
-            self.psd_model = self.view.tmodel_dropdown.currentText()
-            self.pore_geometry = self.view.geometry_dropdown.currentText()
-            self.meniscus_geometry = self.view.mgeometry_dropdown.currentText()
-            if self.meniscus_geometry == "auto":
-                self.meniscus_geometry = None
-            self.thickness_model = self.view.thickness_dropdown.currentText()
-            self.kelvin_model = self.view.kmodel_dropdown.currentText()
             try:
-                self.results = psd_mesoporous(
-                    self.isotherm,
-                    branch=self.branch,
-                    psd_model=self.psd_model,
-                    pore_geometry=self.pore_geometry,
-                    meniscus_geometry=self.meniscus_geometry,
-                    thickness_model=self.thickness_model,
-                    kelvin_model=self.kelvin_model,
-                    p_limits=self.limits,
+                data = self.branch_data(settings["branch"])
+                limit_indices = data.limit_indices(settings["limits"], (0.1, 0.99))
+                pressure, volume = data.select(limit_indices)
+                thickness, kelvin = self.model_curves(data, settings)
+                results = psd_curves(
+                    settings["psd_model"], settings["pore_geometry"], pressure, volume, thickness, kelvin
                 )
-                self.limit_indices = self.results.get('limits')
+                results['limits'] = limit_indices
+                if numpy.any(results['pore_volume_cumulative'] < 0):
+                    result.output += (
+                        '<font color="magenta">Warning: Negative values encountered in cumulative pore volumes. '
+                        'It is very likely that the model or its limits are wrong. '
+                        'Check that your pore geometry, meniscus geometry and thickness function '
+                        'are suitable for the material.</font><br>'
+                    )
 
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {"results": results, "limit_indices": limit_indices}
+            result.output += log_hook.get_logs()
+            return result
+
+    def calc_compare(self):
+        """Calculate the PSD of every combination of method and models on the process pool."""
+        self.calc_compare_stop()
+        self.compare_results = []
+
+        meniscus_geometries = [None] + _MENISCUS_GEOMETRIES
+        with log_hook:
+            try:
+                # the same points as the main calculation
+                data = self.branch_data()
+                pressure, volume = data.select(data.limit_indices(self.limits, (0.1, 0.99)))
+                thickness, kelvin, errors = model_curves(
+                    pressure,
+                    self.branch,
+                    _PORE_GEOMETRIES,
+                    meniscus_geometries,
+                    _THICKNESS_MODELS,
+                    _KELVIN_MODELS,
+                    self.adsorbate_properties(),
+                )
+            except Exception as e:
+                error_dialog(f"Calculation failed! <br> {e}")
+                return
+        for model, error in errors:
+            self.output += f'<font color="magenta">Skipped {model}: {error}</font><br>'
+        self.output_log()
+
+        pool = get_process_pool()
+        for psd_model in _MESO_PSD_MODELS:
+            for pore_geometry in _PORE_GEOMETRIES:
+                self.compare_jobs.append(
+                    pool.submit(
+                        psd_combinations,
+                        psd_model,
+                        pore_geometry,
+                        self.branch,
+                        pressure,
+                        volume,
+                        thickness,
+                        kelvin,
+                        meniscus_geometries,
+                    )
+                )
+        self.view.calc_compare_button.setEnabled(False)
+        self.view.res_graphs_tab.setCurrentWidget(self.view.compare_widget)
+        self.compare_timer.start()
+
+    def collect_compare(self):
+        """Gather finished comparison jobs and update the ranking."""
+        pending = []
+        changed = False
+        for future in self.compare_jobs:
+            if not future.done():
+                pending.append(future)
+                continue
+            changed = True
+            try:
+                self.compare_results.extend(future.result())
+            except Exception as exc:
+                # if the pool itself is broken (e.g. a worker crashed)
+                # a new one will be created on next use
+                process_pool_broken(exc)
+                for other in self.compare_jobs:
+                    other.cancel()
+                self.output += f'<font color="red">Comparison failed! <br> {exc}</font><br>'
+                pending = []
+                break
+        self.compare_jobs = pending
+
+        if changed:
+            self.compare_results.sort(key=lambda res: (res["error"] is not None, res["rmse"]))
+            self.output_compare()
+            self.plot_compare()
+        if not self.compare_jobs:
+            self.calc_compare_stop()
+            self.output_log()
+
+    def calc_compare_stop(self):
+        """Discard any running comparison."""
+        for future in self.compare_jobs:
+            future.cancel()
+        self.compare_jobs = []
+        self.compare_timer.stop()
+        self.view.calc_compare_button.setEnabled(True)
+
+    def select_combination(self):
+        """Use the combination selected in the comparison table."""
+        rows = self.view.compare_table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.compare_results):
+            return
+        result = self.compare_results[rows[0].row()]
+        self.view.tmodel_dropdown.setCurrentText(result["psd_model"])
+        self.view.geometry_dropdown.setCurrentText(result["pore_geometry"])
+        self.view.mgeometry_dropdown.setCurrentText(result["meniscus_geometry"] or "auto")
+        self.view.thickness_dropdown.setCurrentText(result["thickness_model"])
+        self.view.kmodel_dropdown.setCurrentText(result["kelvin_model"])
+        self.calc_worker.submit(self.calculate, self.calc_done, self.read_settings())
+
+    def output_compare(self):
+        """Fill the ranking table of combinations."""
+        table = self.view.compare_table
+        table.blockSignals(True)
+        table.setRowCount(len(self.compare_results))
+        for row, result in enumerate(self.compare_results):
+            values = [
+                result["psd_model"],
+                result["pore_geometry"],
+                result["meniscus_geometry"] or "auto",
+                result["thickness_model"],
+                result["kelvin_model"],
+                result["error"] or f"{result['rmse']:.3g}",
+            ]
+            for col, value in enumerate(values):
+                table.setItem(row, col, QW.QTableWidgetItem(value))
+        table.blockSignals(False)
+
+    def plot_compare(self):
+        """Overlay the distributions of the best combinations."""
+        self.view.compare_graph.clear()
+        ax = self.view.compare_graph.ax
+        for result in self.compare_results[:self.compare_shown]:
+            if result["error"] is not None:
+                break
+            meniscus = result["meniscus_geometry"] or "auto"
+            ax.plot(
+                result["pore_widths"],
+                result["pore_distribution"],
+                label=f"{result['psd_model']}, {result['pore_geometry']} ({meniscus}), "
+                f"{result['thickness_model']}, {result['kelvin_model']}",
+            )
+        ax.set_xscale("log")
+        ax.set_xlabel("Pore width [nm]")
+        ax.set_ylabel("Distribution [dV/dw]")
+        if ax.lines:
+            ax.legend(fontsize="x-small")
+        self.view.compare_graph.canvas.draw_idle()
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -158,26 +407,13 @@ class PSDMesoModel():
         self.view.iso_graph.draw_isotherms()
         self.view.iso_graph.ax.autoscale(enable=False)
 
-        from pygaps.units.converter_mode import c_loading
-        model_pressure = self.isotherm.pressure(
-            pressure_mode="relative",
-            branch=self.branch,
-        )
-        if self.branch == "des":
-            model_pressure = model_pressure[::-1]
-        model_pressure = model_pressure[self.results["limits"][0]:self.results["limits"][1] + 1]
+        data = self.branch_data()
+        model_pressure, _ = data.select(self.results["limits"])
         model_pressure = (model_pressure[:-1] + model_pressure[1:]) / 2
-        model_loading = c_loading(
-            self.results["pore_volume_cumulative"],
-            basis_from="volume_liquid",
-            unit_from="cm3",
-            basis_to=self.isotherm.loading_basis,
-            unit_to=self.isotherm.loading_unit,
-            adsorbate=self.isotherm.adsorbate,
-            temp=self.isotherm.temperature,
-        )
+        model_loading = self.results["pore_volume_cumulative"] * data.loading_factor
 
-        self.view.iso_graph.ax.plot(
+        self.view.iso_graph.set_line(
+            "fit",
             model_pressure,
             model_loading,
             c='yellow',
@@ -198,6 +434,7 @@ class PSDMesoModel():
 
     def plot_clear(self):
         """Reset plots to default values."""
+        self.view.iso_graph.remove_line("fit")
         self.view.iso_graph.draw_isotherms()
         self.view.res_graph.clear()
         self.view.res_graph.canvas.draw_idle()
@@ -209,6 +446,7 @@ class PSDMesoModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calc_compare_stop()
         self.branch = self.view.branch_dropdown.currentText()
         self.view.iso_graph.branch = self.branch
         self.plot_clear()
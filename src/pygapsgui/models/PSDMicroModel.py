@@ -1,15 +1,38 @@
+import numpy
+from qtpy import QtCore as QC
+from qtpy import QtWidgets as QW
+
 from pygaps.characterisation.models_hk import _ADSORBENT_MODELS
 from pygaps.characterisation.psd_micro import _MICRO_PSD_MODELS
 from pygaps.characterisation.psd_micro import _PORE_GEOMETRIES
 from pygaps.characterisation.psd_micro import psd_microporous
 from pygaps.graphing.calc_graphs import psd_plot
 from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.branch_data import branch_data
+from pygapsgui.utilities.conversion_cache import converted
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.micro_sweep import hk_combination
+from pygapsgui.utilities.micro_sweep import psd_hk
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
+from pygapsgui.utilities.workers import get_process_pool
+from pygapsgui.utilities.workers import process_pool_broken
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class PSDMicroModel():
-    """Pore size distribution calculations with mean potential theory: QT MVC Model."""
+    """
+    Pore size distribution calculations with mean potential theory: QT MVC Model.
+
+    The branch points are prepared once (see ``branch_data``), so that
+    moving the limits only slices them before calling the PSD method.
+
+    Every combination of PSD method, pore geometry and surface model can
+    also be compared on the same points. Each combination is a job on
+    the process pool, and the distributions are overlaid with
+    their median pore width.
+    """
 
     # Refs
     isotherm = None
@@ -22,9 +45,16 @@ class PSDMicroModel():
     pore_geometry = None
     limit_indices = None
     limits = None
+    adsorbate_model = None  # adsorbate properties
+
+    # Comparison
+    compare_jobs = None
+    compare_timer = None
+    compare_interval = 100  # ms between collecting results
 
     # Results
     results = None
+    compare_results = None
     output = ""
     success = True
 
@@ -36,7 +66,7 @@ class PSDMicroModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "PSD cannot be calculated for supercritical "
@@ -65,8 +95,21 @@ class PSDMicroModel():
         self.view.iso_graph.pressure_mode = "relative"
         self.view.iso_graph.set_isotherms([self.isotherm])
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
+        # comparisons are collected periodically
+        self.compare_jobs = []
+        self.compare_results = []
+        self.compare_timer = QC.QTimer(self.view)
+        self.compare_timer.setInterval(self.compare_interval)
+        self.compare_timer.timeout.connect(self.collect_compare)
+
         # connect signals
         self.view.calc_auto_button.clicked.connect(self.calc_auto)
+        self.view.calc_compare_button.clicked.connect(self.calc_compare)
+        self.view.compare_table.itemSelectionChanged.connect(self.select_combination)
+        self.view.finished.connect(self.calc_compare_stop)
         self.view.x_select.slider.rangeChanged.connect(self.calc_with_limits)
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         self.view.export_btn.clicked.connect(self.export_results)
@@ -81,10 +124,12 @@ class PSDMicroModel():
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
-            pressure = self.isotherm.pressure(branch=self.branch, pressure_mode="relative")
-            if self.branch == 'des':
-                pressure = pressure[::-1]
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, self.read_settings())
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
+            pressure = self.branch_data().pressure
             self.limits = (pressure[self.limit_indices[0]], pressure[self.limit_indices[1]])
             self.slider_reset()
             self.output_log()
@@ -97,7 +142,11 @@ class PSDMicroModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_done, self.read_settings())
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -105,29 +154,187 @@ class PSDMicroModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
-        """Call pyGAPS to perform main calculation."""
+    def read_settings(self):
+        """Read calculation settings from the GUI, and return those used by ``calculate``."""
+        self.psd_model = self.view.model_dropdown.currentText()
+        self.material_model = self.view.amodel_dropdown.currentText()
+        self.pore_geometry = self.view.geometry_dropdown.currentText()
+        return {
+            "branch": self.branch,
+            "limits": self.limits,
+            "psd_model": self.psd_model,
+            "material_model": self.material_model,
+            "pore_geometry": self.pore_geometry,
+        }
+
+    def branch_data(self, branch=None):
+        """Selected (or given) branch, with the loading in mmol."""
+        return branch_data(self.isotherm, branch or self.branch, "molar", "mmol")
+
+    def adsorbate_properties(self):
+        """Adsorbate properties for the HK models, read once."""
+        if self.adsorbate_model is None:
+            adsorbate = self.isotherm.adsorbate
+            try:
+                self.adsorbate_model = {
+                    'molecular_diameter': adsorbate.get_prop('molecular_diameter'),
+                    'polarizability': adsorbate.get_prop('polarizability'),
+                    'magnetic_susceptibility': adsorbate.get_prop('magnetic_susceptibility'),
+                    'surface_density': adsorbate.get_prop('surface_density'),
+                    'liquid_density': adsorbate.liquid_density(self.isotherm.temperature),
+                    'adsorbate_molar_mass': adsorbate.molar_mass(),
+                }
+            except ParameterError as err:
+                raise ParameterError("Isotherm adsorbate does not have all required HK properties.") from err
+        return self.adsorbate_model
+
+    def calculate(self, settings):
+        """Calculate the PSD of the selected points, as pyGAPS ``psd_microporous``."""
+        result = CalcResult()
         with log_hook:
-            self.psd_model = self.view.model_dropdown.currentText()
-            self.material_model = self.view.amodel_dropdown.currentText()
-            self.pore_geometry = self.view.geometry_dropdown.currentText()
             try:
-                self.results = psd_microporous(
-                    self.isotherm,
-                    branch=self.branch,
-                    psd_model=self.psd_model,
-                    pore_geometry=self.pore_geometry,
-                    material_model=self.material_model,
-                    p_limits=self.limits,
+                data = self.branch_data(settings["branch"])
+                limit_indices = data.limit_indices(settings["limits"], (None, 0.2))
+                pressure, loading = data.select(limit_indices)
+                results = psd_hk(
+                    settings["psd_model"],
+                    settings["pore_geometry"],
+                    pressure,
+                    loading,
+                    self.isotherm.temperature,
+                    self.adsorbate_properties(),
+                    settings["material_model"],
                 )
-                self.limit_indices = self.results.get('limits')
+                results['limits'] = limit_indices
 
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {"results": results, "limit_indices": limit_indices}
+            result.output += log_hook.get_logs()
+            return result
+
+    def calc_compare(self):
+        """Calculate the PSD of every combination of method and models on the process pool."""
+        self.calc_compare_stop()
+        self.compare_results = []
+
+        try:
+            # the same points as the main calculation
+            data = self.branch_data()
+            pressure, loading = data.select(data.limit_indices(self.limits, (None, 0.2)))
+            adsorbate_properties = self.adsorbate_properties()
+        except Exception as e:
+            error_dialog(f"Calculation failed! <br> {e}")
+            return
+
+        pool = get_process_pool()
+        for psd_model in _MICRO_PSD_MODELS:
+            for pore_geometry in _PORE_GEOMETRIES:
+                for material_model in _ADSORBENT_MODELS:
+                    self.compare_jobs.append(
+                        pool.submit(
+                            hk_combination,
+                            psd_model,
+                            pore_geometry,
+                            material_model,
+                            pressure,
+                            loading,
+                            self.isotherm.temperature,
+                            adsorbate_properties,
+                        )
+                    )
+        self.view.calc_compare_button.setEnabled(False)
+        self.view.res_graphs_tab.setCurrentWidget(self.view.compare_widget)
+        self.compare_timer.start()
+
+    def collect_compare(self):
+        """Gather finished comparison jobs and update the overlay."""
+        pending = []
+        changed = False
+        for future in self.compare_jobs:
+            if not future.done():
+                pending.append(future)
+                continue
+            changed = True
+            try:
+                self.compare_results.append(future.result())
+            except Exception as exc:
+                # if the pool itself is broken (e.g. a worker crashed)
+                # a new one will be created on next use
+                process_pool_broken(exc)
+                for other in self.compare_jobs:
+                    other.cancel()
+                self.output += f'<font color="red">Comparison failed! <br> {exc}</font><br>'
+                pending = []
+                break
+        self.compare_jobs = pending
+
+        if changed:
+            self.compare_results.sort(key=lambda res: (res["error"] is not None, res["median_width"]))
+            self.output_compare()
+            self.plot_compare()
+        if not self.compare_jobs:
+            self.calc_compare_stop()
+            self.output_log()
+
+    def calc_compare_stop(self):
+        """Discard any running comparison."""
+        for future in self.compare_jobs:
+            future.cancel()
+        self.compare_jobs = []
+        self.compare_timer.stop()
+        self.view.calc_compare_button.setEnabled(True)
+
+    def select_combination(self):
+        """Use the combination selected in the comparison table."""
+        rows = self.view.compare_table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.compare_results):
+            return
+        result = self.compare_results[rows[0].row()]
+        self.view.model_dropdown.setCurrentText(result["psd_model"])
+        self.view.geometry_dropdown.setCurrentText(result["pore_geometry"])
+        self.view.amodel_dropdown.setCurrentText(result["material_model"])
+        self.calc_worker.submit(self.calculate, self.calc_done, self.read_settings())
+
+    def output_compare(self):
+        """Fill the table of combinations."""
+        table = self.view.compare_table
+        table.blockSignals(True)
+        table.setRowCount(len(self.compare_results))
+        for row, result in enumerate(self.compare_results):
+            values = [
+                result["psd_model"],
+                result["pore_geometry"],
+                result["material_model"],
+                result["error"] or f"{result['median_width']:.3g}",
+            ]
+            for col, value in enumerate(values):
+                table.setItem(row, col, QW.QTableWidgetItem(value))
+        table.blockSignals(False)
+
+    def plot_compare(self):
+        """Overlay the distributions of all combinations, marking their median pore width (see the table)."""
+        self.view.compare_graph.clear()
+        ax = self.view.compare_graph.ax
+        for result in self.compare_results:
+            if result["error"] is not None:
+                break
+            widths = result["pore_widths"]
+            distribution = result["pore_distribution"]
+            line, = ax.plot(
+                widths,
+                distribution,
+                linewidth=1,
+                label=f"{result['psd_model']}, {result['pore_geometry']}, {result['material_model']}",
+            )
+            median = result["median_width"]
+            ax.plot(median, numpy.interp(median, widths, distribution), "o", markersize=4, color=line.get_color())
+        ax.set_xlabel("Pore width [nm]")
+        ax.set_ylabel("Distribution [dV/dw]")
+        ax.set_xlim(left=0, right=5)
+        self.view.compare_graph.canvas.draw_idle()
 
     def output_results(self):
         """Fill in any GUI text output with results"""
@@ -171,6 +378,7 @@ class PSDMicroModel():
 
     def select_branch(self):
         """Handle isotherm branch selection."""
+        self.calc_compare_stop()
         self.branch = self.view.branch_dropdown.currentText()
         self.view.iso_graph.branch = self.branch
         self.plot_clear()
@@ -1,3 +1,4 @@
+import numpy
 from qtpy import QtWidgets as QW
 
 from pygaps.characterisation.alphas_plots import alpha_s
@@ -7,12 +8,30 @@ from pygaps.characterisation.area_lang import area_langmuir
 from pygaps.graphing.calc_graphs import tp_plot
 from pygaps.utilities.exceptions import CalculationError
 from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import interval_window
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.reference_store import load_reference
+from pygapsgui.utilities.reference_store import reference_curve
+from pygapsgui.utilities.reference_store import reference_names
+from pygapsgui.utilities.reference_store import register_reference
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class PlotAlphaSModel():
-    """Alpha-s plot calculations: QT MVC Model."""
+    """
+    Alpha-s plot calculations: QT MVC Model.
+
+    The fit of the section under the slider is previewed from the
+    prepared ``WindowRegression`` while pyGAPS calculates it.
+
+    The reference is either a second selected isotherm or one from the
+    reference library, in both cases prepared once as a ``ReferenceCurve``
+    (see ``reference_store``) and evaluated at relative pressure.
+    """
 
     isotherm = None
     ref_isotherm = None
@@ -21,12 +40,16 @@ class PlotAlphaSModel():
     # Settings
     branch = "ads"
     ref_branch = "ads"
+    selected_reference = "Selected isotherm"
+    reference_name = None
+    reference = None
     limits = None
     molar_mass = None
     liquid_density = None
     reference_loading = None
     reference_area = None
     reducing_pressure = 0.4
+    regression = None
 
     # Results
     alphas_curve = None
@@ -43,8 +66,9 @@ class PlotAlphaSModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
-            self.ref_isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
+            if self.ref_isotherm is not None:
+                converted(self.ref_isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "Alpha-s plots cannot be defined for supercritical "
@@ -71,8 +95,19 @@ class PlotAlphaSModel():
         self.view.branch_dropdown.setCurrentText(self.branch)
         self.view.refbranch_dropdown.addItems(["ads", "des"])
         self.view.refbranch_dropdown.setCurrentText(self.ref_branch)
+        if self.ref_isotherm is not None:
+            self.view.reference_dropdown.addItem(self.selected_reference)
+        self.view.reference_dropdown.addItems(reference_names())
+        self.view.reference_save_button.setEnabled(self.ref_isotherm is not None)
+        self.reference_name = self.view.reference_dropdown.currentText()
+        self.view.refbranch_dropdown.setEnabled(self.reference_name == self.selected_reference)
+
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
 
         # connect signals
+        self.view.reference_dropdown.currentTextChanged.connect(self.select_reference)
+        self.view.reference_save_button.clicked.connect(self.add_reference)
         self.view.refarea_dropdown.currentTextChanged.connect(self.select_area)
         self.view.refarea_input.editingFinished.connect(self.select_area_specify)
         self.view.branch_dropdown.currentTextChanged.connect(self.select_branch)
@@ -91,7 +126,7 @@ class PlotAlphaSModel():
         self.liquid_density = self.isotherm.adsorbate.liquid_density(isotherm.temperature)
 
         # dynamic parameters
-        if self.prepare_values():
+        if self.prepare_reference() and self.prepare_values():
             # calculate reference area
             self.select_area("BET")
             # run calculation
@@ -107,23 +142,18 @@ class PlotAlphaSModel():
             }, {"pressure_mode": "relative"}
         )
 
+        if self.reference is None:
+            return False
+
         with log_hook:
             try:
-                self.alpha_s_point = self.ref_isotherm.loading_at(
-                    self.reducing_pressure,
-                    branch=self.ref_branch,
-                    loading_unit='mmol',
-                    loading_basis='molar',
-                    pressure_mode='relative',
-                )
-                self.reference_loading = self.ref_isotherm.loading_at(
-                    self.pressure,
-                    branch=self.ref_branch,
-                    pressure_unit=self.isotherm.pressure_unit,
-                    loading_unit='mmol',
-                )
+                self.alpha_s_point = self.reference.loading_at(self.reducing_pressure)
+                self.reference_loading = self.reference.loading_at(self.pressure)
                 if self.ref_branch == 'des':
                     self.reference_loading = self.reference_loading[::-1]
+                self.regression = WindowRegression(
+                    self.reference_loading / self.alpha_s_point, self.loading, min_points=2
+                )
             except Exception as err:
                 self.output += '<font color="red">Error: The reference isotherm does not cover the same pressure range! <br></font>'
                 self.output_log()
@@ -132,10 +162,40 @@ class PlotAlphaSModel():
             self.output += log_hook.get_logs()
             return True
 
+    def prepare_reference(self):
+        """Prepare the curve of the selected reference."""
+        try:
+            if self.reference_name == self.selected_reference:
+                self.reference = reference_curve(self.ref_isotherm, self.ref_branch)
+            else:
+                self.reference = load_reference(self.reference_name)
+        except Exception as err:
+            self.reference = None
+            self.output += f'<font color="red">Error: Could not load the reference! <br> {err}</font>'
+            self.output_log()
+            return False
+        return True
+
+    def reference_area_by(self, area_type):
+        """Area of the reference by the BET or Langmuir method, calculated once for an isotherm."""
+        areas = self.reference.info["areas"]
+        if area_type not in areas:
+            if self.reference_name != self.selected_reference:
+                raise CalculationError(f"The {area_type} area of this reference is not known, specify it.")
+            if area_type == "BET":
+                areas[area_type] = area_BET(self.ref_isotherm).get('area')
+            else:
+                areas[area_type] = area_langmuir(self.ref_isotherm).get('area')
+        return areas[area_type]
+
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(self.calculate, self.calc_auto_done, *self.calc_inputs())
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (0, self.alphas_curve[-1])
             self.slider_reset()
             self.output_results()
@@ -148,7 +208,12 @@ class PlotAlphaSModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.output_preview()
+        self.calc_worker.submit(self.calculate, self.calc_done, *self.calc_inputs())
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -156,32 +221,51 @@ class PlotAlphaSModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def calc_inputs(self):
+        """Settings of the calculation, passed to the worker."""
+        return (
+            self.loading,
+            self.reference_loading,
+            self.alpha_s_point,
+            self.reference_area,
+            self.reference.info.get("adsorbate"),
+            self.limits,
+        )
+
+    def calculate(self, loading, reference_loading, alpha_s_point, reference_area, ref_adsorbate, limits):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
+        if ref_adsorbate and ref_adsorbate != str(self.isotherm.adsorbate):
+            result.output += f'<font color="magenta">Warning: The reference adsorbate ({ref_adsorbate}) is different from the isotherm adsorbate.</font><br>'
         with log_hook:
             try:
-                self.results, self.alphas_curve = alpha_s_raw(
-                    self.loading,
-                    self.reference_loading,
-                    self.alpha_s_point,
-                    self.reference_area,
+                results, alphas_curve = alpha_s_raw(
+                    loading,
+                    reference_loading,
+                    alpha_s_point,
+                    reference_area,
                     self.liquid_density,
                     self.molar_mass,
-                    t_limits=self.limits,
+                    t_limits=limits,
                 )
 
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {"results": results, "alphas_curve": alphas_curve}
+            result.output += log_hook.get_logs()
+            return result
 
     def output_results(self):
         """Fill in any GUI text output with results"""
+        self.output_table(self.results)
+
+    def output_table(self, results):
+        """Fill in the table with the fitted sections."""
         self.view.res_table.setRowCount(0)
-        self.view.res_table.setRowCount(len(self.results))
-        for index, result in enumerate(self.results):
+        self.view.res_table.setRowCount(len(results))
+        for index, result in enumerate(results):
             self.view.res_table.setItem(
                 index, 0, QW.QTableWidgetItem(f"{result.get('adsorbed_volume'):g}")
             )
@@ -194,6 +278,24 @@ class PlotAlphaSModel():
                 index, 4, QW.QTableWidgetItem(f"{result.get('intercept'):g}")
             )
 
+    def output_preview(self):
+        """Display the fit of the selected section while it is calculated by pyGAPS."""
+        alpha_curve = self.reference_loading / self.alpha_s_point
+        window = interval_window(alpha_curve, self.limits)
+        if window is None:
+            return
+        slope, intercept, corr_coef = self.regression.fit(*window)
+        # pyGAPS discards sections that are too steep
+        if numpy.isnan(slope) or slope * (max(alpha_curve) / max(self.loading)) >= 3:
+            return
+        self.output_table([{
+            'adsorbed_volume': intercept * self.molar_mass / self.liquid_density / 1000,
+            'area': self.reference_area / self.alpha_s_point * slope,
+            'corr_coef': corr_coef,
+            'slope': slope,
+            'intercept': intercept,
+        }])
+
     def output_log(self):
         """Output text or dialog error/warning/info."""
         self.view.output.setText(self.output)
@@ -222,6 +324,13 @@ class PlotAlphaSModel():
         self.view.res_graph.clear()
         self.view.res_graph.canvas.draw_idle()
 
+    def results_clear(self):
+        """Discard results which no longer match the selected data or reference."""
+        self.calc_worker.cancel()
+        self.results = None
+        self.view.res_table.setRowCount(0)
+        self.plot_clear()
+
     def slider_reset(self):
         """Resets the GUI selection sliders."""
         self.view.x_select.setRange(self.limits)
@@ -231,12 +340,15 @@ class PlotAlphaSModel():
     def select_area(self, area_type):
         """Handle reference area selection."""
         with log_hook:
-            if area_type == "BET":
-                self.reference_area = area_BET(self.ref_isotherm).get('area')
-                self.view.refarea_input.setReadOnly(True)
-                self.view.refarea_input.setText(f"{self.reference_area:.4g}")
-            elif area_type == "Langmuir":
-                self.reference_area = area_langmuir(self.ref_isotherm).get('area')
+            if area_type in ("BET", "Langmuir"):
+                try:
+                    self.reference_area = self.reference_area_by(area_type)
+                except Exception as err:
+                    self.output += f'<font color="red">Error: Could not obtain the reference area! <br> {err}</font>'
+                    self.output_log()
+                    self.view.refarea_input.clear()
+                    self.results_clear()
+                    return
                 self.view.refarea_input.setReadOnly(True)
                 self.view.refarea_input.setText(f"{self.reference_area:.4g}")
             else:
@@ -245,6 +357,8 @@ class PlotAlphaSModel():
 
         if self.prepare_values():
             self.calc_auto()
+        else:
+            self.results_clear()
 
     def select_area_specify(self):
         """Use area specified by user."""
@@ -254,18 +368,58 @@ class PlotAlphaSModel():
         self.reference_area = float(ref_area_str)
         if self.prepare_values():
             self.calc_auto()
+        else:
+            self.results_clear()
 
     def select_branch(self, branch):
         """Handle isotherm branch selection."""
         self.branch = branch
         if self.prepare_values():
             self.calc_auto()
+        else:
+            self.results_clear()
 
     def select_refbranch(self, branch):
         """Handle reference isotherm branch selection."""
         self.ref_branch = branch
-        if self.prepare_values():
+        if self.prepare_reference() and self.prepare_values():
             self.calc_auto()
+        else:
+            self.results_clear()
+
+    def select_reference(self, name):
+        """Handle reference selection, from the isotherms or the library."""
+        self.reference_name = name
+        selected = name == self.selected_reference
+        if not selected:
+            # library references are a single adsorption branch
+            self.ref_branch = "ads"
+            self.view.refbranch_dropdown.blockSignals(True)
+            self.view.refbranch_dropdown.setCurrentText(self.ref_branch)
+            self.view.refbranch_dropdown.blockSignals(False)
+        self.view.refbranch_dropdown.setEnabled(selected)
+        if self.prepare_reference():
+            self.select_area(self.view.refarea_dropdown.currentText())
+        else:
+            self.results_clear()
+
+    def add_reference(self):
+        """Save the reference isotherm branch in the reference library."""
+        name, ok = QW.QInputDialog.getText(
+            self.view,
+            "Save to reference library",
+            "Reference name:",
+            text=f"{self.ref_isotherm.material} {self.ref_isotherm.adsorbate}",
+        )
+        if not ok or not name:
+            return
+        try:
+            name = register_reference(self.ref_isotherm, name, branch=self.ref_branch)
+        except Exception as e:
+            error_dialog(f"Could not save reference! <br> {e}")
+            return
+        if self.view.reference_dropdown.findText(name) < 0:
+            self.view.reference_dropdown.addItem(name)
 
     def select_redpressure(self):
         """Handle reducing pressure selection."""
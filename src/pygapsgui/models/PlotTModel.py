@@ -1,18 +1,33 @@
+import numpy
 from qtpy import QtWidgets as QW
 
 from pygaps.characterisation.models_thickness import _THICKNESS_MODELS
-from pygaps.characterisation.models_thickness import get_thickness_model
 from pygaps.characterisation.t_plots import t_plot
 from pygaps.characterisation.t_plots import t_plot_raw
 from pygaps.graphing.calc_graphs import tp_plot
 from pygaps.utilities.exceptions import CalculationError
 from pygaps.utilities.pygaps_utilities import get_iso_loading_and_pressure_ordered
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import interval_window
 from pygapsgui.utilities.log_hook import log_hook
+from pygapsgui.utilities.reference_store import thickness_model
+from pygapsgui.utilities.reference_store import thickness_names
+from pygapsgui.utilities.workers import CalcResult
+from pygapsgui.utilities.workers import CalcWorker
 from pygapsgui.widgets.UtilityDialogs import error_dialog
 
 
 class PlotTModel():
-    """T-plot calculations: QT MVC Model."""
+    """
+    T-plot calculations: QT MVC Model.
+
+    The fit of the section under the slider is previewed from the
+    prepared ``WindowRegression`` while pyGAPS calculates it.
+
+    Standard isotherm thickness models, and references saved by the user,
+    are read from the reference library (see ``reference_store``).
+    """
 
     isotherm = None
     view = None
@@ -23,6 +38,8 @@ class PlotTModel():
     thickness_model = None
     molar_mass = None
     liquid_density = None
+    thickness_curve = None
+    regression = None
 
     # Results
     t_curve = None
@@ -38,7 +55,7 @@ class PlotTModel():
 
         # Fail condition
         try:
-            self.isotherm.pressure(pressure_mode="relative")
+            converted(self.isotherm, "pressure", pressure_mode="relative")
         except CalculationError:
             error_dialog(
                 "T-plots cannot be defined for supercritical "
@@ -66,8 +83,12 @@ class PlotTModel():
         self.view.branch_dropdown.setCurrentText(self.branch)
         models = list(_THICKNESS_MODELS.keys())
         models.remove("zero thickness")  # Not an option
+        models += thickness_names()
         self.view.thickness_dropdown.addItems(models)
 
+        # calculations run in the background
+        self.calc_worker = CalcWorker(parent=self.view)
+
         # connect signals
         self.view.branch_dropdown.currentIndexChanged.connect(self.select_branch)
         # TODO: add the ability for custom callable models
@@ -83,7 +104,7 @@ class PlotTModel():
         # static parameters
         self.molar_mass = self.isotherm.adsorbate.molar_mass()
         self.liquid_density = self.isotherm.adsorbate.liquid_density(isotherm.temperature)
-        self.thickness_model = get_thickness_model(models[0])
+        self.thickness_model = thickness_model(models[0])
         # dynamic parameters
         self.prepare_values()
         # run calculation
@@ -98,11 +119,24 @@ class PlotTModel():
                 "loading_unit": "mmol"
             }, {"pressure_mode": "relative"}
         )
+        self.thickness_curve = self.thickness_model(self.pressure)
+        self.regression = WindowRegression(self.thickness_curve, self.loading, min_points=2)
 
     def calc_auto(self):
         """Automatic calculation."""
         self.limits = None
-        if self.calculate():
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_auto_done,
+            self.pressure,
+            self.loading,
+            self.thickness_model,
+            self.limits,
+        )
+
+    def calc_auto_done(self, result):
+        """Display results of the automatic calculation."""
+        if result.apply(self):
             self.limits = (0, self.t_curve[-1])
             self.slider_reset()
             self.output_log()
@@ -115,7 +149,19 @@ class PlotTModel():
     def calc_with_limits(self, left, right):
         """Set limits on calculation."""
         self.limits = [left, right]
-        if self.calculate():
+        self.output_preview()
+        self.calc_worker.submit(
+            self.calculate,
+            self.calc_done,
+            self.pressure,
+            self.loading,
+            self.thickness_model,
+            self.limits,
+        )
+
+    def calc_done(self, result):
+        """Display results of the calculation."""
+        if result.apply(self):
             self.output_log()
             self.output_results()
             self.plot_results()
@@ -123,30 +169,36 @@ class PlotTModel():
             self.output_log()
             self.plot_clear()
 
-    def calculate(self):
+    def calculate(self, pressure, loading, thickness_model, limits):
         """Call pyGAPS to perform main calculation."""
+        result = CalcResult()
         with log_hook:
             try:
-                self.results, self.t_curve = t_plot_raw(
-                    self.loading,
-                    self.pressure,
-                    self.thickness_model,
+                results, t_curve = t_plot_raw(
+                    loading,
+                    pressure,
+                    thickness_model,
                     self.liquid_density,
                     self.molar_mass,
-                    t_limits=self.limits,
+                    t_limits=limits,
                 )
             # We catch any errors or warnings and display them to the user
             except Exception as e:
-                self.output += f'<font color="red">Calculation failed! <br> {e}</font>'
-                return False
-            self.output += log_hook.get_logs()
-            return True
+                result.output += f'<font color="red">Calculation failed! <br> {e}</font>'
+                return result
+            result.values = {"results": results, "t_curve": t_curve}
+            result.output += log_hook.get_logs()
+            return result
 
     def output_results(self):
         """Fill in any GUI text output with results"""
+        self.output_table(self.results)
+
+    def output_table(self, results):
+        """Fill in the table with the fitted sections."""
         self.view.res_table.setRowCount(0)
-        self.view.res_table.setRowCount(len(self.results))
-        for index, result in enumerate(self.results):
+        self.view.res_table.setRowCount(len(results))
+        for index, result in enumerate(results):
             self.view.res_table.setItem(
                 index, 0, QW.QTableWidgetItem(f"{result.get('adsorbed_volume'):g}")
             )
@@ -159,6 +211,23 @@ class PlotTModel():
                 index, 4, QW.QTableWidgetItem(f"{result.get('intercept'):g}")
             )
 
+    def output_preview(self):
+        """Display the fit of the selected section while it is calculated by pyGAPS."""
+        window = interval_window(self.thickness_curve, self.limits)
+        if window is None:
+            return
+        slope, intercept, corr_coef = self.regression.fit(*window)
+        # pyGAPS discards sections that are too steep
+        if numpy.isnan(slope) or slope * (max(self.thickness_curve) / max(self.loading)) >= 3:
+            return
+        self.output_table([{
+            'adsorbed_volume': intercept * self.molar_mass / self.liquid_density / 1000,
+            'area': slope * self.molar_mass / self.liquid_density,
+            'corr_coef': corr_coef,
+            'slope': slope,
+            'intercept': intercept,
+        }])
+
     def output_log(self):
         """Output text or dialog error/warning/info."""
         self.view.output.setText(self.output)
@@ -194,7 +263,12 @@ class PlotTModel():
     def select_tmodel(self):
         """Handle t-model selection."""
         tmodel_text = self.view.thickness_dropdown.currentText()
-        self.thickness_model = get_thickness_model(tmodel_text)
+        try:
+            self.thickness_model = thickness_model(tmodel_text)
+        except Exception as e:
+            error_dialog(f"Could not load the thickness model! <br> {e}")
+            return
+        self.prepare_values()
         self.calc_auto()
 
     def select_branch(self):
@@ -0,0 +1,96 @@
+"""
+Progressive calculation of smooth result curves, point by point.
+
+A curve is first solved on a coarse grid, then refined in passes which
+only add points in the intervals where it bends, so that straight
+segments do not cost any extra calculations. Solved points are kept in
+a ``PointStore``, so that repeating or extending a calculation only
+solves the points which are new.
+"""
+
+import numpy
+
+
+def point_key(x):
+    """Dictionary key of a point position, insensitive to rounding noise."""
+    return round(float(x), 10)
+
+
+class PointStore():
+    """
+    Solved points of the most recently used curves.
+
+    Each curve is a {position: value} dict, identified by a key made of
+    everything the curve depends on. Only ``size`` curves are kept.
+    """
+    def __init__(self, size=20):
+        self.size = size
+        self.curves = {}
+
+    def curve(self, key):
+        """Points of the curve identified by ``key``, created if needed."""
+        points = self.curves.pop(key, None)  # reinsert as most recently used
+        if points is None:
+            points = {}
+            if len(self.curves) >= self.size:
+                del self.curves[next(iter(self.curves))]
+        self.curves[key] = points
+        return points
+
+    def clear(self):
+        """Forget all curves."""
+        self.curves = {}
+
+
+def nearest(points, x):
+    """Value of the solved point closest to ``x``, or None."""
+    solved = [key for key, value in points.items() if numpy.all(numpy.isfinite(value))]
+    if not solved:
+        return None
+    return points[min(solved, key=lambda key: abs(key - x))]
+
+
+def refine(x, y, tolerance=0.005, resolution=1e-3):
+    """
+    Positions to solve in the next pass, most important first.
+
+    The bend at each interior point is its distance from the straight line
+    through its two neighbours, relative to the range of ``y``. Both
+    intervals around a point which bends more than ``tolerance`` are split
+    in half, unless narrower than ``resolution`` times the range of ``x``.
+
+    Parameters
+    ----------
+    x : array-like
+        Positions of the solved points, increasing.
+    y : array-like
+        Value of the curve at each position.
+    tolerance : float
+        Relative deviation from a straight line above which to refine.
+    resolution : float
+        Smallest relative interval which is split.
+
+    Returns
+    -------
+    list
+        Midpoints of the intervals to split, by decreasing bend.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    if len(x) < 3:
+        return []
+    y_span = numpy.ptp(y) or 1
+    x_span = numpy.ptp(x) or 1
+
+    chord = y[:-2] + (y[2:] - y[:-2]) * (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+    bend = numpy.abs(y[1:-1] - chord) / y_span
+
+    # bend of each interval is the largest of the points at its ends
+    interval = numpy.zeros(len(x) - 1)
+    interval[:-1] = bend
+    interval[1:] = numpy.maximum(interval[1:], bend)
+
+    split = (interval > tolerance) & (numpy.diff(x) > resolution * x_span)
+    order = numpy.argsort(-interval[split], kind="stable")
+    midpoints = ((x[:-1] + x[1:]) / 2)[split]
+    return list(midpoints[order])
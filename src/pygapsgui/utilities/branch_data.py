@@ -0,0 +1,132 @@
+"""
+Isotherm branches prepared for pore size distribution calculations.
+
+PSD methods work on a single branch in relative pressure, ordered by
+increasing pressure (so reversed for desorption), with the loading in a
+fixed basis. Preparing these arrays requires unit conversions, so they are
+built once per isotherm, branch and units, and shared. Changing the limits
+of a calculation then only selects a slice of the prepared arrays.
+
+Arrays are read-only. They are discarded when the isotherm is modified
+(see ``conversion_cache.modified``).
+"""
+
+import weakref
+
+import numpy
+from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
+
+_branches = {}  # id(isotherm) -> {key: BranchData}
+
+
+class BranchData():
+    """
+    Relative pressure and loading of an isotherm branch, by increasing pressure.
+
+    Parameters
+    ----------
+    pressure : array-like
+        Relative pressure points, increasing.
+    loading : array-like
+        Loading at each pressure point.
+    loading_factor : float
+        Conversion factor of the loading to the units of the isotherm.
+    """
+    def __init__(self, pressure, loading, loading_factor=1):
+        self.pressure = numpy.array(pressure, dtype=float)
+        self.loading = numpy.array(loading, dtype=float)
+        self.pressure.flags.writeable = False
+        self.loading.flags.writeable = False
+        self.loading_factor = loading_factor
+
+    def limit_indices(self, limits, default):
+        """
+        First and last index of the points between pressure limits.
+
+        Points are selected like in pyGAPS, with ``default`` limits
+        if none are given.
+        """
+        if limits is None:
+            limits = default
+        minimum = 0
+        maximum = len(self.pressure) - 1
+        if limits[0]:
+            minimum = int(numpy.searchsorted(self.pressure, limits[0]))
+        if limits[1]:
+            maximum = int(numpy.searchsorted(self.pressure, limits[1])) - 1
+        if maximum - minimum < 2:  # (for 3 point minimum)
+            raise CalculationError("The isotherm does not have enough points (at least 3) "
+                                   "in the selected region.")
+        return minimum, maximum
+
+    def select(self, indices):
+        """Pressure and loading between two indices (inclusive), without copies."""
+        return (
+            self.pressure[indices[0]:indices[1] + 1],
+            self.loading[indices[0]:indices[1] + 1],
+        )
+
+
+def branch_data(isotherm, branch, loading_basis, loading_unit):
+    """
+    Prepared branch of an isotherm, with the loading in the given basis and unit.
+
+    Parameters
+    ----------
+    isotherm : BaseIsotherm
+        The isotherm to get the data from.
+    branch : str
+        Either "ads" or "des".
+    loading_basis : str
+        Loading basis used by the calculation.
+    loading_unit : str
+        Loading unit used by the calculation.
+
+    Returns
+    -------
+    BranchData
+        Shared branch data, do not modify.
+    """
+    iso_id = id(isotherm)
+    key = (
+        branch,
+        version(isotherm),
+        isotherm.loading_basis,
+        isotherm.loading_unit,
+        isotherm.material_basis,
+        isotherm.material_unit,
+        loading_basis,
+        loading_unit,
+    )
+    branches = _branches.get(iso_id)
+    if branches is None:
+        branches = _branches[iso_id] = {}
+        weakref.finalize(isotherm, _branches.pop, iso_id, None)
+    data = branches.get(key)
+    if data is not None:
+        return data
+
+    loading = converted(isotherm, "loading", branch=branch, loading_basis=loading_basis, loading_unit=loading_unit)
+    if loading is None:
+        raise ParameterError("The isotherm does not have the required branch for this calculation.")
+    pressure = converted(isotherm, "pressure", branch=branch, pressure_mode="relative")
+    if branch == "des":
+        pressure = pressure[::-1]
+        loading = loading[::-1]
+
+    from pygaps.units.converter_mode import c_loading
+    loading_factor = c_loading(
+        1.0,
+        basis_from=loading_basis,
+        unit_from=loading_unit,
+        basis_to=isotherm.loading_basis,
+        unit_to=isotherm.loading_unit,
+        adsorbate=isotherm.adsorbate,
+        temp=isotherm.temperature,
+    )
+
+    data = branches[key] = BranchData(pressure, loading, loading_factor)
+    return data
@@ -0,0 +1,98 @@
+"""
+Cache of isotherm data converted to other units.
+
+Converting to relative pressure (or to a volume loading basis) can require
+a thermodynamic backend call per point, and the GUI asks for the same
+conversion many times: each graph range update and each step of a dialog.
+Converted arrays are therefore stored per isotherm, keyed by the arguments
+of the conversion.
+
+Isotherms are tracked by id, as they are not hashable, and nothing is
+stored on the isotherm itself so that exports are unaffected.
+Whenever an isotherm is modified in place (unit conversion, point edit,
+adsorbate change) call ``modified`` to drop its cached arrays.
+"""
+
+import weakref
+
+_cache = {}  # id(isotherm) -> {key: array}
+_versions = {}  # id(isotherm) -> change counter
+
+
+def _forget(iso_id):
+    """Called when an isotherm is garbage collected."""
+    _cache.pop(iso_id, None)
+    _versions.pop(iso_id, None)
+
+
+def _hashable(value):
+    """Lists (e.g. limits) cannot be part of a key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(val) for val in value)
+    return value
+
+
+def version(isotherm) -> int:
+    """Change counter of an isotherm, bumped on every modification."""
+    return _versions.get(id(isotherm), 0)
+
+
+def modified(isotherm):
+    """Mark an isotherm as modified, discarding its converted data."""
+    iso_id = id(isotherm)
+    if iso_id not in _versions:
+        weakref.finalize(isotherm, _forget, iso_id)
+    _versions[iso_id] = _versions.get(iso_id, 0) + 1
+    _cache.pop(iso_id, None)
+
+
+def converted(isotherm, data, **kwargs):
+    """
+    Return isotherm pressure or loading, using the cache if possible.
+
+    Parameters
+    ----------
+    isotherm : BaseIsotherm
+        The isotherm to get the data from.
+    data : str
+        Either "pressure" or "loading".
+    kwargs : dict
+        Arguments passed to the isotherm function (branch, units, limits...).
+
+    Returns
+    -------
+    numpy.ndarray
+        Converted data, which is read-only as it is shared.
+    """
+    iso_id = id(isotherm)
+    key = (
+        data,
+        version(isotherm),
+        isotherm.pressure_mode,
+        isotherm.pressure_unit,
+        isotherm.loading_basis,
+        isotherm.loading_unit,
+        isotherm.material_basis,
+        isotherm.material_unit,
+        tuple(sorted((name, _hashable(value)) for name, value in kwargs.items() if value is not None)),
+    )
+
+    entries = _cache.get(iso_id)
+    if entries is not None and key in entries:
+        return entries[key]
+
+    values = getattr(isotherm, data)(**kwargs)
+    try:
+        if not values.flags.owndata:
+            values = values.copy()  # unconverted data is a view of the isotherm
+        values.flags.writeable = False
+    except AttributeError:
+        return values  # not an array, do not share
+
+    if entries is None:
+        if iso_id not in _versions:
+            weakref.finalize(isotherm, _forget, iso_id)
+            _versions[iso_id] = 0
+        entries = _cache.setdefault(iso_id, {})
+    entries[key] = values
+    return values
@@ -0,0 +1,62 @@
+"""
+Reduce the number of points of a line for display.
+
+A line with many more points than pixels looks the same if only the
+minimum and maximum of each pixel column are kept. This keeps spikes and
+the overall envelope, unlike taking every n-th point.
+"""
+
+import numpy
+
+
+def minmax_indices(x, y, low=None, high=None, buckets=1000):
+    """
+    Indices of the points to display for the x-range [low, high].
+
+    The points in the range are split into ``buckets`` consecutive groups,
+    and the first and last point plus the minimum and maximum of each group
+    are kept. The points just outside the range are also kept, so that the
+    line continues to the plot edges.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        Full resolution data.
+    low, high : float, optional
+        Visible x-range, all points are considered if not given.
+    buckets : int
+        Number of groups, usually the width of the plot in pixels.
+
+    Returns
+    -------
+    numpy.ndarray
+        Sorted indices of the points to keep.
+    """
+    visible = numpy.ones(len(x), dtype=bool)
+    if low is not None:
+        visible &= x >= low
+    if high is not None:
+        visible &= x <= high
+    indices = numpy.flatnonzero(visible)
+    if len(indices) == 0:
+        return indices
+
+    # neighbours outside the view
+    first = max(indices[0] - 1, 0)
+    last = min(indices[-1] + 1, len(x) - 1)
+
+    if len(indices) <= 4 * buckets:
+        return numpy.unique(numpy.concatenate(([first], indices, [last])))
+
+    size = len(indices) // buckets
+    trimmed = indices[:size * buckets].reshape(buckets, size)
+    values = y[trimmed]
+    missing = numpy.isnan(values)
+    rows = numpy.arange(buckets)
+    minima = trimmed[rows, numpy.where(missing, numpy.inf, values).argmin(axis=1)]
+    maxima = trimmed[rows, numpy.where(missing, -numpy.inf, values).argmax(axis=1)]
+    remainder = indices[size * buckets:]
+
+    return numpy.unique(
+        numpy.concatenate(([first, indices[0]], minima, maxima, remainder, [indices[-1], last]))
+    )
@@ -0,0 +1,79 @@
+"""
+Bootstrap confidence bands for the isosteric enthalpy.
+
+Each resample draws the isotherms (temperatures) with replacement, so that
+whole temperatures are left out, and draws the points of each drawn
+isotherm with replacement. The enthalpy curve of the resample is then
+calculated at the same loading points as the main result. Percentiles
+of many resampled curves give the confidence band at each loading.
+"""
+
+import numpy
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.isosteric_cache import clausius_clapeyron
+
+
+def bootstrap_points(isotherms, branch):
+    """
+    Points of each isotherm branch sorted by loading, as used by the resamples.
+
+    The loading is in the units of the first isotherm, as in pyGAPS.
+    """
+    load_args = {
+        'branch': branch,
+        'loading_unit': isotherms[0].loading_unit,
+        'material_unit': isotherms[0].material_unit,
+    }
+    points = []
+    for iso in isotherms:
+        loading = numpy.asarray(converted(iso, "loading", **load_args), dtype=float)
+        pressure = numpy.asarray(converted(iso, "pressure", branch=branch), dtype=float)
+        order = numpy.argsort(loading, kind="stable")
+        points.append((loading[order], pressure[order]))
+    return points
+
+
+def bootstrap_enthalpy(points, temperatures, loading, replicates, seed):
+    """
+    Worker entrypoint: isosteric enthalpy curves of bootstrap resamples.
+
+    Parameters
+    ----------
+    points : list
+        (loading, pressure) of each isotherm, sorted by loading.
+    temperatures : array-like
+        Temperature of each isotherm, K.
+    loading : numpy.ndarray
+        Loading points of the curves.
+    replicates : int
+        Number of resamples.
+    seed : numpy.random.SeedSequence
+        Independent seed of this block of resamples.
+
+    Returns
+    -------
+    numpy.ndarray
+        Enthalpy of each resample (rows) at each loading point, NaN where
+        a resampled isotherm does not cover the loading, or where fewer
+        than two temperatures were drawn.
+    """
+    rng = numpy.random.default_rng(seed)
+    temperatures = numpy.asarray(temperatures, dtype=float)
+    niso = len(points)
+    curves = numpy.full((replicates, len(loading)), numpy.nan)
+    pressures = numpy.empty((len(loading), niso))
+
+    with numpy.errstate(all="ignore"):
+        for rep in range(replicates):
+            drawn = rng.integers(niso, size=niso)
+            if len(numpy.unique(temperatures[drawn])) < 2:
+                continue
+            for col, iso in enumerate(drawn):
+                iso_loading, iso_pressure = points[iso]
+                # sorted indices keep the points sorted by loading
+                idx = numpy.sort(rng.integers(len(iso_loading), size=len(iso_loading)))
+                pressures[:, col] = numpy.interp(
+                    loading, iso_loading[idx], iso_pressure[idx], left=numpy.nan, right=numpy.nan
+                )
+            curves[rep] = clausius_clapeyron(pressures, temperatures[drawn])[0]
+    return curves
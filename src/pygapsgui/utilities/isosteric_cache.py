@@ -0,0 +1,207 @@
+"""
+Isosteric enthalpy from cached inverse isotherms.
+
+pyGAPS ``isosteric_enthalpy`` finds the pressure of every isotherm at each
+loading point (inverting the isotherm), then fits a Clausius-Clapeyron line
+through the points at each loading, one at a time. Here the inverse of each
+isotherm is prepared once per branch and units, and kept:
+
+* a PointIsotherm is inverted by linear interpolation of its sorted points,
+* a ModelIsotherm is solved numerically, so solved points are remembered
+  and only new loading points are solved.
+
+The regression is then done for all loading points at once. Inverses are
+discarded when the isotherm is modified (see ``conversion_cache.modified``).
+"""
+
+import weakref
+
+import numpy
+from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.adaptive_curve import point_key
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
+
+_inverses = {}  # id(isotherm) -> {key: inverse}
+
+
+class PointInverse():
+    """
+    Pressure at loading of a PointIsotherm branch, linearly interpolated.
+
+    Like pyGAPS, refuses to extrapolate outside the measured loadings.
+    """
+    def __init__(self, loading, pressure):
+        order = numpy.argsort(loading, kind="stable")
+        self.loading = numpy.asarray(loading, dtype=float)[order]
+        self.pressure = numpy.asarray(pressure, dtype=float)[order]
+
+    def pressure_at(self, loading):
+        """Pressure at one or more loadings."""
+        loading = numpy.asarray(loading, dtype=float)
+        if numpy.any(loading < self.loading[0]) or numpy.any(loading > self.loading[-1]):
+            raise CalculationError("A loading point is outside the loading range of an isotherm.")
+        return numpy.interp(loading, self.loading, self.pressure)
+
+
+class ModelInverse():
+    """
+    Pressure at loading of a ModelIsotherm, with solved points remembered.
+
+    Up to ``size`` points are kept, then they are all forgotten.
+    """
+    size = 10000
+
+    def __init__(self, isotherm, **load_args):
+        self.isotherm = isotherm
+        self.load_args = load_args
+        self.points = {}
+
+    def pressure_at(self, loading):
+        """Pressure at one or more loadings, only solving new points."""
+        loading = numpy.asarray(loading, dtype=float)
+        keys = [point_key(x) for x in loading.ravel()]
+        new = sorted({key for key in keys if key not in self.points})
+        if new:
+            if len(self.points) + len(new) > self.size:
+                self.points = {}
+                new = sorted(set(keys))
+            solved = numpy.atleast_1d(self.isotherm.pressure_at(numpy.array(new), **self.load_args))
+            self.points.update(zip(new, solved))
+        return numpy.array([self.points[key] for key in keys]).reshape(loading.shape)
+
+
+def inverse_isotherm(isotherm, branch, loading_unit, material_unit):
+    """
+    Inverse (pressure at loading) of an isotherm branch.
+
+    The loading is given in ``loading_unit`` and ``material_unit``, and the
+    pressure is returned in the units of the isotherm, as in pyGAPS.
+    """
+    iso_id = id(isotherm)
+    key = (
+        branch,
+        version(isotherm),
+        isotherm.pressure_mode,
+        isotherm.pressure_unit,
+        isotherm.loading_basis,
+        isotherm.loading_unit,
+        isotherm.material_basis,
+        isotherm.material_unit,
+        loading_unit,
+        material_unit,
+    )
+    inverses = _inverses.get(iso_id)
+    if inverses is None:
+        inverses = _inverses[iso_id] = {}
+        weakref.finalize(isotherm, _inverses.pop, iso_id, None)
+    inverse = inverses.get(key)
+    if inverse is not None:
+        return inverse
+
+    from pygaps import PointIsotherm
+    load_args = {"branch": branch, "loading_unit": loading_unit, "material_unit": material_unit}
+    if isinstance(isotherm, PointIsotherm):
+        inverse = PointInverse(
+            converted(isotherm, "loading", **load_args),
+            converted(isotherm, "pressure", branch=branch),
+        )
+    else:
+        inverse = ModelInverse(isotherm, **load_args)
+    inverses[key] = inverse
+    return inverse
+
+
+def check_isotherms(isotherms):
+    """The same checks as pyGAPS ``isosteric_enthalpy``."""
+    if len(isotherms) < 2:
+        raise ParameterError('Pass at least two isotherms.')
+    if not all(x.material == isotherms[0].material for x in isotherms):
+        raise ParameterError('Isotherms passed are not measured on the same material.')
+    if len(set(x.loading_basis for x in isotherms)) > 1:
+        raise ParameterError('Isotherm passed are in a different loading basis.')
+    if len(set(x.material_basis for x in isotherms)) > 1:
+        raise ParameterError('Isotherm passed are in a different material basis.')
+
+
+def loading_range(isotherms, branch):
+    """Loading range common to all isotherms, as chosen by pyGAPS."""
+    load_args = {
+        'branch': branch,
+        'loading_unit': isotherms[0].loading_unit,
+        'material_unit': isotherms[0].material_unit,
+    }
+    loadings = [converted(x, "loading", **load_args) for x in isotherms]
+    return 1.01 * max(min(x) for x in loadings), 0.99 * min(max(x) for x in loadings)
+
+
+def clausius_clapeyron(pressures, temperatures):
+    """
+    Vectorised ``isosteric_enthalpy_raw``: a line of log(p) against 1/T for each loading.
+
+    Parameters
+    ----------
+    pressures : numpy.ndarray
+        Pressure of each isotherm (columns) at each loading point (rows).
+    temperatures : array-like
+        Temperature of each isotherm, K.
+
+    Returns
+    -------
+    iso_enth, slopes, correlations, std_errs : numpy.ndarray
+        As returned by pyGAPS, for each loading point.
+    """
+    from scipy import constants
+
+    inv_t = 1 / numpy.asarray(temperatures, dtype=float)
+    log_p = numpy.log(pressures)
+    n = len(inv_t)
+
+    x = inv_t - inv_t.mean()
+    y = log_p - log_p.mean(axis=1, keepdims=True)
+    ssxm = numpy.sum(x**2)
+    ssym = numpy.sum(y**2, axis=1)
+    ssxym = y @ x
+
+    slopes = ssxym / ssxm
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        correlations = numpy.clip(ssxym / numpy.sqrt(ssxm * ssym), -1, 1)
+    if n > 2:
+        std_errs = numpy.sqrt((1 - correlations**2) * ssym / ssxm / (n - 2))
+    else:
+        std_errs = numpy.zeros_like(slopes)  # as scipy linregress for two points
+
+    return (
+        -constants.gas_constant * slopes / 1000,
+        slopes,
+        correlations,
+        constants.gas_constant * std_errs / 1000,
+    )
+
+
+def isosteric_enthalpy_at(isotherms, loading, branch="ads"):
+    """
+    Isosteric enthalpy at the loading points, as pyGAPS ``isosteric_enthalpy``.
+
+    Returns
+    -------
+    dict
+        With the same keys as the pyGAPS results.
+    """
+    check_isotherms(isotherms)
+    loading = numpy.asarray(loading, dtype=float)
+    pressures = numpy.column_stack([
+        inverse_isotherm(iso, branch, isotherms[0].loading_unit, isotherms[0].material_unit).pressure_at(loading)
+        for iso in isotherms
+    ])
+    iso_enthalpy, slopes, correlation, std_errs = clausius_clapeyron(
+        pressures, [iso.temperature for iso in isotherms]
+    )
+    return {
+        'loading': loading,
+        'isosteric_enthalpy': iso_enthalpy,
+        'slopes': slopes,
+        'correlation': correlation,
+        'std_errs': std_errs,
+    }
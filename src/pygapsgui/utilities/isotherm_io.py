@@ -0,0 +1,78 @@
+"""
+Isotherm parsing functions which can run outside the GUI thread.
+"""
+
+import pathlib
+from functools import partial
+
+# Extensions which can be opened directly (not imported)
+LOAD_EXTENSIONS = ('.csv', '.json', '.xls', '.aif')
+
+
+def _parse_file(path, ext):
+    """Use pygaps parsing to load an isotherm from a file."""
+    import pygaps.parsing as pgp
+    if ext == '.csv':
+        return pgp.isotherm_from_csv(path)
+    if ext == '.json':
+        return pgp.isotherm_from_json(path)
+    if ext == '.xls':
+        return pgp.isotherm_from_xl(path)
+    if ext == '.aif':
+        return pgp.isotherm_from_aif(path)
+    raise Exception(f"Unknown isotherm type '{ext}'.")
+
+
+def isotherm_from_file(path, ext=None, cache=True):
+    """Load an isotherm from a file, going through the parse cache if requested."""
+    path = pathlib.Path(path)
+    if ext is None:
+        ext = path.suffix
+    ext = ext.lower()
+    if ext not in LOAD_EXTENSIONS:
+        raise Exception(f"Unknown isotherm type '{ext}'.")
+    if not cache:
+        return _parse_file(path, ext)
+
+    from pygapsgui.utilities.parse_cache import cached_parse
+    return cached_parse(path, f"load{ext}", partial(_parse_file, path, ext))
+
+
+def isotherm_from_import(path, settings, cache=True):
+    """Import an isotherm from a manufacturer file, going through the parse cache if requested."""
+    import pygaps.parsing as pgp
+    parse = partial(pgp.isotherm_from_commercial, path=path, **settings)
+    if not cache:
+        return parse()
+
+    import json
+
+    from pygapsgui.utilities.parse_cache import cached_parse
+    return cached_parse(path, f"import{json.dumps(settings, sort_keys=True, default=str)}", parse)
+
+
+def _to_json(isotherm):
+    """
+    Isotherm in the pyGAPS JSON format, to be sent back from a worker.
+
+    Isotherm objects cannot be pickled once their adsorbate has a thermodynamic
+    backend, which adsorbates shared by the jobs of a worker may have.
+    """
+    from pygaps.parsing import isotherm_to_json
+    return isotherm_to_json(isotherm) if isotherm else None
+
+
+def load_job(path, name, ext):
+    """Worker entrypoint: load one file and return a (name, isotherm JSON, error) tuple."""
+    try:
+        return name, _to_json(isotherm_from_file(path, ext)), None
+    except Exception as exc:
+        return name, None, f"{pathlib.Path(path).name}: {exc}"
+
+
+def import_job(path, name, settings):
+    """Worker entrypoint: import one file and return a (name, isotherm JSON, error) tuple."""
+    try:
+        return name, _to_json(isotherm_from_import(path, settings)), None
+    except Exception as exc:
+        return name, None, f"{pathlib.Path(path).name}: {exc}"
@@ -0,0 +1,398 @@
+"""
+On-disk store of DFT kernels, and their projection onto isotherms.
+
+pyGAPS reads kernels from .csv files and, for every PSD calculation,
+interpolates each pore size isotherm of the kernel on the pressure points
+of the isotherm. Here, kernels are converted once to a binary matrix which
+is memory-mapped when first needed in a session. The kernel interpolated
+on the points of an isotherm branch (its "projection") is also kept, so
+that changing the pressure limits only solves the non-negative least
+squares fit on a block of rows.
+
+Each kernel is stored as a single ``.npy`` matrix laid out like the
+original .csv: pore widths on the first row, relative pressures in the
+first column. Kernels registered by the user are kept in the same store,
+and are available in every following session.
+"""
+
+import os
+import pathlib
+import sys
+import weakref
+
+import numpy
+from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
+
+# Units of all kernel isotherms
+KERNEL_UNITS = {
+    "pressure_mode": "relative",
+    "loading_basis": "molar",
+    "loading_unit": "mmol",
+    "material_basis": "mass",
+    "material_unit": "g",
+}
+
+_LOADED = {}  # name -> Kernel, for this session
+_PROJECTIONS = {}  # id(isotherm) -> {key: KernelProjection}
+
+
+def kernel_dir() -> pathlib.Path:
+    """Location of the kernel store, next to the other application data."""
+    override = os.environ.get("PYGAPSGUI_KERNEL_DIR")
+    if override:
+        return pathlib.Path(override)
+    if sys.platform == "win32":
+        base = pathlib.Path(os.environ.get("APPDATA", pathlib.Path.home() / "AppData/Roaming"))
+    elif sys.platform == "darwin":
+        base = pathlib.Path.home() / "Library" / "Application Support"
+    else:
+        base = pathlib.Path(os.environ.get("XDG_DATA_HOME", pathlib.Path.home() / ".local" / "share"))
+    return base / "pyGAPS" / "pyGAPS-gui" / "kernels"
+
+
+def _store_path(name: str) -> pathlib.Path:
+    return kernel_dir() / f"{name}.npy"
+
+
+def _convert_csv(path, target: pathlib.Path):
+    """Read a pyGAPS kernel .csv and save it as a binary matrix."""
+    import pandas
+    raw_kernel = pandas.read_csv(path, index_col=0)
+    widths = numpy.asarray(raw_kernel.columns, dtype=float)
+    pressure = numpy.asarray(raw_kernel.index, dtype=float)
+    values = raw_kernel.to_numpy(dtype=float)
+
+    # as pyGAPS, add a zero loading at zero pressure for interpolation
+    if 0 not in pressure:
+        pressure = numpy.concatenate([[0], pressure])
+        values = numpy.concatenate([numpy.zeros((1, len(widths))), values])
+    order = numpy.argsort(pressure, kind="stable")
+
+    matrix = numpy.full((len(pressure) + 1, len(widths) + 1), numpy.nan)
+    matrix[0, 1:] = widths
+    matrix[1:, 0] = pressure[order]
+    matrix[1:, 1:] = values[order]
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.stem}.{os.getpid()}.tmp.npy")
+    numpy.save(temp, matrix)
+    os.replace(temp, target)
+
+
+class Kernel():
+    """
+    A DFT kernel, memory-mapped from the store.
+
+    Attributes
+    ----------
+    pressure : numpy.ndarray
+        Relative pressure points of the kernel isotherms.
+    pore_widths : numpy.ndarray
+        Pore width of each kernel isotherm.
+    loading : numpy.ndarray
+        Loading of each isotherm (columns) at each pressure (rows).
+    """
+    def __init__(self, path):
+        matrix = numpy.load(path, mmap_mode="r")
+        self.pore_widths = numpy.asarray(matrix[0, 1:])
+        self.pressure = numpy.asarray(matrix[1:, 0])
+        self.loading = matrix[1:, 1:]
+
+    def project(self, pressure):
+        """
+        Interpolate all kernel isotherms on the given pressures.
+
+        Cubic interpolation, as in pyGAPS. Pressures outside of the range
+        of the kernel are NaN.
+        """
+        from scipy import interpolate
+        interpolator = interpolate.interp1d(
+            self.pressure,
+            self.loading,
+            kind="cubic",
+            axis=0,
+            bounds_error=False,
+            fill_value=numpy.nan,
+            assume_sorted=True,
+        )
+        return interpolator(pressure)
+
+
+def kernel_names():
+    """Kernels included in pyGAPS, followed by those registered by the user."""
+    from pygaps.data import KERNELS
+    names = list(KERNELS)
+    try:
+        names += sorted(path.stem for path in kernel_dir().glob("*.npy") if path.stem not in KERNELS)
+    except OSError:
+        pass
+    return names
+
+
+def register_kernel(path, name: str = None) -> str:
+    """
+    Add a kernel .csv to the store, replacing any kernel with the same name.
+
+    The file must have the same layout as the kernels in pyGAPS: pore widths
+    as column headers, relative pressure as index and loadings in mmol/g.
+    Returns the name of the kernel, by default the name of the file.
+    """
+    path = pathlib.Path(path)
+    name = name or path.stem
+    try:
+        _convert_csv(path, _store_path(name))
+    except (OSError, ValueError) as err:
+        raise ParameterError(f"Could not read kernel from {path}: {err}") from err
+    _LOADED.pop(name, None)
+    for projections in _PROJECTIONS.values():
+        for key in [key for key in projections if key[0] == name]:
+            del projections[key]
+    return name
+
+
+def load_kernel(name: str) -> Kernel:
+    """Load a kernel by name, converting pyGAPS kernels to the store if needed."""
+    kernel = _LOADED.get(name)
+    if kernel is not None:
+        return kernel
+
+    from pygaps.data import KERNELS
+    target = _store_path(name)
+    source = KERNELS.get(name)
+    try:
+        if source is not None and (
+            not target.exists() or target.stat().st_mtime < pathlib.Path(source).stat().st_mtime
+        ):
+            _convert_csv(source, target)
+        kernel = Kernel(target)
+    except FileNotFoundError as err:
+        raise ParameterError(f"Kernel {name} is not available.") from err
+    except OSError:
+        # read-only store: convert in a temporary location instead
+        if source is None:
+            raise
+        import tempfile
+        temp = pathlib.Path(tempfile.mkdtemp()) / target.name
+        _convert_csv(source, temp)
+        kernel = Kernel(temp)
+
+    _LOADED[name] = kernel
+    return kernel
+
+
+class KernelProjection():
+    """
+    A kernel interpolated on the points of an isotherm branch.
+
+    Attributes
+    ----------
+    pressure, loading : numpy.ndarray
+        Isotherm points in kernel units, in the order used by pyGAPS.
+    matrix : numpy.ndarray
+        Kernel loading of each pore width (columns) at each point (rows).
+    pore_widths : numpy.ndarray
+        Pore widths of the kernel.
+    """
+    def __init__(self, kernel, pressure, loading):
+        self.pressure = pressure
+        self.loading = loading
+        self.pore_widths = kernel.pore_widths
+        self.matrix = kernel.project(pressure)
+
+    def limit_indices(self, p_limits=None):
+        """First and last point inside the pressure limits, as in pyGAPS."""
+        minimum, maximum = 0, len(self.pressure) - 1
+        if p_limits is None:
+            p_limits = (None, None)
+        if p_limits[0]:
+            minimum = numpy.searchsorted(self.pressure, p_limits[0])
+        if p_limits[1]:
+            maximum = numpy.searchsorted(self.pressure, p_limits[1]) - 1
+        if maximum - minimum < 2:  # (for 3 point minimum)
+            raise CalculationError(
+                "The isotherm does not have enough points (at least 3) "
+                "in the selected region."
+            )
+        return minimum, maximum
+
+    def block(self, p_limits=None):
+        """Limit indices, kernel rows and isotherm loading between the pressure limits."""
+        minimum, maximum = self.limit_indices(p_limits)
+        block = self.matrix[minimum:maximum + 1]
+        if not numpy.all(numpy.isfinite(block)):
+            raise CalculationError(
+                "Could not get kernel values at isotherm points. "
+                "Does your kernel pressure range apply to this isotherm?"
+            )
+        return (minimum, maximum), block, self.loading[minimum:maximum + 1]
+
+    def fit(self, p_limits=None, bspline_order=2, regularisation=0):
+        """
+        Fit the kernel on the points between the pressure limits.
+
+        Equivalent to ``pygaps.characterisation.psd_kernel.psd_dft``: the
+        contribution of each pore width is found by non-negative least squares.
+        With a ``regularisation`` strength (relative to the largest singular
+        value of the kernel block), the norm of the contributions is also
+        minimised (Tikhonov regularisation), which smooths the distribution.
+
+        Parameters
+        ----------
+        p_limits : tuple, optional
+            Pressure limits of the fitted points.
+        bspline_order : int
+            Order of the B-spline smoothing of the distribution.
+        regularisation : float
+            Relative regularisation strength, 0 for none.
+
+        Returns
+        -------
+        dict
+            Pore widths, distribution and cumulative pore volume, the
+            loading of the fitted kernel and the indices of the limits.
+
+        Notes
+        -----
+        A kernel is a collection of ideal isotherms, calculated (e.g. with
+        DFT) on a material comprised solely of pores of a single width, for
+        a range of pore widths. The experimental isotherm is modelled as a
+        combination of these ideal isotherms: the kernel is interpolated at
+        the pressure of each point, and the non-negative contribution of each
+        pore width which best reproduces the measured loading is found by
+        least squares. The contributions and their pore widths form the pore
+        size distribution, which is then smoothed with a B-spline.
+
+        As many pore widths can reproduce the same isotherm, the least squares
+        solution is often spiky. Tikhonov regularisation also minimises the
+        norm of the contributions, weighted by the regularisation strength,
+        which gives smoother distributions at the cost of a larger residual.
+        The strength can be chosen at the corner of the L-curve (see
+        ``l_curve``), where the residual and solution norms are balanced.
+
+        *Limitations*
+
+        The accuracy of the distribution is only as good as the kernel, which
+        should be tailored to the adsorbate, adsorbent and experimental
+        conditions used. The isotherm should have enough points, over a
+        pressure range covering adsorption in all the pores.
+        """
+        from pygaps.utilities.math_utilities import bspline
+        from scipy import optimize
+
+        limits, block, loading = self.block(p_limits)
+        if regularisation:
+            strength = regularisation * numpy.linalg.norm(block, 2)
+            contribution, _ = optimize.nnls(
+                numpy.vstack([block, strength * numpy.eye(block.shape[1])]),
+                numpy.concatenate([loading, numpy.zeros(block.shape[1])]),
+            )
+        else:
+            contribution, _ = optimize.nnls(block, loading)
+
+        pore_widths = self.pore_widths
+        pore_dist = contribution / numpy.ediff1d(pore_widths, to_begin=pore_widths[0])
+        pore_widths, pore_dist = bspline(pore_widths, pore_dist, degree=bspline_order)
+        dpore_widths = numpy.ediff1d(pore_widths, to_begin=pore_widths[0])
+
+        return {
+            'pore_widths': pore_widths,
+            'pore_distribution': pore_dist,
+            'pore_volume_cumulative': numpy.cumsum(pore_dist * dpore_widths),
+            'kernel_loading': block @ contribution,
+            'limits': limits,
+        }
+
+    def l_curve(self, p_limits=None, strengths=None):
+        """
+        Residual and solution norms over a range of regularisation strengths.
+
+        The kernel block is decomposed once (SVD), after which the Tikhonov
+        solution for every strength is a rescaling of the same singular
+        components, so that the whole sweep costs about as much as one fit.
+        Non-negativity is not enforced here, only in ``fit``.
+
+        Parameters
+        ----------
+        p_limits : tuple, optional
+            Pressure limits of the fitted points.
+        strengths : array-like, optional
+            Regularisation strengths relative to the largest singular value,
+            by default 50 points between 1e-6 and 1.
+
+        Returns
+        -------
+        dict
+            Strengths, residual and solution norms, and the index of the
+            corner of the L-curve (the point of highest curvature).
+        """
+        if strengths is None:
+            strengths = numpy.logspace(-6, 0, 50)
+        strengths = numpy.asarray(strengths, dtype=float)
+
+        _, block, loading = self.block(p_limits)
+        u, sing, _ = numpy.linalg.svd(block, full_matrices=False)
+        beta = u.T @ loading
+        outside = max(numpy.sum(loading**2) - numpy.sum(beta**2), 0)  # not reachable by any solution
+
+        lam2 = (strengths * sing[0])[:, numpy.newaxis]**2
+        solution_norm = numpy.linalg.norm(sing * beta / (sing**2 + lam2), axis=1)
+        residual_norm = numpy.sqrt(numpy.sum((lam2 * beta / (sing**2 + lam2))**2, axis=1) + outside)
+
+        return {
+            'strengths': strengths,
+            'residual_norm': residual_norm,
+            'solution_norm': solution_norm,
+            'corner': l_curve_corner(strengths, residual_norm, solution_norm),
+        }
+
+
+def l_curve_corner(strengths, residual_norm, solution_norm):
+    """Index of the point of maximum curvature of the L-curve, in log-log space."""
+    if len(strengths) < 3:
+        return 0
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = numpy.log(strengths)
+        rho = numpy.log(residual_norm)
+        eta = numpy.log(solution_norm)
+        drho, deta = numpy.gradient(rho, t), numpy.gradient(eta, t)
+        ddrho, ddeta = numpy.gradient(drho, t), numpy.gradient(deta, t)
+        curvature = (drho * ddeta - ddrho * deta) / (drho**2 + deta**2)**1.5
+    curvature[~numpy.isfinite(curvature)] = -numpy.inf
+    return int(numpy.argmax(curvature[1:-1]) + 1)
+
+
+def kernel_projection(isotherm, name: str, branch: str = "ads") -> KernelProjection:
+    """Projection of a kernel on an isotherm branch, kept until the isotherm changes."""
+    iso_id = id(isotherm)
+    key = (name, branch, version(isotherm))
+    projections = _PROJECTIONS.get(iso_id)
+    if projections is None:
+        projections = _PROJECTIONS[iso_id] = {}
+        weakref.finalize(isotherm, _PROJECTIONS.pop, iso_id, None)
+    projection = projections.get(key)
+    if projection is None:
+        kernel = load_kernel(name)
+        pressure = converted(
+            isotherm,
+            "pressure",
+            branch=branch,
+            pressure_mode=KERNEL_UNITS["pressure_mode"],
+        )
+        loading = converted(
+            isotherm,
+            "loading",
+            branch=branch,
+            loading_basis=KERNEL_UNITS["loading_basis"],
+            loading_unit=KERNEL_UNITS["loading_unit"],
+            material_basis=KERNEL_UNITS["material_basis"],
+            material_unit=KERNEL_UNITS["material_unit"],
+        )
+        if loading is None:
+            raise ParameterError("The isotherm does not have the required branch for this calculation.")
+        if branch == "des":
+            pressure, loading = pressure[::-1], loading[::-1]
+        projection = projections[key] = KernelProjection(kernel, pressure, loading)
+    return projection
@@ -0,0 +1,166 @@
+"""
+Linear regression over every contiguous window of a dataset.
+
+Cumulative sums of x, y, x^2, xy and y^2 give the least squares statistics
+of any window of points in constant time. All windows of an n-point dataset
+are therefore fitted in O(n^2) vectorised operations, instead of
+one regression per window.
+
+The dialogs fitting a line through a window of transformed points (BET,
+Langmuir, t-plot, alpha-s, DR/DA) prepare a ``WindowRegression`` with their
+data, and use it to display the fit of the window under the slider at once,
+before the full pyGAPS calculation is finished.
+"""
+
+import numpy
+
+
+def _prefix(values):
+    """Cumulative sum with a leading zero, so that window sums are differences."""
+    values = numpy.asarray(values, dtype=float)
+    zeros = numpy.zeros(values.shape[:-1] + (1, ))
+    return numpy.concatenate((zeros, numpy.cumsum(values, axis=-1)), axis=-1)
+
+
+class WindowRegression():
+    """
+    Least squares line fits of all windows [start, end] of (x, y).
+
+    Windows are given by the indices of their first and last point (inclusive).
+    Data is centered before summation to limit cancellation errors.
+    Windows containing non-finite points (e.g. the log of a zero loading)
+    are NaN, without affecting the other windows.
+
+    Several datasets with the same number of points can be fitted together,
+    by giving x and y leading dimensions (they are broadcast). The results
+    then have the leading dimensions followed by those of the windows.
+
+    Parameters
+    ----------
+    x : array-like
+        Independent variable, points along the last axis.
+    y : array-like
+        Dependent variable, points along the last axis.
+    min_points : int
+        Windows with fewer points are not fitted.
+    """
+
+    def __init__(self, x, y, min_points=3):
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        if x.shape[-1] != y.shape[-1]:
+            raise ValueError("The length of the x and y arrays do not match.")
+        x, y = numpy.broadcast_arrays(x, y)
+
+        self.size = x.shape[-1]
+        self.min_points = min_points
+        invalid = ~(numpy.isfinite(x) & numpy.isfinite(y))
+        self.s_invalid = _prefix(invalid)
+        valid = numpy.maximum(numpy.sum(~invalid, axis=-1, keepdims=True), 1)
+        x_shift = numpy.sum(numpy.where(invalid, 0, x), axis=-1, keepdims=True) / valid
+        y_shift = numpy.sum(numpy.where(invalid, 0, y), axis=-1, keepdims=True) / valid
+        self.x_shift = x_shift[..., 0]
+        self.y_shift = y_shift[..., 0]
+
+        xc = numpy.where(invalid, 0, x - x_shift)
+        yc = numpy.where(invalid, 0, y - y_shift)
+        self.s_x = _prefix(xc)
+        self.s_y = _prefix(yc)
+        self.s_xx = _prefix(xc * xc)
+        self.s_xy = _prefix(xc * yc)
+        self.s_yy = _prefix(yc * yc)
+
+    def grid(self):
+        """Start and end indices of all windows, as broadcastable (n, 1) and (1, n) arrays."""
+        indices = numpy.arange(self.size)
+        return indices[:, None], indices[None, :]
+
+    def fit(self, start=None, end=None):
+        """
+        Fit the windows between ``start`` and ``end`` (inclusive).
+
+        Indices can be integers or arrays which broadcast together.
+        If not given, all windows are fitted and (n, n) arrays are returned,
+        indexed by [start, end]. Windows which are too short, or reversed,
+        are NaN.
+
+        Returns
+        -------
+        slope, intercept, corr_coef : numpy.ndarray
+            Regression results, the correlation coefficient being Pearson's r.
+        """
+        if start is None or end is None:
+            start, end = self.grid()
+        start = numpy.asarray(start)
+        end = numpy.asarray(end) + 1
+        # align the shifts of each dataset with the window dimensions
+        expand = (..., ) + (None, ) * numpy.broadcast(start, end).ndim
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            npts = end - start
+            invalid = self.s_invalid[..., end] - self.s_invalid[..., start] > 0
+            npts = numpy.where((npts < self.min_points) | invalid, numpy.nan, npts)
+
+            s_x = self.s_x[..., end] - self.s_x[..., start]
+            s_y = self.s_y[..., end] - self.s_y[..., start]
+            var_x = npts * (self.s_xx[..., end] - self.s_xx[..., start]) - s_x**2
+            var_y = npts * (self.s_yy[..., end] - self.s_yy[..., start]) - s_y**2
+            cov_xy = npts * (self.s_xy[..., end] - self.s_xy[..., start]) - s_x * s_y
+
+            slope = cov_xy / var_x
+            intercept = (s_y - slope * s_x) / npts + self.y_shift[expand] - slope * self.x_shift[expand]
+            corr_coef = cov_xy / numpy.sqrt(var_x * var_y)
+
+        return slope, intercept, corr_coef
+
+    def points(self, start=None, end=None):
+        """Number of points in each window, NaN if the window is not fitted."""
+        if start is None or end is None:
+            start, end = self.grid()
+        start = numpy.asarray(start)
+        end = numpy.asarray(end) + 1
+        npts = end - start
+        invalid = self.s_invalid[..., end] - self.s_invalid[..., start] > 0
+        return numpy.where((npts < self.min_points) | invalid, numpy.nan, npts)
+
+
+def window_increasing(values):
+    """
+    Whether ``values`` are strictly increasing inside every window [start, end].
+
+    Returns an (n, n) boolean array indexed by [start, end].
+    """
+    values = numpy.asarray(values, dtype=float)
+    breaks = _prefix(numpy.diff(values) <= 0)
+    return breaks[None, :] - breaks[:, None] == 0
+
+
+def limit_window(pressure, limits):
+    """
+    First and last index of the points selected by pressure limits, as in pyGAPS.
+
+    The lower limit is inclusive and the upper limit exclusive, a missing
+    limit selecting up to the end of the data.
+    """
+    minimum = 0
+    maximum = len(pressure) - 1
+    if limits[0]:
+        minimum = int(numpy.searchsorted(pressure, limits[0]))
+    if limits[1]:
+        maximum = int(numpy.searchsorted(pressure, limits[1])) - 1
+    return minimum, maximum
+
+
+def interval_window(values, limits):
+    """
+    First and last index of the points strictly between two values, as in pyGAPS.
+
+    Only contiguous selections can be fitted as a window, so None is
+    returned unless ``values`` are increasing.
+    """
+    values = numpy.asarray(values, dtype=float)
+    if numpy.any(numpy.diff(values) < 0):
+        return None
+    first = int(numpy.searchsorted(values, limits[0], side="right"))
+    last = int(numpy.searchsorted(values, limits[1], side="left")) - 1
+    return first, last
@@ -0,0 +1,175 @@
+"""
+Mesoporous PSD calculated for many combinations of methods and models.
+
+The thickness and Kelvin radius curves only depend on their own model, so
+they are evaluated once on the isotherm points and shared by every
+combination, instead of being recomputed by each pyGAPS call.
+"""
+
+import numpy
+
+
+class CurveLookup():
+    """
+    Stand-in for a thickness or Kelvin model, returning precomputed values.
+
+    The pyGAPS PSD methods only evaluate the models on the isotherm points
+    (sometimes in reverse order), so values are looked up by pressure.
+    """
+    def __init__(self, pressure, values):
+        order = numpy.argsort(pressure)
+        self.pressure = numpy.asarray(pressure)[order]
+        self.values = numpy.asarray(values)[order]
+
+    def __call__(self, pressure):
+        return numpy.interp(pressure, self.pressure, self.values)
+
+
+def model_curves(pressure, branch, pore_geometries, meniscus_geometries, thickness_models, kelvin_models, kelvin_args):
+    """
+    Evaluate every thickness and Kelvin model once on the isotherm points.
+
+    Returns
+    -------
+    thickness : dict
+        Thickness model name -> thickness at each point.
+    kelvin : dict
+        (Kelvin model name, meniscus geometry) -> Kelvin radius at each point.
+    errors : list
+        (model, message) of each model which could not be evaluated.
+    """
+    from pygaps.characterisation.models_kelvin import get_kelvin_model
+    from pygaps.characterisation.models_kelvin import get_meniscus_geometry
+    from pygaps.characterisation.models_thickness import get_thickness_model
+
+    thickness, kelvin, errors = {}, {}, []
+    for model in thickness_models:
+        try:
+            thickness[model] = numpy.asarray(get_thickness_model(model)(pressure))
+        except Exception as err:
+            errors.append((model, str(err)))
+
+    meniscuses = {meniscus for meniscus in meniscus_geometries if meniscus}
+    meniscuses.update(get_meniscus_geometry(branch, geometry) for geometry in pore_geometries)
+    for model in kelvin_models:
+        for meniscus in meniscuses:
+            try:
+                kelvin[(model, meniscus)] = numpy.asarray(
+                    get_kelvin_model(model, meniscus_geometry=meniscus, **kelvin_args)(pressure)
+                )
+            except Exception as err:
+                errors.append((f"{model} ({meniscus})", str(err)))
+    return thickness, kelvin, errors
+
+
+def psd_curves(psd_model, pore_geometry, pressure, volume, thickness, kelvin):
+    """
+    PSD of the selected points, as ``psd_mesoporous`` but with given thickness and Kelvin models.
+
+    Parameters
+    ----------
+    psd_model : str
+        pyGAPS mesoporous PSD method.
+    pore_geometry : str
+        Pore geometry.
+    pressure, volume : numpy.ndarray
+        Relative pressure and liquid volume adsorbed (cm3) of the selected points.
+    thickness, kelvin : callable
+        Thickness and Kelvin radius as a function of relative pressure.
+
+    Returns
+    -------
+    dict
+        The PSD results, with cumulative pore volume and total pore area.
+    """
+    from pygaps.characterisation.psd_meso import psd_bjh
+    from pygaps.characterisation.psd_meso import psd_dollimore_heal
+    from pygaps.characterisation.psd_meso import psd_pygapsdh
+
+    method = {
+        'pygaps-DH': psd_pygapsdh,
+        'BJH': psd_bjh,
+        'DH': psd_dollimore_heal,
+    }[psd_model]
+
+    results = method(volume, pressure, pore_geometry, thickness, kelvin)
+    cumulative = numpy.cumsum(results['pore_volumes'])
+    results['pore_volume_cumulative'] = cumulative - cumulative[-1] + volume[-1]
+    results['pore_area_total'] = sum(results['pore_areas'])
+    return results
+
+
+def psd_combinations(psd_model, pore_geometry, branch, pressure, volume, thickness, kelvin, meniscus_geometries):
+    """
+    Worker entrypoint: PSD of one method and pore geometry with every model combination.
+
+    Parameters
+    ----------
+    psd_model : str
+        pyGAPS mesoporous PSD method.
+    pore_geometry : str
+        Pore geometry.
+    branch : str
+        Isotherm branch, for the automatic meniscus geometry.
+    pressure, volume : numpy.ndarray
+        Relative pressure and liquid volume adsorbed (cm3) of the selected points.
+    thickness, kelvin : dict
+        Curves from ``model_curves``.
+    meniscus_geometries : list
+        Meniscus geometries to use, None for automatic.
+
+    Returns
+    -------
+    list
+        One dict per combination, with its settings, the PSD results,
+        the ``rmse`` of the cumulative volume against the isotherm and
+        an ``error`` message if it failed.
+    """
+    from pygaps.characterisation.models_kelvin import get_meniscus_geometry
+
+    # the isotherm between each pair of points, as plotted against the fit
+    volume_mid = (volume[:-1] + volume[1:]) / 2
+    volume_span = numpy.ptp(volume) or 1
+
+    results = []
+    auto_meniscus = get_meniscus_geometry(branch, pore_geometry)
+    for meniscus in meniscus_geometries:
+        if meniscus == auto_meniscus and None in meniscus_geometries:
+            continue  # same as automatic
+        used_meniscus = meniscus or auto_meniscus
+        for t_name, t_values in thickness.items():
+            for (k_name, k_meniscus), k_values in kelvin.items():
+                if k_meniscus != used_meniscus:
+                    continue
+                result = {
+                    'psd_model': psd_model,
+                    'pore_geometry': pore_geometry,
+                    'meniscus_geometry': meniscus,
+                    'thickness_model': t_name,
+                    'kelvin_model': k_name,
+                    'rmse': numpy.inf,
+                    'error': None,
+                }
+                try:
+                    with numpy.errstate(all="ignore"):
+                        psd = psd_curves(
+                            psd_model,
+                            pore_geometry,
+                            pressure,
+                            volume,
+                            CurveLookup(pressure, t_values),
+                            CurveLookup(pressure, k_values),
+                        )
+                except Exception as err:
+                    result['error'] = str(err)
+                    results.append(result)
+                    continue
+
+                result.update(psd)
+                cumulative = psd['pore_volume_cumulative']
+                if len(cumulative) == len(volume_mid) and numpy.all(numpy.isfinite(cumulative)):
+                    result['rmse'] = numpy.sqrt(numpy.mean((cumulative - volume_mid)**2)) / volume_span
+                if numpy.any(cumulative < 0):
+                    result['error'] = "Negative cumulative pore volumes."
+                results.append(result)
+    return results
@@ -0,0 +1,101 @@
+"""
+Microporous PSD calculated for many combinations of methods and models.
+
+All combinations of Horvath-Kawazoe type method, pore geometry and
+adsorbent surface model use the same selected points of the isotherm and
+the same adsorbate properties, which are prepared once and sent to each job.
+"""
+
+import numpy
+
+
+def psd_hk(psd_model, pore_geometry, pressure, loading, temperature, adsorbate_properties, material_model):
+    """
+    PSD of the selected points, as ``psd_microporous``.
+
+    Parameters
+    ----------
+    psd_model : str
+        pyGAPS microporous PSD method.
+    pore_geometry : str
+        Pore geometry.
+    pressure, loading : numpy.ndarray
+        Relative pressure and loading (mmol) of the selected points.
+    temperature : float
+        Isotherm temperature.
+    adsorbate_properties : dict
+        Adsorbate properties for the HK models.
+    material_model : str
+        Adsorbent surface model.
+
+    Returns
+    -------
+    dict
+        The PSD results.
+    """
+    from pygaps.characterisation.models_hk import get_hk_model
+    from pygaps.characterisation.psd_micro import psd_horvath_kawazoe
+    from pygaps.characterisation.psd_micro import psd_horvath_kawazoe_ry
+
+    method = psd_horvath_kawazoe if psd_model in ['HK', 'HK-CY'] else psd_horvath_kawazoe_ry
+    pore_widths, pore_dist, pore_vol_cum = method(
+        pressure,
+        loading,
+        temperature,
+        pore_geometry,
+        adsorbate_properties,
+        get_hk_model(material_model),
+        use_cy=psd_model.endswith('-CY'),
+    )
+    return {
+        'pore_widths': pore_widths,
+        'pore_distribution': pore_dist,
+        'pore_volume_cumulative': pore_vol_cum,
+    }
+
+
+def median_width(pore_widths, pore_volume_cumulative):
+    """Pore width below which half of the pore volume is found."""
+    widths = numpy.asarray(pore_widths, dtype=float)
+    cumulative = numpy.maximum.accumulate(numpy.asarray(pore_volume_cumulative, dtype=float))
+    return float(numpy.interp(cumulative[-1] / 2, cumulative, widths))
+
+
+def hk_combination(
+    psd_model, pore_geometry, material_model, pressure, loading, temperature, adsorbate_properties
+):
+    """
+    Worker entrypoint: PSD of one combination of method, pore geometry and adsorbent model.
+
+    Combinations are sent separately, as some (RY cylinder) take
+    much longer than others.
+
+    Returns
+    -------
+    dict
+        The combination settings, the PSD results, the ``median_width``
+        and an ``error`` message if it failed.
+    """
+    result = {
+        'psd_model': psd_model,
+        'pore_geometry': pore_geometry,
+        'material_model': material_model,
+        'median_width': numpy.nan,
+        'error': None,
+    }
+    try:
+        with numpy.errstate(all="ignore"):
+            psd = psd_hk(
+                psd_model,
+                pore_geometry,
+                pressure,
+                loading,
+                temperature,
+                adsorbate_properties,
+                material_model,
+            )
+            result.update(psd)
+            result['median_width'] = median_width(psd['pore_widths'], psd['pore_volume_cumulative'])
+    except Exception as err:
+        result['error'] = str(err)
+    return result
@@ -0,0 +1,69 @@
+"""
+Isotherm model fitting functions which can run outside the GUI thread.
+"""
+
+import contextlib
+import signal
+import threading
+
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """
+    Interrupt the enclosed code with a TimeoutError after ``seconds``.
+
+    Uses SIGALRM, so it only applies in the main thread of POSIX processes
+    (such as pool workers); elsewhere the code runs to completion. The
+    alarm repeats every second, in case the error is caught by the code.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise TimeoutError
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds, 1)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def fit_job(model, pressure, loading, branch, iso_params, timeout=None):
+    """
+    Worker entrypoint: fit one model on isotherm data.
+
+    Returns a (model, model isotherm JSON, logs, error) tuple, where
+    the model isotherm is None if the fit failed or took longer than
+    ``timeout`` seconds.
+    """
+    from pygaps import ModelIsotherm
+    from pygaps.parsing import isotherm_to_json
+    from pygaps.utilities.exceptions import CalculationError
+    from pygapsgui.utilities.log_hook import log_hook
+
+    isotherm, error = None, None
+    with log_hook:
+        try:
+            with time_limit(timeout):
+                isotherm = ModelIsotherm(
+                    pressure=pressure,
+                    loading=loading,
+                    branch=branch,
+                    model=model,
+                    verbose=True,
+                    plot_fit=False,
+                    **iso_params,
+                )
+        except TimeoutError:
+            error = f"Modelling using {model} timed out."
+        except CalculationError:
+            error = f"Modelling using {model} failed."
+        except Exception as err:
+            error = f"Modelling using {model} failed: {err}"
+    if isotherm is not None:
+        isotherm = isotherm_to_json(isotherm)
+    return model, isotherm, log_hook.get_logs(), error
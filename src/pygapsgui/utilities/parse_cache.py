@@ -0,0 +1,189 @@
+"""
+Persistent on-disk cache of parsed isotherms.
+
+Parsing an isotherm (especially from Excel files) is slow, while the files
+themselves rarely change. Parsed isotherms are therefore saved in the
+pyGAPS JSON format to a content-addressed store, so that reopening the
+same file skips parsing. JSON is used rather than pickling the isotherm
+object, which holds unpicklable thermodynamic backends once any adsorbate
+property has been calculated.
+
+The cache has two levels:
+
+- ``stat/``: a small record per (path, size, mtime, parser), pointing to the
+  hash of the file contents. If the file is untouched, it is not even read.
+- ``blobs/``: the isotherms as JSON, named by the hash of the file contents,
+  parser and pyGAPS version. Moved or copied files share the same blob.
+
+Files which already are pyGAPS JSON are not cached, as the blob would be
+a copy of the file, parsed just as slowly.
+
+Blobs are evicted by age and total size (least recently used first).
+No QT functionality is used, so the cache works in worker processes.
+"""
+
+import hashlib
+import os
+import pathlib
+import sys
+import time
+
+# Eviction limits
+CACHE_MAX_SIZE = 512 * 1024**2  # bytes
+CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+
+# Bump when the blob format changes
+_CACHE_FORMAT = "2"
+
+
+def cache_dir() -> pathlib.Path:
+    """Location of the cache, in the user cache folder of the platform."""
+    override = os.environ.get("PYGAPSGUI_CACHE_DIR")
+    if override:
+        return pathlib.Path(override)
+    if sys.platform == "win32":
+        base = pathlib.Path(os.environ.get("LOCALAPPDATA", pathlib.Path.home() / "AppData/Local"))
+    elif sys.platform == "darwin":
+        base = pathlib.Path.home() / "Library" / "Caches"
+    else:
+        base = pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    return base / "pyGAPS" / "pyGAPS-gui" / "isotherms"
+
+
+def _pygaps_version():
+    """Parsed isotherms are only valid for the pyGAPS version that created them."""
+    from importlib.metadata import PackageNotFoundError
+    from importlib.metadata import version
+    try:
+        return version("pygaps")
+    except PackageNotFoundError:
+        import pygaps
+        return getattr(pygaps, "__version__", "unknown")
+
+
+def _stat_key(path: pathlib.Path, parser_key: str) -> str:
+    """Key from file location and metadata, which does not require reading the file."""
+    stat = path.stat()
+    ident = f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{parser_key}"
+    return hashlib.blake2b(ident.encode(), digest_size=20).hexdigest()
+
+
+def _content_key(path: pathlib.Path, parser_key: str) -> str:
+    """Key from file contents, parser and pyGAPS version."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{_CACHE_FORMAT}|{_pygaps_version()}|{parser_key}|".encode())
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024**2), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(target: pathlib.Path, data: bytes):
+    """Write so that other processes never see a partial file."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    temp.write_bytes(data)
+    os.replace(temp, target)
+
+
+def _read_blob(blob: pathlib.Path):
+    """Read a cached isotherm, returning None if it is missing or unusable."""
+    try:
+        text = blob.read_text(encoding="utf-8")
+        from pygaps.parsing import isotherm_from_json
+        isotherm = isotherm_from_json(text)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # written by an incompatible version, or corrupt
+        blob.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(blob)  # mark as recently used
+    except OSError:
+        pass
+    return isotherm
+
+
+def cached_parse(path, parser_key: str, parse):
+    """
+    Return the isotherm parsed from ``path``, using the cache if possible.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        File to parse.
+    parser_key : str
+        Unique string for the parser and its options (e.g. "load.xls").
+    parse : callable
+        Called without arguments to parse the file on a cache miss.
+    """
+    path = pathlib.Path(path)
+    if path.suffix.lower() == ".json":
+        return parse()
+    root = cache_dir()
+    try:
+        stat_file = root / "stat" / _stat_key(path, parser_key)
+        if stat_file.exists():
+            isotherm = _read_blob(root / "blobs" / stat_file.read_text())
+            if isotherm is not None:
+                return isotherm
+
+        content_key = _content_key(path, parser_key)
+        blob = root / "blobs" / content_key
+        isotherm = _read_blob(blob)
+        if isotherm is not None:
+            _write_atomic(stat_file, content_key.encode())
+            return isotherm
+    except OSError:
+        # unreadable cache (or file): never fail because of it
+        return parse()
+
+    isotherm = parse()
+    if isotherm is not None:
+        try:
+            from pygaps.parsing import isotherm_to_json
+            _write_atomic(blob, isotherm_to_json(isotherm).encode("utf-8"))
+            _write_atomic(stat_file, content_key.encode())
+        except Exception:
+            # not serialisable: the isotherm is still returned, uncached
+            pass
+    return isotherm
+
+
+def evict(max_size: int = CACHE_MAX_SIZE, max_age: int = CACHE_MAX_AGE):
+    """Remove old blobs, then least recently used ones until under the size limit."""
+    root = cache_dir()
+    now = time.time()
+
+    blobs = []
+    for blob in (root / "blobs").glob("*"):
+        try:
+            stat = blob.stat()
+        except OSError:
+            continue
+        if now - stat.st_mtime > max_age:
+            blob.unlink(missing_ok=True)
+        else:
+            blobs.append((stat.st_mtime, stat.st_size, blob))
+
+    total = sum(size for _, size, _ in blobs)
+    for _, size, blob in sorted(blobs, key=lambda x: x[0]):
+        if total <= max_size:
+            break
+        blob.unlink(missing_ok=True)
+        total -= size
+
+    # stat records pointing to removed blobs are useless
+    for stat_file in (root / "stat").glob("*"):
+        try:
+            if not (root / "blobs" / stat_file.read_text()).exists():
+                stat_file.unlink(missing_ok=True)
+        except OSError:
+            continue
+
+
+def clear():
+    """Remove all cached isotherms."""
+    import shutil
+    shutil.rmtree(cache_dir(), ignore_errors=True)
@@ -0,0 +1,275 @@
+"""
+Reference isotherms for alpha-s and t-plots, kept as ready interpolants.
+
+pyGAPS evaluates a reference isotherm through ``loading_at``, converting
+units on every call and building a new interpolator whenever the branch
+changes, and reads its standard isotherms (non-porous silica and carbon
+black) from .csv files in every session. Here a reference branch is
+converted once to relative pressure and molar loading, sorted by pressure,
+and kept as a ``ReferenceCurve``. It is linearly interpolated, as in
+pyGAPS, which preserves the monotonicity of the points.
+
+Curves of isotherms are kept until the isotherm changes. Curves can also
+be saved in a reference library on disk, together with the surface areas
+and monolayer uptake of the reference, and are then available in every
+following session without the original isotherm. The pyGAPS standard
+isotherms are added to the library when first used.
+"""
+
+import json
+import os
+import pathlib
+import sys
+import weakref
+
+import numpy
+from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
+
+# Units of all reference curves, the material being that of the reference
+REFERENCE_UNITS = {
+    "pressure_mode": "relative",
+    "loading_basis": "molar",
+    "loading_unit": "mmol",
+}
+
+# pyGAPS thickness models which are interpolated standard isotherms
+STANDARD_THICKNESS = {
+    "SiO2 Jaroniec/Kruk/Olivier": "SiO2_JKO",
+    "carbon black Kruk/Jaroniec/Gadkaree": "CB_KJG",
+}
+
+_LOADED = {}  # name -> ReferenceCurve, for this session
+_CURVES = {}  # id(isotherm) -> {key: ReferenceCurve}
+
+
+def reference_dir() -> pathlib.Path:
+    """Location of the reference library, next to the other application data."""
+    override = os.environ.get("PYGAPSGUI_REFERENCE_DIR")
+    if override:
+        return pathlib.Path(override)
+    if sys.platform == "win32":
+        base = pathlib.Path(os.environ.get("APPDATA", pathlib.Path.home() / "AppData/Roaming"))
+    elif sys.platform == "darwin":
+        base = pathlib.Path.home() / "Library" / "Application Support"
+    else:
+        base = pathlib.Path(os.environ.get("XDG_DATA_HOME", pathlib.Path.home() / ".local" / "share"))
+    return base / "pyGAPS" / "pyGAPS-gui" / "references"
+
+
+def _store_path(name: str) -> pathlib.Path:
+    return reference_dir() / f"{name}.npz"
+
+
+class ReferenceCurve():
+    """
+    A reference isotherm branch, as relative pressure and molar loading.
+
+    Attributes
+    ----------
+    pressure, loading : numpy.ndarray
+        Points of the branch sorted by pressure, loading in mmol.
+    info : dict
+        Description of the reference: ``material``, ``adsorbate``,
+        ``temperature``, ``material_unit`` and, when known, the
+        ``monolayer`` uptake (mmol) and surface ``areas`` (m2) by method.
+    """
+    def __init__(self, pressure, loading, info=None):
+        order = numpy.argsort(pressure, kind="stable")
+        self.pressure = numpy.asarray(pressure, dtype=float)[order]
+        self.loading = numpy.asarray(loading, dtype=float)[order]
+        self.info = info or {}
+        self.info.setdefault("areas", {})
+
+    def loading_at(self, pressure):
+        """Loading at one or more relative pressures. Like pyGAPS, refuses to extrapolate."""
+        pressure = numpy.asarray(pressure, dtype=float)
+        if numpy.any(pressure < self.pressure[0]) or numpy.any(pressure > self.pressure[-1]):
+            raise CalculationError("A pressure point is outside the pressure range of the reference.")
+        return numpy.interp(pressure, self.pressure, self.loading)
+
+    def thickness_at(self, pressure):
+        """
+        Adsorbed layer thickness (nm) at relative pressures.
+
+        Used as a t-plot thickness model, in the same way as the pyGAPS
+        standard isotherms: zero below the reference points, and the last
+        thickness above them.
+        """
+        from pygaps.characterisation.models_thickness import convert_to_thickness
+        monolayer = self.info.get("monolayer")
+        if not monolayer:
+            raise CalculationError("The monolayer uptake of the reference is not known.")
+        thickness = convert_to_thickness(self.loading, monolayer)
+        return numpy.interp(pressure, self.pressure, thickness, left=0, right=thickness[-1])
+
+
+def curve_from_isotherm(isotherm, branch: str = "ads") -> ReferenceCurve:
+    """Convert an isotherm branch to a reference curve."""
+    pressure = converted(isotherm, "pressure", branch=branch, pressure_mode=REFERENCE_UNITS["pressure_mode"])
+    loading = converted(
+        isotherm,
+        "loading",
+        branch=branch,
+        loading_basis=REFERENCE_UNITS["loading_basis"],
+        loading_unit=REFERENCE_UNITS["loading_unit"],
+    )
+    if loading is None or len(loading) == 0:
+        raise ParameterError("The reference isotherm does not have the required branch.")
+    return ReferenceCurve(
+        pressure, loading, {
+            "material": str(isotherm.material),
+            "adsorbate": str(isotherm.adsorbate),
+            "temperature": isotherm.temperature,
+            "material_unit": isotherm.material_unit,
+        }
+    )
+
+
+def reference_curve(isotherm, branch: str = "ads") -> ReferenceCurve:
+    """Reference curve of an isotherm branch, kept until the isotherm changes."""
+    iso_id = id(isotherm)
+    key = (branch, version(isotherm))
+    curves = _CURVES.get(iso_id)
+    if curves is None:
+        curves = _CURVES[iso_id] = {}
+        weakref.finalize(isotherm, _CURVES.pop, iso_id, None)
+    curve = curves.get(key)
+    if curve is None:
+        curve = curves[key] = curve_from_isotherm(isotherm, branch)
+    return curve
+
+
+def _save(curve: ReferenceCurve, target: pathlib.Path):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.stem}.{os.getpid()}.tmp.npz")
+    numpy.savez(
+        temp,
+        pressure=curve.pressure,
+        loading=curve.loading,
+        info=numpy.array(json.dumps(curve.info)),
+    )
+    os.replace(temp, target)
+
+
+def _read(path) -> ReferenceCurve:
+    with numpy.load(path) as data:
+        return ReferenceCurve(data["pressure"], data["loading"], json.loads(str(data["info"])))
+
+
+def _standard_curve(name: str) -> ReferenceCurve:
+    """Read a pyGAPS standard isotherm, with its monolayer uptake and BET area."""
+    from pygaps.data import STANDARD_ISOTHERMS
+    from pygaps.parsing.csv import isotherm_from_csv
+    isotherm = isotherm_from_csv(STANDARD_ISOTHERMS[name])
+    curve = curve_from_isotherm(isotherm)
+    curve.info["monolayer"] = isotherm.properties.get("monolayer uptake [mmol/g]")
+    area = isotherm.properties.get("BET area [m2/g]")
+    if area:
+        curve.info["areas"]["BET"] = area
+    return curve
+
+
+def reference_names():
+    """Standard isotherms included in pyGAPS, followed by those saved by the user."""
+    from pygaps.data import STANDARD_ISOTHERMS
+    names = list(STANDARD_ISOTHERMS)
+    try:
+        names += sorted(
+            path.stem for path in reference_dir().glob("*.npz")
+            if path.stem not in STANDARD_ISOTHERMS and ".tmp" not in path.suffixes
+        )
+    except OSError:
+        pass
+    return names
+
+
+def load_reference(name: str) -> ReferenceCurve:
+    """Load a reference by name, adding pyGAPS standard isotherms to the library if needed."""
+    curve = _LOADED.get(name)
+    if curve is not None:
+        return curve
+
+    from pygaps.data import STANDARD_ISOTHERMS
+    target = _store_path(name)
+    source = STANDARD_ISOTHERMS.get(name)
+    try:
+        if source is not None and (
+            not target.exists() or target.stat().st_mtime < pathlib.Path(source).stat().st_mtime
+        ):
+            _save(_standard_curve(name), target)
+        curve = _read(target)
+    except FileNotFoundError as err:
+        raise ParameterError(f"Reference {name} is not available.") from err
+    except OSError:
+        # read-only library: keep the standard isotherm in memory only
+        if source is None:
+            raise
+        curve = _standard_curve(name)
+
+    _LOADED[name] = curve
+    return curve
+
+
+def register_reference(isotherm, name: str, branch: str = "ads") -> str:
+    """
+    Save an isotherm branch in the reference library, replacing any reference with the same name.
+
+    The BET and Langmuir areas of the isotherm, and the BET monolayer uptake,
+    are calculated and saved with it, where possible.
+    """
+    from pygaps.characterisation.area_bet import area_BET
+    from pygaps.characterisation.area_lang import area_langmuir
+
+    curve = curve_from_isotherm(isotherm, branch)
+    try:
+        bet = area_BET(isotherm)
+        curve.info["areas"]["BET"] = bet["area"]
+        curve.info["monolayer"] = bet["n_monolayer"] * 1000  # mol to mmol
+    except Exception:
+        pass
+    try:
+        curve.info["areas"]["Langmuir"] = area_langmuir(isotherm)["area"]
+    except Exception:
+        pass
+
+    try:
+        _save(curve, _store_path(name))
+    except OSError as err:
+        raise ParameterError(f"Could not save reference {name}: {err}") from err
+    _LOADED[name] = curve
+    return name
+
+
+def thickness_names():
+    """References saved by the user which can be used as thickness models."""
+    from pygaps.data import STANDARD_ISOTHERMS
+    names = []
+    for name in reference_names():
+        if name in STANDARD_ISOTHERMS:
+            continue  # already pyGAPS thickness models
+        try:
+            if load_reference(name).info.get("monolayer"):
+                names.append(name)
+        except (OSError, ValueError, ParameterError):
+            pass
+    return names
+
+
+def thickness_model(name: str):
+    """
+    A t-plot thickness model by name.
+
+    pyGAPS standard isotherm models and references of the library with a
+    known monolayer uptake are read from the library, others are pyGAPS
+    thickness equations.
+    """
+    from pygaps.characterisation.models_thickness import _THICKNESS_MODELS
+    from pygaps.characterisation.models_thickness import get_thickness_model
+    if name in STANDARD_THICKNESS:
+        return load_reference(STANDARD_THICKNESS[name]).thickness_at
+    if name in _THICKNESS_MODELS:
+        return get_thickness_model(name)
+    return load_reference(name).thickness_at
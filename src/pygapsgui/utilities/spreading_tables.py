@@ -0,0 +1,188 @@
+"""
+Precomputed reduced spreading pressure of PointIsotherms, for IAST.
+
+pyGAPS computes the spreading pressure of a PointIsotherm by integrating
+the linearly interpolated isotherm from zero, in a python loop over the
+data points, every time the IAST solver evaluates it. As the integral of
+each segment is known in closed form, the cumulative integral at every
+point can be stored once in a table. The spreading pressure at any
+pressure is then a lookup plus the partial integral of one segment.
+
+Tables are built once per isotherm, branch and units, and shared by all
+IAST dialogs. They are discarded when the isotherm is modified (see
+``conversion_cache.modified``).
+"""
+
+import textwrap
+import weakref
+
+import numpy
+from pygaps.utilities.exceptions import CalculationError
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import version
+
+_tables = {}  # id(isotherm) -> {key: SpreadingTable}
+
+
+class SpreadingTable():
+    """
+    Reduced spreading pressure of a linearly interpolated isotherm.
+
+    Follows ``PointIsotherm.spreading_pressure_at``: Henry's law up to the
+    first point, exact integration of each linear segment above it. As
+    pyGAPS does when no ``interp_fill`` is set, pressures outside the range
+    of the points raise a ``CalculationError`` instead of being extrapolated.
+    All functions are vectorised.
+
+    Parameters
+    ----------
+    pressure : array-like
+        Pressure points, in any order (desorption branches decrease).
+    loading : array-like
+        Loading at each pressure point.
+    """
+    def __init__(self, pressure, loading):
+        order = numpy.argsort(pressure, kind="stable")
+        self.pressure = numpy.asarray(pressure, dtype=float)[order]
+        self.loading = numpy.asarray(loading, dtype=float)[order]
+
+        # integral of n(P)/P over each segment, with n(P) = slope * P + intercept
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            self.slope = numpy.diff(self.loading) / numpy.diff(self.pressure)
+        self.intercept = self.loading[:-1] - self.slope * self.pressure[:-1]
+        segments = self.slope * numpy.diff(self.pressure) + \
+            self.intercept * numpy.log(self.pressure[1:] / self.pressure[:-1])
+        self.spreading = numpy.concatenate(([self.loading[0]], self.loading[0] + numpy.cumsum(segments)))
+
+    def _check_range(self, pressure):
+        """As pyGAPS, refuse to extrapolate outside the range of the points."""
+        outside = (pressure < self.pressure[0]) | (pressure > self.pressure[-1])
+        if numpy.any(outside):
+            raise CalculationError(
+                textwrap.dedent(
+                    f"""
+                To compute the spreading pressure at this bulk adsorbate pressure,
+                we would need to extrapolate the isotherm since this pressure ({pressure[outside].flat[0]:.3g})
+                is outside the range of the pressures in your pure-component
+                isotherm data ({self.pressure[0]} - {self.pressure[-1]}).
+                """
+                )
+            )
+
+    def _segment(self, pressure):
+        """Index of the segment each pressure is in."""
+        return numpy.clip(numpy.searchsorted(self.pressure, pressure, side="left") - 1, 0, len(self.slope) - 1)
+
+    def spreading_pressure_at(self, pressure):
+        """Reduced spreading pressure at one or more pressures."""
+        pressure = numpy.asarray(pressure, dtype=float)
+        self._check_range(pressure)
+        low = self._segment(pressure)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            result = self.spreading[low] + self.slope[low] * (pressure - self.pressure[low]) + \
+                self.intercept[low] * numpy.log(pressure / self.pressure[low])
+        return result if result.ndim else float(result)
+
+    def loading_at(self, pressure):
+        """Linearly interpolated loading at one or more pressures."""
+        pressure = numpy.asarray(pressure, dtype=float)
+        self._check_range(pressure)
+        result = numpy.interp(pressure, self.pressure, self.loading)
+        return result if result.ndim else float(result)
+
+    def pressure_at(self, spreading_pressure, iterations=20):
+        """
+        Inverse of the table: pressure at which the reduced spreading pressure is reached.
+
+        Found with a few Newton steps inside the right segment, as the
+        spreading pressure increases monotonically with pressure.
+        """
+        target = numpy.asarray(spreading_pressure, dtype=float)
+        if numpy.any((target < self.spreading[0]) | (target > self.spreading[-1])):
+            raise CalculationError("Spreading pressure is outside the range of the isotherm data.")
+
+        low = numpy.clip(numpy.searchsorted(self.spreading, target, side="left") - 1, 0, len(self.slope) - 1)
+        p_low = self.pressure[low]
+        p_high = self.pressure[low + 1]
+
+        # start from linear interpolation of the table, then refine
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            fraction = (target - self.spreading[low]) / (self.spreading[low + 1] - self.spreading[low])
+            pressure = p_low + numpy.clip(fraction, 0, 1) * (p_high - p_low)
+            for _ in range(iterations):
+                value = self.spreading[low] + self.slope[low] * (pressure - p_low) + \
+                    self.intercept[low] * numpy.log(pressure / p_low)
+                derivative = self.slope[low] + self.intercept[low] / pressure  # n(P) / P
+                pressure = numpy.clip(pressure - (value - target) / derivative, p_low, p_high)
+
+        return pressure if pressure.ndim else float(pressure)
+
+
+def spreading_table(isotherm, branch="ads"):
+    """Spreading pressure table of a PointIsotherm branch, in its current units."""
+    iso_id = id(isotherm)
+    key = (
+        branch,
+        version(isotherm),
+        isotherm.pressure_mode,
+        isotherm.pressure_unit,
+        isotherm.loading_basis,
+        isotherm.loading_unit,
+        isotherm.material_basis,
+        isotherm.material_unit,
+    )
+    tables = _tables.get(iso_id)
+    if tables is None:
+        tables = _tables[iso_id] = {}
+        weakref.finalize(isotherm, _tables.pop, iso_id, None)
+    table = tables.get(key)
+    if table is None:
+        table = tables[key] = SpreadingTable(
+            converted(isotherm, "pressure", branch=branch),
+            converted(isotherm, "loading", branch=branch),
+        )
+    return table
+
+
+class TabulatedIsotherm():
+    """
+    Stand-in for a PointIsotherm in pyGAPS IAST functions.
+
+    Spreading pressure and loading are read from the precomputed table,
+    everything else is taken from the wrapped isotherm.
+
+    When pickled, only the table and pressure mode are kept, as the
+    isotherm itself may not be picklable. This is all the IAST solver
+    needs in a worker process.
+    """
+    def __init__(self, isotherm, branch="ads"):
+        self.isotherm = isotherm
+        self.table = spreading_table(isotherm, branch)
+        self.pressure_mode = isotherm.pressure_mode
+
+    def __getstate__(self):
+        return {"isotherm": None, "table": self.table, "pressure_mode": self.pressure_mode}
+
+    def __getattr__(self, name):
+        isotherm = self.__dict__.get("isotherm")
+        if isotherm is None:  # during or after unpickling
+            raise AttributeError(name)
+        return getattr(isotherm, name)
+
+    def pressure(self, branch="ads", **kwargs):
+        """Pressure points of the table."""
+        return self.table.pressure
+
+    def spreading_pressure_at(self, pressure, branch="ads", **kwargs):
+        """Reduced spreading pressure, from the table."""
+        return self.table.spreading_pressure_at(pressure)
+
+    def loading_at(self, pressure, branch="ads", **kwargs):
+        """Loading, from the table."""
+        return self.table.loading_at(pressure)
+
+
+def tabulated(isotherms, branch="ads"):
+    """Replace PointIsotherms with their tabulated version for IAST."""
+    from pygaps import PointIsotherm
+    return [TabulatedIsotherm(iso, branch) if isinstance(iso, PointIsotherm) else iso for iso in isotherms]
@@ -0,0 +1,57 @@
+"""
+Maps of a fitted quantity over every window of points.
+
+The BET and DR/DA dialogs show a map with the first point of a window on
+one axis and the last point on the other. The map is redrawn whenever the
+data or the displayed quantity change, while its colour bar is created
+only once: a new colour bar would take space from the map axes each time.
+"""
+
+import numpy
+
+
+def plot_window_map(ax, pressure, values, label, colorbar=None, clip=True):
+    """
+    Draw a map of window values, and a marker for the selected window.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes of the map, cleared before drawing.
+    pressure : array-like
+        Pressure of each point, in relative units.
+    values : array-like
+        Square array of values, indexed by first and last point.
+    label : str
+        Label of the colour bar.
+    colorbar : matplotlib.colorbar.Colorbar, optional
+        Colour bar returned by a previous call on the same axes, to update.
+    clip : bool
+        Scale colours to the 2-98 percentile of the values, so that
+        outlier windows do not swamp the scale.
+
+    Returns
+    -------
+    colorbar : matplotlib.colorbar.Colorbar
+        Colour bar of the map.
+    marker : matplotlib.lines.Line2D
+        Empty marker, to be placed on the selected window.
+    """
+    ax.cla()
+    values = numpy.ma.masked_invalid(values)
+
+    vmin, vmax = None, None
+    if clip and values.count():
+        vmin, vmax = numpy.percentile(values.compressed(), [2, 98])
+
+    mesh = ax.pcolormesh(pressure, pressure, values, shading="nearest", vmin=vmin, vmax=vmax)
+    if colorbar is None:
+        colorbar = ax.figure.colorbar(mesh, ax=ax)
+    else:
+        colorbar.update_normal(mesh)
+    colorbar.set_label(label)
+
+    ax.set_xlabel("Last point [p/p0]")
+    ax.set_ylabel("First point [p/p0]")
+    marker = ax.plot([], [], "o", mfc="none", mec="r", ms=10)[0]
+    return colorbar, marker
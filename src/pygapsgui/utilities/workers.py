@@ -0,0 +1,182 @@
+"""
+Shared worker pools for running work outside the GUI thread.
+
+A single process pool is lazily created and reused for the whole session,
+since starting python processes (and importing pyGAPS in them) is expensive.
+Processes are always started with the "spawn" method, as forking a
+running QT application is unsafe.
+
+Dialog calculations, which need access to their models, run on threads
+through a ``CalcWorker`` instead.
+"""
+
+import multiprocessing
+import os
+import pickle
+
+from qtpy import QtCore as QC
+from qtpy import QtWidgets as QW
+
+_PROCESS_POOL = None
+
+
+def worker_count():
+    """Number of worker processes to use, leaving one core for the GUI."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_process_pool():
+    """
+    Return the session-wide process pool, creating it if needed.
+
+    Jobs are plain module-level functions with no QT dependencies, so
+    that they can be pickled and imported by the worker processes. Their
+    arguments and results are pickled as well (see ``picklable``).
+    """
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _PROCESS_POOL = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _PROCESS_POOL
+
+
+def picklable(obj) -> bool:
+    """
+    Whether an object can be sent to the process pool.
+
+    pyGAPS objects cannot be pickled once a thermodynamic backend has
+    been initialised for their adsorbate; work on those stays in this process.
+    """
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
+
+
+def process_pool_broken(exc) -> bool:
+    """
+    Restart the session-wide pool if an exception means it is broken.
+
+    Exceptions of a single job (failed calculation, arguments which
+    cannot be pickled) leave the pool usable, and the pool is kept.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+    if isinstance(exc, BrokenProcessPool):
+        shutdown_process_pool()
+        return True
+    return False
+
+
+def shutdown_process_pool():
+    """Stop the session-wide process pool, discarding any queued work."""
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        try:
+            _PROCESS_POOL.shutdown(wait=False, cancel_futures=True)
+        except TypeError:  # python < 3.9
+            _PROCESS_POOL.shutdown(wait=False)
+        _PROCESS_POOL = None
+
+
+class CalcResult():
+    """
+    Outcome of a calculation run by a CalcWorker.
+
+    Calculations only use the inputs they are given, and return the
+    attributes of the model they calculated in ``values`` (None if the
+    calculation failed) with their log in ``output``. Models are only
+    updated by ``apply``, in the callback on the GUI thread.
+    """
+    def __init__(self, values=None, output=""):
+        self.values = values
+        self.output = output
+
+    @property
+    def success(self) -> bool:
+        """Whether the calculation succeeded."""
+        return self.values is not None
+
+    def apply(self, model) -> bool:
+        """Store the values and log on the model, returns whether the calculation succeeded."""
+        model.output += self.output
+        for name, value in (self.values or {}).items():
+            setattr(model, name, value)
+        return self.success
+
+
+class _CalcJob(QC.QRunnable):
+    """A single calculation submitted to a CalcWorker."""
+    def __init__(self, worker, job_id, function, args, callback):
+        super().__init__()
+        self.worker = worker
+        self.job_id = job_id
+        self.function = function
+        self.args = args
+        self.callback = callback
+
+    def run(self):
+        """Run the calculation, unless a newer one was submitted in the meantime."""
+        if self.job_id != self.worker.job_id:
+            return
+        self.worker.running_id = self.job_id
+        try:
+            result = self.function(*self.args)
+        except Exception as exc:
+            result = CalcResult(output=f'<font color="red">Calculation failed! <br> {exc}</font>')
+        self.worker.job_done.emit(self.job_id, self.callback, result)
+
+
+class CalcWorker(QC.QObject):
+    """
+    Run the calculations of a dialog on a background thread.
+
+    Only the latest submitted calculation matters: jobs which have not started
+    are dropped when a new one is submitted, and results of jobs which finish
+    after a newer one was submitted are discarded. A running pyGAPS call cannot
+    be interrupted, so long calculations should check ``cancelled()`` and
+    return early. Callbacks run on the GUI thread, only for the newest job.
+
+    Jobs run while the GUI keeps changing the model, so they are given their
+    inputs when submitted and return a ``CalcResult``, which the callback
+    applies to the model. Exceptions are returned as failed results. When
+    the parent dialog closes, the running job is abandoned.
+    """
+
+    job_done = QC.Signal(int, object, object)  # job id, callback, result
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.job_id = 0
+        self.running_id = None
+
+        self.pool = QC.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.job_done.connect(self.finish_job)
+
+        if isinstance(parent, QW.QDialog):
+            parent.finished.connect(self.cancel)
+
+    def submit(self, function, callback, *args):
+        """Queue ``function(*args)`` to run, then pass the CalcResult it returns to ``callback``."""
+        self.job_id += 1
+        self.pool.clear()
+        self.pool.start(_CalcJob(self, self.job_id, function, args, callback))
+
+    def cancelled(self):
+        """Whether the running job has been superseded by a newer one."""
+        return self.running_id != self.job_id
+
+    def cancel(self):
+        """Discard pending jobs and the result of the running one."""
+        self.job_id += 1
+        self.pool.clear()
+
+    def finish_job(self, job_id, callback, result):
+        """Hand the result of the newest job back to the GUI."""
+        if job_id != self.job_id:
+            return
+        callback(result)
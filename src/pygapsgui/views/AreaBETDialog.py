@@ -52,6 +52,13 @@ class AreaBETDialog(QW.QDialog):
 
         # Results graph box
         self.res_graphs_layout = QW.QGridLayout(self.res_graphs_box)
+        self.res_graphs_tab = QW.QTabWidget()
+        self.res_graphs_layout.addWidget(self.res_graphs_tab, 0, 0, 1, 1)
+
+        ## Fit tab
+        self.fit_widget = QW.QWidget()
+        self.fit_layout = QW.QGridLayout(self.fit_widget)
+        self.res_graphs_tab.addTab(self.fit_widget, "Selected window")
 
         ## BET plot
         self.bet_graph = GraphView()
@@ -62,8 +69,28 @@ class AreaBETDialog(QW.QDialog):
         self.rouq_graph.setObjectName("rouq_graph")
 
         ## Layout them
-        self.res_graphs_layout.addWidget(self.bet_graph, 0, 0, 1, 1)
-        self.res_graphs_layout.addWidget(self.rouq_graph, 1, 0, 1, 1)
+        self.fit_layout.addWidget(self.bet_graph, 0, 0, 1, 1)
+        self.fit_layout.addWidget(self.rouq_graph, 1, 0, 1, 1)
+
+        ## All windows tab
+        self.map_widget = QW.QWidget()
+        self.map_layout = QW.QGridLayout(self.map_widget)
+        self.res_graphs_tab.addTab(self.map_widget, "All windows")
+
+        ## Map options
+        self.map_label = LabelAlignRight("Display:")
+        self.map_dropdown = QW.QComboBox()
+        self.map_consistent = QW.QCheckBox()
+
+        ## Map plot
+        self.map_graph = GraphView()
+        self.map_graph.setObjectName("map_graph")
+
+        ## Layout them
+        self.map_layout.addWidget(self.map_label, 0, 0, 1, 1)
+        self.map_layout.addWidget(self.map_dropdown, 0, 1, 1, 1)
+        self.map_layout.addWidget(self.map_consistent, 0, 2, 1, 1)
+        self.map_layout.addWidget(self.map_graph, 1, 0, 1, 3)
 
         # Results box
         self.res_text_layout = QW.QGridLayout(self.res_text_box)
@@ -134,4 +161,5 @@ class AreaBETDialog(QW.QDialog):
         self.res_graphs_box.setTitle(QW.QApplication.translate("AreaBETDialog", "Output Graphs", None, -1))
         self.res_text_box.setTitle(QW.QApplication.translate("AreaBETDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("AreaBETDialog", "Auto-determine", None, -1))
+        self.map_consistent.setText(QW.QApplication.translate("AreaBETDialog", "Rouquerol consistent only", None, -1))
         # yapf: disable
@@ -68,7 +68,38 @@ class DADRDialog(QW.QDialog):
         ## DA/DR plot
         self.rgraph = GraphView()
         self.rgraph.setObjectName("DADRGraph")
-        self.res_graphs_layout.addWidget(self.rgraph, 0, 1, 1, 1)
+
+        if self.ptype == "DA":
+            self.res_graphs_tab = QW.QTabWidget()
+            self.res_graphs_layout.addWidget(self.res_graphs_tab, 0, 1, 1, 1)
+
+            ## Selected window tab
+            self.fit_widget = QW.QWidget()
+            self.fit_layout = QW.QGridLayout(self.fit_widget)
+            self.res_graphs_tab.addTab(self.fit_widget, "Selected window")
+            self.fit_layout.addWidget(self.rgraph, 0, 0, 1, 1)
+
+            ## All windows and exponents tab
+            self.map_widget = QW.QWidget()
+            self.map_layout = QW.QGridLayout(self.map_widget)
+            self.res_graphs_tab.addTab(self.map_widget, "All windows")
+
+            ## Map options
+            self.map_label = LabelAlignRight("Display:")
+            self.map_dropdown = QW.QComboBox()
+            self.map_optimum_button = QW.QPushButton()
+
+            ## Map plot
+            self.map_graph = GraphView()
+            self.map_graph.setObjectName("map_graph")
+
+            ## Layout them
+            self.map_layout.addWidget(self.map_label, 0, 0, 1, 1)
+            self.map_layout.addWidget(self.map_dropdown, 0, 1, 1, 1)
+            self.map_layout.addWidget(self.map_optimum_button, 0, 2, 1, 1)
+            self.map_layout.addWidget(self.map_graph, 1, 0, 1, 3)
+        else:
+            self.res_graphs_layout.addWidget(self.rgraph, 0, 1, 1, 1)
 
         # Results box
         self.res_text_layout = QW.QGridLayout(self.res_text_box)
@@ -127,4 +158,6 @@ class DADRDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("DADRDialog", "Options", None, -1))
         self.res_text_box.setTitle(QW.QApplication.translate("DADRDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("DADRDialog", "Auto-determine", None, -1))
+        if self.ptype == "DA":
+            self.map_optimum_button.setText(QW.QApplication.translate("DADRDialog", "Go to optimum", None, -1))
         # yapf: enabke
@@ -23,6 +23,12 @@ class GraphView(QW.QWidget):
     ylow = None  # can be plt.ax
     yhigh = None  # can be plt.ax
 
+    # lines kept between redraws
+    kept_lines = None
+
+    # figure without selector lines, for blitting
+    background = None
+
     def __init__(
         self,
         x_range_select=False,
@@ -35,12 +41,14 @@ class GraphView(QW.QWidget):
         self.setMinimumSize(300, 300)
         self.x_range_select = x_range_select
         self.y_range_select = y_range_select
+        self.kept_lines = {}
         self.setup_UI()
 
     def setup_UI(self):
         """Create and set-up static UI elements."""
         self.figure = Figure(figsize=(5, 5), tight_layout=True)
         self.canvas = FigureCanvas(self.figure)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
         self.ax = self.figure.add_subplot()
 
         _layout = QW.QGridLayout(self)
@@ -70,28 +78,77 @@ class GraphView(QW.QWidget):
         """Creates and connects a selector for the x-axis."""
         self.x_range_select = HSelectorToolbar("HRangeSelect", ax=self.ax)
         self.x_range_select.slider.rangeChanged.connect(self.draw_xlimits)
-        self.x_lower = self.ax.axvline(0, c="r", ls="--")
-        self.x_upper = self.ax.axvline(1, c="r", ls="--")
+        self.x_range_select.slider.rangeMoving.connect(self.draw_xlimits)
+        self.x_lower = self.ax.axvline(0, c="r", ls="--", animated=True)
+        self.x_upper = self.ax.axvline(1, c="r", ls="--", animated=True)
 
     def setupYRangeSelect(self):
         """Creates and connects a selector for the y-axis."""
         self.y_range_select = VSelectorToolbar("VRangeSelect", ax=self.ax)
         self.y_range_select.slider.rangeChanged.connect(self.draw_ylimits)
-        self.ylow = self.ax.axhline(0, c="r", ls="--")
-        self.yhigh = self.ax.axhline(1, c="r", ls="--")
+        self.y_range_select.slider.rangeMoving.connect(self.draw_ylimits)
+        self.ylow = self.ax.axhline(0, c="r", ls="--", animated=True)
+        self.yhigh = self.ax.axhline(1, c="r", ls="--", animated=True)
 
     def draw_xlimits(self, low, high):
         """Sets the selector limits for the x axis."""
         self.x_lower.set_xdata([low, low])
         self.x_upper.set_xdata([high, high])
-        self.canvas.draw_idle()
+        self.blit_selectors()
 
     def draw_ylimits(self, low, high):
         """Sets the selector limits for the y axis."""
         self.ylow.set_ydata([low, low])
         self.yhigh.set_ydata([high, high])
+        self.blit_selectors()
+
+    def on_draw(self, event):
+        """After a full draw, save the background and add the (animated) selector lines."""
+        if not self.selector_lines():
+            return
+        if event.canvas is self.canvas:
+            self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_selectors()
+
+    def draw_selectors(self):
+        """Draw the selector lines on the current renderer."""
+        for line in self.selector_lines():
+            self.ax.draw_artist(line)
+
+    def blit_selectors(self):
+        """Redraw only the selector lines over the saved background."""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_selectors()
+        self.canvas.blit(self.figure.bbox)
+
+    def set_line(self, key, x, y, **kwargs):
+        """
+        Plot a line which is kept between redraws, or update its data.
+
+        Meant for lines which change often, such as fits, as the same
+        line object is reused. Styling is only applied on creation.
+        """
+        line = self.kept_lines.get(key)
+        if line is None:
+            self.kept_lines[key] = self.ax.plot(x, y, **kwargs)[0]
+        else:
+            line.set_data(x, y)
         self.canvas.draw_idle()
 
+    def remove_line(self, key):
+        """Remove a line plotted by ``set_line``."""
+        line = self.kept_lines.pop(key, None)
+        if line is not None:
+            line.remove()
+            self.canvas.draw_idle()
+
+    def selector_lines(self):
+        """Lines used to display the range selectors."""
+        return [line for line in (self.x_lower, self.x_upper, self.ylow, self.yhigh) if line]
+
     def clear(self):
         """Custom clear function that only removes what's needed."""
         for ax in self.figure.axes:
@@ -100,6 +157,7 @@ class GraphView(QW.QWidget):
                 for line in ax.get_lines():
                     if line not in [self.x_lower, self.x_upper, self.ylow, self.yhigh]:
                         line.remove()
+                self.kept_lines = {}
                 lgd = ax.get_legend()
                 if lgd:
                     lgd.remove()
@@ -44,6 +44,11 @@ class IASTDialog(QW.QDialog):
         self.calc_button.setAutoDefault(True)
         self.options_layout.addWidget(self.calc_button, 3, 0, 1, 3)
 
+        ## Progress of long calculations
+        self.progress_bar = QW.QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.options_layout.addWidget(self.progress_bar, 6, 0, 1, 3)
+
         ## Output log
         self.output_label = QW.QLabel("Calculation log:")
         self.output = LabelOutput()
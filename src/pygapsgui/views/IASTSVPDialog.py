@@ -54,17 +54,22 @@ class IASTSVPDialog(QW.QDialog):
         self.data_table.setMinimumWidth(300)
         self.options_layout.addWidget(self.data_table, 3, 0, 1, 3)
 
+        ## Progressive refinement
+        self.progressive_box = QW.QCheckBox()
+        self.progressive_box.setChecked(True)
+        self.options_layout.addWidget(self.progressive_box, 4, 0, 1, 3)
+
         ## Button to calculate
         self.calc_button = QW.QPushButton()
         self.calc_button.setDefault(True)
         self.calc_button.setAutoDefault(True)
-        self.options_layout.addWidget(self.calc_button, 4, 0, 1, 3)
+        self.options_layout.addWidget(self.calc_button, 5, 0, 1, 3)
 
         ## Output log
         self.output_label = QW.QLabel("Calculation log:")
         self.output = LabelOutput()
-        self.options_layout.addWidget(self.output_label, 5, 0)
-        self.options_layout.addWidget(self.output, 6, 0, 1, 3)
+        self.options_layout.addWidget(self.output_label, 6, 0)
+        self.options_layout.addWidget(self.output, 7, 0, 1, 3)
 
         # Result display
         self.res_graph = GraphView()
@@ -91,4 +96,5 @@ class IASTSVPDialog(QW.QDialog):
         # pylint: disable=line-too-long
         self.setWindowTitle(QW.QApplication.translate("IASTSVPDialog", "IAST: selectivity-pressure calculation", None, -1))
         self.calc_button.setText(QW.QApplication.translate("IASTSVPDialog", "Calculate", None, -1))
+        self.progressive_box.setText(QW.QApplication.translate("IASTSVPDialog", "Add points where the curve bends", None, -1))
         # yapf: enable
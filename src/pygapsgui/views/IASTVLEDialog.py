@@ -52,20 +52,25 @@ class IASTVLEDialog(QW.QDialog):
         self.point_input.setValue(30)
         self.options_layout.addWidget(self.point_input, 3, 1, 1, 2)
 
+        ## Progressive refinement
+        self.progressive_box = QW.QCheckBox()
+        self.progressive_box.setChecked(True)
+        self.options_layout.addWidget(self.progressive_box, 4, 1, 1, 2)
+
         ## Button to calculate
         self.calc_button = QW.QPushButton()
         self.calc_button.setDefault(True)
         self.calc_button.setAutoDefault(True)
-        self.options_layout.addWidget(self.calc_button, 4, 0, 1, 2)
+        self.options_layout.addWidget(self.calc_button, 5, 0, 1, 2)
 
         self.calc_autobox = QW.QCheckBox()
-        self.options_layout.addWidget(self.calc_autobox, 4, 2, 1, 1)
+        self.options_layout.addWidget(self.calc_autobox, 5, 2, 1, 1)
 
         ## Output log
         self.output_label = QW.QLabel("Calculation log:")
         self.output = LabelOutput()
-        self.options_layout.addWidget(self.output_label, 5, 0)
-        self.options_layout.addWidget(self.output, 6, 0, 1, 3)
+        self.options_layout.addWidget(self.output_label, 6, 0)
+        self.options_layout.addWidget(self.output, 7, 0, 1, 3)
 
         # Result display
         self.res_graph = GraphView()
@@ -92,4 +97,5 @@ class IASTVLEDialog(QW.QDialog):
         self.setWindowTitle(QW.QApplication.translate("IASTVLEDialog", "IAST: bulk-adsorbed equilibrium", None, -1))
         self.calc_button.setText(QW.QApplication.translate("IsoModelByDialog", "Calculate", None, -1))
         self.calc_autobox.setText(QW.QApplication.translate("IsoModelByDialog", "Auto", None, -1))
+        self.progressive_box.setText(QW.QApplication.translate("IASTVLEDialog", "Refine progressively where the curve bends", None, -1))
         # yapf: enable
@@ -1,7 +1,12 @@
 import itertools
 
+import numpy
 import pygaps.graphing as pgg
 import pygaps.utilities.exceptions as pge
+from pygaps.graphing.mpl_styles import ISO_MARKERS
+from pygaps.graphing.mpl_styles import Y1_COLORS
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.decimation import minmax_indices
 from pygapsgui.views.GraphView import GraphView
 from pygapsgui.widgets.IsoGraphToolbar import IsoGraphToolbar
 from pygapsgui.widgets.UtilityDialogs import error_dialog
@@ -20,6 +25,8 @@ class IsoGraphView(GraphView):
     - has functionality to linearize/log one or more axes
     - integrates with ``IsoGraphToolbar`` to provide custom isotherm actions
     - integrates with ``SelectorToolbar`` to allow data range selection
+    - keeps the lines of each isotherm, so that redraws only plot what changed
+    - decimates very large isotherms for display, depending on the zoom level
 
     """
 
@@ -45,12 +52,25 @@ class IsoGraphView(GraphView):
     lgd_keys: list = None
     lgd_pos: str = "best"
 
+    # for incremental redraws
+    _iso_lines: dict = None  # id(isotherm) -> (isotherm, signature, index, lines)
+    _draw_state: tuple = None
+
+    # level of detail
+    lod_points: int = 5000  # lines with more points are decimated
+    _lod_data: dict = None  # line -> full resolution (x, y)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         # instantiate properties
         self.data_types = ["pressure", "loading"]
         self.lgd_keys = ["material", "adsorbate", "temperature", "key"]
+        self._lod_data = {}
+
+        # zooming or resizing changes the displayed resolution
+        self.ax.callbacks.connect("xlim_changed", self.update_lod)
+        self.canvas.mpl_connect("resize_event", self.update_lod)
 
         # anything less and it looks too cramped
         self.setMinimumSize(400, 400)
@@ -85,13 +105,23 @@ class IsoGraphView(GraphView):
             self.find_xrange()
 
     def draw_isotherms(self, clear=True):
-        """Redraws the current isotherms."""
-        if clear:
+        """
+        Redraws the current isotherms.
+
+        If the display settings did not change since the last draw, lines of
+        isotherms already on the graph are kept, and only isotherms which were
+        added or modified are plotted.
+        """
+        incremental = clear and self._iso_lines is not None and self._draw_state == self.draw_state()
+        if clear and not incremental:
             self.clear()
-        if self.isotherms:
+        if self.isotherms or incremental:
             try:
-                self._pg_plot_isotherms()
-                self.ax.autoscale()
+                if incremental:
+                    self._update_isotherms()
+                else:
+                    self._plot_all_isotherms()
+                    self.ax.autoscale()
             except pge.GraphingError:
                 error_dialog(
                     "X-axis and Y1-axis must display data that is shared by all isotherms (i.e. pressure or loading)."
@@ -100,6 +130,7 @@ class IsoGraphView(GraphView):
                 error_dialog(
                     "Cannot plot multiple isotherms that are impossible to convert to the same units / modes."
                 )
+        self.decimate_lines()
         self.canvas.draw_idle()
 
     def _pg_plot_isotherms(self):
@@ -120,6 +151,231 @@ class IsoGraphView(GraphView):
             lgd_keys=self.lgd_keys,
         )
 
+    def _plot_all_isotherms(self):
+        """Plot all isotherms at once, then record which lines belong to each."""
+        self._iso_lines = None
+        self._draw_state = self.draw_state()
+        before = len(self.ax.lines)
+        self._pg_plot_isotherms()
+
+        # a secondary axis is created on each plot, so it is always redrawn
+        if self.y2_data:
+            return
+
+        lines = list(self.ax.lines[before:])
+        counts = [self._branch_count(isotherm) for isotherm in self.isotherms]
+        if sum(counts) != len(lines):
+            return
+        self._iso_lines = {}
+        for index, (isotherm, count) in enumerate(zip(self.isotherms, counts)):
+            self._iso_lines[id(isotherm)] = (isotherm, self.iso_signature(isotherm), index, lines[:count])
+            lines = lines[count:]
+
+    def _plot_isotherm(self, isotherm, index):
+        """Plot a single isotherm with the style it would have in the full graph."""
+        color, marker = self._iso_style(index)
+        before = len(self.ax.lines)
+        pgg.plot_iso(
+            [isotherm],
+            ax=self.ax,
+            branch=self._branch,
+            logx=self.logx,
+            logy1=self.logy,
+            x_data=self.x_data,
+            y1_data=self.y1_data,
+            lgd_keys=self.lgd_keys,
+            lgd_pos=None,
+            color=[color],
+            marker=[marker],
+            **self.plot_units(),
+        )
+        return list(self.ax.lines[before:])
+
+    def _update_isotherms(self):
+        """Add, remove or replot only the isotherms which changed since the last draw."""
+        isotherms = self.isotherms or []
+        shown = {id(iso) for iso in isotherms}
+
+        # drop lines of isotherms which were deselected or modified
+        for key, (isotherm, signature, _, lines) in list(self._iso_lines.items()):
+            if key not in shown or signature != self.iso_signature(isotherm):
+                for line in lines:
+                    line.remove()
+                del self._iso_lines[key]
+
+        # drop anything else drawn on top since, like previous fits
+        kept = set(self.selector_lines()) | set(self.kept_lines.values())
+        kept.update(line for entry in self._iso_lines.values() for line in entry[3])
+        for line in self.ax.get_lines():
+            if line not in kept:
+                line.remove()
+        lgd = self.ax.get_legend()
+        if lgd:
+            lgd.remove()
+
+        # plot new isotherms and restyle those which moved in the list
+        for index, isotherm in enumerate(isotherms):
+            entry = self._iso_lines.get(id(isotherm))
+            if entry is None:
+                lines = self._plot_isotherm(isotherm, index)
+                self._iso_lines[id(isotherm)] = (isotherm, self.iso_signature(isotherm), index, lines)
+            elif entry[2] != index:
+                color, marker = self._iso_style(index)
+                for line in entry[3]:
+                    line.set_color(color)
+                    line.set_marker(marker)
+                self._iso_lines[id(isotherm)] = entry[:2] + (index, entry[3])
+
+        # legend only lists isotherms, as a full draw would
+        handles = [
+            line for iso in isotherms for line in self._iso_lines[id(iso)][3]
+            if line.get_label() and not line.get_label().startswith("_")
+        ]
+        if handles:
+            self.ax.legend(handles, [line.get_label() for line in handles], loc=self.lgd_pos or "best")
+
+        # rescale to the isotherms only, at full resolution
+        self.restore_lines()
+        for line in self.kept_lines.values():
+            line.set_visible(False)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale()
+        for line in self.kept_lines.values():
+            line.set_visible(True)
+
+    def _branch_count(self, isotherm):
+        """Number of lines pyGAPS plots for an isotherm on the main axis."""
+        count = 0
+        if self._branch in ("ads", "all") and isotherm.has_branch("ads"):
+            count += 1
+        if self._branch in ("des", "all") and isotherm.has_branch("des"):
+            count += 1
+        return count
+
+    @staticmethod
+    def _iso_style(index):
+        """Colour and marker pyGAPS assigns to the n-th isotherm of a graph."""
+        return (
+            Y1_COLORS[index % len(Y1_COLORS)],
+            ISO_MARKERS[index // len(Y1_COLORS) % len(ISO_MARKERS)],
+        )
+
+    def plot_units(self):
+        """Units used for the plot, which default to those of the first isotherm."""
+        reference = self.isotherms[0] if self.isotherms else None
+        units = {}
+        for name in (
+            "pressure_mode",
+            "pressure_unit",
+            "loading_basis",
+            "loading_unit",
+            "material_basis",
+            "material_unit",
+        ):
+            value = getattr(self, name)
+            if value is None and reference is not None:
+                value = getattr(reference, name)
+            units[name] = value
+        return units
+
+    def draw_state(self):
+        """All display settings which affect every isotherm line."""
+        return (
+            self._branch,
+            self.logx,
+            self.logy,
+            self.x_data,
+            self.y1_data,
+            self.y2_data,
+            tuple(self.lgd_keys or []),
+            tuple(self.plot_units().values()),
+        )
+
+    @staticmethod
+    def iso_signature(isotherm):
+        """Cheap summary of an isotherm, which changes if its plot would."""
+        return (
+            isotherm.pressure_mode,
+            isotherm.pressure_unit,
+            isotherm.loading_basis,
+            isotherm.loading_unit,
+            isotherm.material_basis,
+            isotherm.material_unit,
+            str(isotherm.material),
+            str(isotherm.adsorbate),
+            isotherm.temperature,
+            id(getattr(isotherm, "data_raw", None)),
+            id(getattr(isotherm, "model", None)),
+            getattr(isotherm, "branch", None),
+        )
+
+    def invalidate(self, isotherm=None):
+        """Force an isotherm (or all of them) to be replotted on the next draw."""
+        if self._iso_lines is None:
+            return
+        if isotherm is None:
+            self._draw_state = None
+            return
+        entry = self._iso_lines.get(id(isotherm))
+        if entry:
+            self._iso_lines[id(isotherm)] = (entry[0], None, entry[2], entry[3])
+
+    def decimate_lines(self):
+        """
+        Display very long lines with a reduced number of points.
+
+        The full resolution data of each line is stored, and
+        only the minimum and maximum of each pixel column in the current
+        view are plotted. Isotherms themselves are never modified.
+        """
+        for ax in self.figure.axes:
+            if ax is not self.ax and not getattr(ax, "_lod_connected", False):
+                # secondary axes zoom without notifying the main one
+                ax.callbacks.connect("xlim_changed", self.update_lod)
+                ax._lod_connected = True
+        lines = [line for ax in self.figure.axes for line in ax.get_lines()]
+        self._lod_data = {line: data for line, data in self._lod_data.items() if line.axes is not None}
+        for line in lines:
+            if line in self._lod_data or len(line.get_xdata()) <= self.lod_points:
+                continue
+            try:
+                self._lod_data[line] = (
+                    numpy.asarray(line.get_xdata(), dtype=float),
+                    numpy.asarray(line.get_ydata(), dtype=float),
+                )
+            except (TypeError, ValueError):
+                continue  # not numerical, leave as is
+        self.update_lod()
+
+    def update_lod(self, *args):
+        """Decimate long lines for the current view, called on zoom, pan and resize."""
+        if not self._lod_data:
+            return
+        low, high = sorted(self.ax.get_xlim())
+        buckets = max(int(self.ax.bbox.width), 100)
+        for line, (x, y) in self._lod_data.items():
+            keep = minmax_indices(x, y, low, high, buckets)
+            line.set_data(x[keep], y[keep])
+
+    def restore_lines(self):
+        """Put back the full resolution data of decimated lines."""
+        for line, (x, y) in self._lod_data.items():
+            line.set_data(x, y)
+
+    def clear(self):
+        """Also forget the lines kept for incremental redraws."""
+        super().clear()
+        self._iso_lines = None
+        self._draw_state = None
+        self._lod_data = {}
+
+    def set_line(self, key, x, y, **kwargs):
+        """Also forget the full resolution data of a reused line, which is replaced."""
+        line = self.kept_lines.get(key)
+        if line is not None:
+            self._lod_data.pop(line, None)
+        super().set_line(key, x, y, **kwargs)
+
     @property
     def branch(self):
         return self._branch
@@ -146,16 +402,20 @@ class IsoGraphView(GraphView):
             self.x_upper.set_xdata([self.x_range[1], self.x_range[1]])
 
     def state_pressure(self, iso):
-        """Shortcut function to get isotherm pressure."""
-        return iso.pressure(
+        """Shortcut function to get isotherm pressure, converted once per isotherm state."""
+        return converted(
+            iso,
+            "pressure",
             branch=self._branch,
             pressure_mode=self.pressure_mode,
             pressure_unit=self.pressure_unit,
         )
 
     def state_loading(self, iso):
-        """Shortcut function to get isotherm loading."""
-        return iso.loading(
+        """Shortcut function to get isotherm loading, converted once per isotherm state."""
+        return converted(
+            iso,
+            "loading",
             branch=self._branch,
             loading_basis=self.loading_basis,
             loading_unit=self.loading_unit,
@@ -219,11 +479,26 @@ class IsoListGraphView(IsoGraphView):
     def setModel(self, model):
         """Connects the IsoListModel to the View."""
         self.model = model
-        self.model.checked_changed.connect(self.update)
+        self.model.checked_delta.connect(self.update_checked)
 
     def update(self):
         """Updates the isotherms to those selected by the model."""
-        self.set_isotherms(self.model.get_checked())
+        checked = self.model.get_checked()
+        shown = {id(iso) for iso in checked}
+        # keep the display order (and therefore the colours) of plotted isotherms
+        isotherms = [iso for iso in self.isotherms or [] if id(iso) in shown]
+        plotted = {id(iso) for iso in isotherms}
+        isotherms.extend(iso for iso in checked if id(iso) not in plotted)
+        self.set_isotherms(isotherms)
+        self.draw_isotherms()
+
+    def update_checked(self, checked, unchecked):
+        """Add or remove isotherms which were (un)checked, without querying the whole model."""
+        removed = {id(iso) for iso in unchecked}
+        isotherms = [iso for iso in self.isotherms or [] if id(iso) not in removed]
+        plotted = {id(iso) for iso in isotherms}
+        isotherms.extend(iso for iso in checked if id(iso) not in plotted)
+        self.set_isotherms(isotherms)
         self.draw_isotherms()
 
 
@@ -264,4 +539,5 @@ class IsoModelGraphView(IsoGraphView):
                     **points_dict,
                 )
             self.ax.autoscale()
+        self.decimate_lines()
         self.canvas.draw_idle()
@@ -52,7 +52,23 @@ class IsoModelGuessDialog(QW.QDialog):
         self.calc_auto_button = QW.QPushButton()
         self.calc_auto_button.setDefault(True)
         self.calc_auto_button.setAutoDefault(True)
-        self.options_layout.addWidget(self.calc_auto_button)
+        self.calc_stop_button = QW.QPushButton()
+        self.calc_stop_button.setEnabled(False)
+        button_layout = QW.QHBoxLayout()
+        button_layout.addWidget(self.calc_auto_button)
+        button_layout.addWidget(self.calc_stop_button)
+        self.options_layout.addLayout(button_layout)
+
+        # Fit ranking
+        self.ranking_label = QW.QLabel()
+        self.options_layout.addWidget(self.ranking_label)
+        self.ranking_table = QW.QTableWidget(0, 3)
+        self.ranking_table.setEditTriggers(QW.QAbstractItemView.NoEditTriggers)
+        self.ranking_table.setSelectionBehavior(QW.QAbstractItemView.SelectRows)
+        self.ranking_table.setSelectionMode(QW.QAbstractItemView.SingleSelection)
+        self.ranking_table.verticalHeader().setVisible(False)
+        self.ranking_table.horizontalHeader().setStretchLastSection(True)
+        self.options_layout.addWidget(self.ranking_table)
 
         # Output log
         self.output_label = QW.QLabel("Output log:")
@@ -86,4 +102,11 @@ class IsoModelGuessDialog(QW.QDialog):
         # pylint: disable=line-too-long
         self.setWindowTitle(QW.QApplication.translate("IsoModelGuessDialog", "Isotherm model fitting", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("IsoModelGuessDialog", "Fit selected models", None, -1))
+        self.calc_stop_button.setText(QW.QApplication.translate("IsoModelGuessDialog", "Stop", None, -1))
+        self.ranking_label.setText(QW.QApplication.translate("IsoModelGuessDialog", "Fitted models:", None, -1))
+        self.ranking_table.setHorizontalHeaderLabels([
+            QW.QApplication.translate("IsoModelGuessDialog", "Model", None, -1),
+            QW.QApplication.translate("IsoModelGuessDialog", "RMSE", None, -1),
+            QW.QApplication.translate("IsoModelGuessDialog", "Status", None, -1),
+        ])
         # yapf: enable
@@ -52,6 +52,19 @@ class IsostericDialog(QW.QDialog):
         self.calc_auto_button.setAutoDefault(True)
         self.options_layout.addWidget(self.calc_auto_button, 3, 0, 1, 2)
 
+        # Bootstrap confidence bands
+        self.bootstrap_label = LabelAlignRight("Bootstrap resamples:")
+        self.bootstrap_input = QW.QSpinBox()
+        self.bootstrap_input.setRange(100, 100000)
+        self.bootstrap_input.setSingleStep(500)
+        self.options_layout.addWidget(self.bootstrap_label, 4, 0, 1, 1)
+        self.options_layout.addWidget(self.bootstrap_input, 4, 1, 1, 1)
+        self.bootstrap_button = QW.QPushButton()
+        self.options_layout.addWidget(self.bootstrap_button, 5, 0, 1, 2)
+        self.progress_bar = QW.QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.options_layout.addWidget(self.progress_bar, 6, 0, 1, 2)
+
         # Results graph box
         self.results_layout = QW.QGridLayout(self.results_box)
 
@@ -88,4 +101,5 @@ class IsostericDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("IsostericDialog", "Options", None, -1))
         self.results_box.setTitle(QW.QApplication.translate("IsostericDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("IsostericDialog", "Full range calculation", None, -1))
+        self.bootstrap_button.setText(QW.QApplication.translate("IsostericDialog", "Confidence bands (bootstrap)", None, -1))
         # yapf: enable
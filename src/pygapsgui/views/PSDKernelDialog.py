@@ -46,33 +46,55 @@ class PSDKernelDialog(QW.QDialog):
         self.branch_label = LabelAlignRight("Branch used:")
         self.branch_dropdown = QW.QComboBox()
         self.options_sub_layout.addWidget(self.branch_label, 0, 0, 1, 1)
-        self.options_sub_layout.addWidget(self.branch_dropdown, 0, 1, 1, 1)
+        self.options_sub_layout.addWidget(self.branch_dropdown, 0, 1, 1, 2)
 
         ## Kernel model
         self.kernel_label = LabelAlignRight("Kernel used:")
         self.kernel_dropdown = QW.QComboBox()
         self.options_sub_layout.addWidget(self.kernel_label, 1, 0, 1, 1)
         self.options_sub_layout.addWidget(self.kernel_dropdown, 1, 1, 1, 1)
+        self.kernel_add_button = QW.QPushButton()
+        self.options_sub_layout.addWidget(self.kernel_add_button, 1, 2, 1, 1)
 
         ## spline smoothing
         self.smooth_label = LabelAlignRight("Spline fit order:")
         self.smooth_input = QW.QSpinBox()
         self.smooth_input.setMinimum(0)
         self.options_sub_layout.addWidget(self.smooth_label, 2, 0, 1, 1)
-        self.options_sub_layout.addWidget(self.smooth_input, 2, 1, 1, 1)
+        self.options_sub_layout.addWidget(self.smooth_input, 2, 1, 1, 2)
+
+        ## regularisation
+        self.regularisation_label = LabelAlignRight("Regularisation:")
+        self.regularisation_input = QW.QDoubleSpinBox()
+        self.regularisation_input.setDecimals(6)
+        self.regularisation_input.setRange(0, 1)
+        self.regularisation_input.setSingleStep(0.001)
+        self.options_sub_layout.addWidget(self.regularisation_label, 3, 0, 1, 1)
+        self.options_sub_layout.addWidget(self.regularisation_input, 3, 1, 1, 2)
 
         ## Autodetermine
         self.calc_auto_button = QW.QPushButton()
         self.calc_auto_button.setDefault(True)
         self.calc_auto_button.setAutoDefault(True)
-        self.options_sub_layout.addWidget(self.calc_auto_button, 3, 0, 1, 2)
+        self.options_sub_layout.addWidget(self.calc_auto_button, 4, 0, 1, 3)
+
+        ## Regularisation sweep
+        self.calc_sweep_button = QW.QPushButton()
+        self.options_sub_layout.addWidget(self.calc_sweep_button, 5, 0, 1, 3)
 
         # Results graph box
         self.res_graphs_layout = QW.QVBoxLayout(self.res_graphs_box)
+        self.res_graphs_tab = QW.QTabWidget()
+        self.res_graphs_layout.addWidget(self.res_graphs_tab)
 
         ## PSD graph
         self.res_graph = GraphView()
-        self.res_graphs_layout.addWidget(self.res_graph)
+        self.res_graphs_tab.addTab(self.res_graph, "Distribution")
+
+        ## L-curve graph
+        self.lcurve_graph = GraphView()
+        self.lcurve_graph.setObjectName("lcurve_graph")
+        self.res_graphs_tab.addTab(self.lcurve_graph, "L-curve")
 
         # Bottom buttons
         self.button_box = QW.QDialogButtonBox()
@@ -101,4 +123,8 @@ class PSDKernelDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("PSDKernelDialog", "Options", None, -1))
         self.res_graphs_box.setTitle(QW.QApplication.translate("PSDKernelDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("PSDKernelDialog", "Calculate", None, -1))
+        self.calc_sweep_button.setText(QW.QApplication.translate("PSDKernelDialog", "Find regularisation (L-curve)", None, -1))
+        self.regularisation_input.setToolTip(QW.QApplication.translate("PSDKernelDialog", "Strength of the smoothing of the distribution, relative to the kernel. Zero for none.", None, -1))
+        self.kernel_add_button.setText(QW.QApplication.translate("PSDKernelDialog", "Add...", None, -1))
+        self.kernel_add_button.setToolTip(QW.QApplication.translate("PSDKernelDialog", "Add a kernel from a .csv file, with the same layout as the pyGAPS kernels.", None, -1))
         # yapf: enable
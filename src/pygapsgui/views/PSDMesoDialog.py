@@ -84,12 +84,36 @@ class PSDMesoDialog(QW.QDialog):
         self.calc_auto_button.setAutoDefault(True)
         self.options_sub_layout.addWidget(self.calc_auto_button, 6, 0, 1, 2)
 
+        # Compare all combinations
+        self.calc_compare_button = QW.QPushButton()
+        self.options_sub_layout.addWidget(self.calc_compare_button, 7, 0, 1, 2)
+
         # Results graph box
         self.res_graphs_layout = QW.QVBoxLayout(self.res_graphs_box)
+        self.res_graphs_tab = QW.QTabWidget()
+        self.res_graphs_layout.addWidget(self.res_graphs_tab)
 
         ## PSD graph
         self.res_graph = GraphView()
-        self.res_graphs_layout.addWidget(self.res_graph)
+        self.res_graphs_tab.addTab(self.res_graph, "Distribution")
+
+        ## Comparison tab
+        self.compare_widget = QW.QWidget()
+        self.compare_layout = QW.QHBoxLayout(self.compare_widget)
+        self.res_graphs_tab.addTab(self.compare_widget, "Comparison")
+
+        ## Overlay of best PSDs
+        self.compare_graph = GraphView()
+        self.compare_graph.setObjectName("compare_graph")
+        self.compare_layout.addWidget(self.compare_graph, 3)
+
+        ## Ranking of combinations
+        self.compare_table = QW.QTableWidget(0, 6)
+        self.compare_table.setSelectionBehavior(QW.QAbstractItemView.SelectRows)
+        self.compare_table.setSelectionMode(QW.QAbstractItemView.SingleSelection)
+        self.compare_table.setEditTriggers(QW.QAbstractItemView.NoEditTriggers)
+        self.compare_table.verticalHeader().setVisible(False)
+        self.compare_layout.addWidget(self.compare_table, 2)
 
         # Bottom buttons
         self.button_box = QW.QDialogButtonBox()
@@ -118,4 +142,13 @@ class PSDMesoDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("PSDMesoDialog", "Options", None, -1))
         self.res_graphs_box.setTitle(QW.QApplication.translate("PSDMesoDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("PSDMesoDialog", "Calculate", None, -1))
+        self.calc_compare_button.setText(QW.QApplication.translate("PSDMesoDialog", "Compare all", None, -1))
+        self.compare_table.setHorizontalHeaderLabels([
+            QW.QApplication.translate("PSDMesoDialog", "PSD model", None, -1),
+            QW.QApplication.translate("PSDMesoDialog", "Pore geometry", None, -1),
+            QW.QApplication.translate("PSDMesoDialog", "Meniscus", None, -1),
+            QW.QApplication.translate("PSDMesoDialog", "Thickness", None, -1),
+            QW.QApplication.translate("PSDMesoDialog", "Kelvin", None, -1),
+            QW.QApplication.translate("PSDMesoDialog", "Fit error", None, -1),
+        ])
         # yapf: enable
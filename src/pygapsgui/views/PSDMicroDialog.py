@@ -72,12 +72,36 @@ class PSDMicroDialog(QW.QDialog):
         self.calc_auto_button.setAutoDefault(True)
         self.options_sub_layout.addWidget(self.calc_auto_button, 4, 0, 1, 2)
 
+        # Compare all combinations
+        self.calc_compare_button = QW.QPushButton()
+        self.options_sub_layout.addWidget(self.calc_compare_button, 5, 0, 1, 2)
+
         # Results graph box
         self.res_graphs_layout = QW.QVBoxLayout(self.res_graphs_box)
+        self.res_graphs_tab = QW.QTabWidget()
+        self.res_graphs_layout.addWidget(self.res_graphs_tab)
 
         ## PSD graph
         self.res_graph = GraphView()
-        self.res_graphs_layout.addWidget(self.res_graph)
+        self.res_graphs_tab.addTab(self.res_graph, "Distribution")
+
+        ## Comparison tab
+        self.compare_widget = QW.QWidget()
+        self.compare_layout = QW.QHBoxLayout(self.compare_widget)
+        self.res_graphs_tab.addTab(self.compare_widget, "Comparison")
+
+        ## Overlay of all PSDs
+        self.compare_graph = GraphView()
+        self.compare_graph.setObjectName("compare_graph")
+        self.compare_layout.addWidget(self.compare_graph, 3)
+
+        ## Table of combinations
+        self.compare_table = QW.QTableWidget(0, 4)
+        self.compare_table.setSelectionBehavior(QW.QAbstractItemView.SelectRows)
+        self.compare_table.setSelectionMode(QW.QAbstractItemView.SingleSelection)
+        self.compare_table.setEditTriggers(QW.QAbstractItemView.NoEditTriggers)
+        self.compare_table.verticalHeader().setVisible(False)
+        self.compare_layout.addWidget(self.compare_table, 2)
 
         # Bottom buttons
         self.button_box = QW.QDialogButtonBox()
@@ -106,4 +130,11 @@ class PSDMicroDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("PSDMicroDialog", "Options", None, -1))
         self.res_graphs_box.setTitle(QW.QApplication.translate("PSDMicroDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("PSDMicroDialog", "Calculate", None, -1))
+        self.calc_compare_button.setText(QW.QApplication.translate("PSDMicroDialog", "Compare all", None, -1))
+        self.compare_table.setHorizontalHeaderLabels([
+            QW.QApplication.translate("PSDMicroDialog", "PSD model", None, -1),
+            QW.QApplication.translate("PSDMicroDialog", "Pore geometry", None, -1),
+            QW.QApplication.translate("PSDMicroDialog", "Surface model", None, -1),
+            QW.QApplication.translate("PSDMicroDialog", "Median width [nm]", None, -1),
+        ])
         # yapf: enable
@@ -39,28 +39,34 @@ class PlotAlphaSDialog(QW.QDialog):
         self.branch_dropdown = QW.QComboBox()
         self.options_layout.addWidget(self.branch_dropdown, 1, 1, 1, 2)
 
-        self.options_layout.addWidget(LabelAlignRight("Reference isotherm branch:"), 2, 0, 1, 1)
+        self.options_layout.addWidget(LabelAlignRight("Reference isotherm:"), 2, 0, 1, 1)
+        self.reference_dropdown = QW.QComboBox()
+        self.reference_save_button = QW.QPushButton()
+        self.options_layout.addWidget(self.reference_dropdown, 2, 1, 1, 2)
+        self.options_layout.addWidget(self.reference_save_button, 2, 3, 1, 1)
+
+        self.options_layout.addWidget(LabelAlignRight("Reference isotherm branch:"), 3, 0, 1, 1)
         self.refbranch_dropdown = QW.QComboBox()
-        self.options_layout.addWidget(self.refbranch_dropdown, 2, 1, 1, 2)
+        self.options_layout.addWidget(self.refbranch_dropdown, 3, 1, 1, 2)
 
         self.refarea_label = LabelAlignRight("Reference material area:")
         self.refarea_dropdown = QW.QComboBox()
         self.refarea_dropdown.addItems(["BET", "Langmuir", "specify"]),
         self.refarea_input = QW.QLineEdit(self)
         self.refarea_input.setReadOnly(True)
-        self.options_layout.addWidget(self.refarea_label, 3, 0, 1, 1)
-        self.options_layout.addWidget(self.refarea_dropdown, 3, 1, 1, 2)
-        self.options_layout.addWidget(self.refarea_input, 3, 3, 1, 1)
+        self.options_layout.addWidget(self.refarea_label, 4, 0, 1, 1)
+        self.options_layout.addWidget(self.refarea_dropdown, 4, 1, 1, 2)
+        self.options_layout.addWidget(self.refarea_input, 4, 3, 1, 1)
 
-        self.options_layout.addWidget(LabelAlignRight("Reducing pressure:"), 4, 0, 1, 1)
+        self.options_layout.addWidget(LabelAlignRight("Reducing pressure:"), 5, 0, 1, 1)
         self.pressure_input = QW.QLineEdit(self)
         self.pressure_input.setText(str(0.4))
-        self.options_layout.addWidget(self.pressure_input, 4, 1, 1, 2)
+        self.options_layout.addWidget(self.pressure_input, 5, 1, 1, 2)
 
         self.calc_auto_button = QW.QPushButton()
         self.calc_auto_button.setDefault(True)
         self.calc_auto_button.setAutoDefault(True)
-        self.options_layout.addWidget(self.calc_auto_button, 4, 3, 1, 1)
+        self.options_layout.addWidget(self.calc_auto_button, 5, 3, 1, 1)
 
         # Results box
         self.res_text_layout = QW.QGridLayout(self.res_text_box)
@@ -102,4 +108,5 @@ class PlotAlphaSDialog(QW.QDialog):
         self.options_box.setTitle(QW.QApplication.translate("PlotAlphaSDialog", "Options", None, -1))
         self.res_text_box.setTitle(QW.QApplication.translate("PlotAlphaSDialog", "Results", None, -1))
         self.calc_auto_button.setText(QW.QApplication.translate("PlotAlphaSDialog", "Auto-calculate", None, -1))
+        self.reference_save_button.setText(QW.QApplication.translate("PlotAlphaSDialog", "Save to library", None, -1))
         # yapf: enable
@@ -43,6 +43,7 @@ class QRangeSlider(QW.QWidget):
     """
     doubleClick = QC.Signal(bool)
     rangeChanged = QC.Signal(float, float)
+    rangeMoving = QC.Signal(float, float)  # emitted on every mouse move
 
     start: float = None  # slider lower bound
     end: float = None  # slider upper lower
@@ -92,6 +93,13 @@ class QRangeSlider(QW.QWidget):
             self.old_min_val = self.min_val
             self.old_max_val = self.max_val
 
+    def emitMoving(self):
+        """Emits the rangeMoving signal, for live feedback while dragging."""
+        self.rangeMoving.emit(
+            self.unscale_fun(self.min_val),
+            self.unscale_fun(self.max_val),
+        )
+
     def getValues(self):
         """@return [current minimum, current maximum]."""
         return [self.min_val, self.max_val]
@@ -160,6 +168,7 @@ class QRangeSlider(QW.QWidget):
                 if self.display_max < self.display_min:
                     self.display_max = self.display_min
                 self.updateScaleValues()
+                self.emitMoving()
                 if self.emit_while_moving:
                     self.emitRange()
 
@@ -170,6 +179,7 @@ class QRangeSlider(QW.QWidget):
                 if self.display_max < self.display_min:
                     self.display_min = self.display_max
                 self.updateScaleValues()
+                self.emitMoving()
                 if self.emit_while_moving:
                     self.emitRange()
 
@@ -181,6 +191,7 @@ class QRangeSlider(QW.QWidget):
                 self.display_min = temp
                 self.display_max = self.start_display_max - diff
                 self.updateScaleValues()
+                self.emitMoving()
                 if self.emit_while_moving:
                     self.emitRange()
 
@@ -505,6 +516,7 @@ class QSpinBoxRangeSlider(QW.QWidget):
         self.range_slider.doubleClick.connect(self.handleDoubleClick)
         self.range_slider.rangeChanged.connect(self.handleRangeChange)
         self.rangeChanged = self.range_slider.rangeChanged
+        self.rangeMoving = self.range_slider.rangeMoving
 
     def setupSpinboxes(self):
         """Turn off signals and setup spinboxes."""
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from pygapsgui.utilities.adaptive_curve import PointStore
+from pygapsgui.utilities.adaptive_curve import nearest
+from pygapsgui.utilities.adaptive_curve import point_key
+from pygapsgui.utilities.adaptive_curve import refine
+
+
+def test_point_key_ignores_rounding():
+    assert point_key(0.1 + 0.2) == point_key(0.3)
+
+
+def test_store_keeps_points():
+    store = PointStore()
+    curve = store.curve(("a", 1))
+    curve[0.5] = 1
+    assert store.curve(("a", 1)) is curve
+    assert store.curve(("a", 2)) == {}
+
+
+def test_store_evicts_least_recently_used():
+    store = PointStore(size=2)
+    store.curve("first")[0] = 1
+    store.curve("second")[0] = 2
+    store.curve("first")  # now the most recently used
+    store.curve("third")
+    assert store.curve("first") == {0: 1}
+    assert store.curve("second") == {}
+
+
+def test_nearest_skips_failed_points():
+    points = {0.1: np.array([1, 2]), 0.5: np.array([np.nan, np.nan]), 0.9: np.array([3, 4])}
+    assert np.array_equal(nearest(points, 0.45), [1, 2])
+    assert np.array_equal(nearest(points, 0.8), [3, 4])
+    assert nearest({}, 0.5) is None
+
+
+def test_refine_straight_line():
+    x = np.linspace(0, 1, 11)
+    assert refine(x, 2 * x + 1) == []
+
+
+def test_refine_splits_around_bend():
+    x = np.linspace(0, 1, 11)
+    y = np.minimum(x, 0.5)
+    new = refine(x, y)
+    # only the two intervals next to the kink
+    assert sorted(new) == pytest.approx([0.45, 0.55])
+
+
+def test_refine_most_bent_first():
+    x = np.linspace(0, 1, 11)
+    y = np.minimum(x, 0.5) + np.where(x > 0.85, 0.5 * (x - 0.85), 0)
+    new = refine(x, y)
+    assert sorted(new[:2]) == pytest.approx([0.45, 0.55])
+    assert len(new) > 2
+
+
+def test_refine_resolution():
+    x = np.array([0, 1e-4, 2e-4, 1])
+    y = np.array([0, 1, 0, 0])
+    # the narrow intervals around the spike are not split
+    assert refine(x, y) == pytest.approx([0.5001])
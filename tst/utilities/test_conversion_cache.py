@@ -0,0 +1,61 @@
+import pathlib
+
+import numpy as np
+import pytest
+
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.conversion_cache import converted
+from pygapsgui.utilities.conversion_cache import modified
+from pygapsgui.utilities.conversion_cache import version
+
+DATA = pathlib.Path(__file__).parents[1] / "json"
+
+
+@pytest.fixture
+def isotherm():
+    return isotherm_from_json((DATA / "SiO2 N2 77.json").read_text())
+
+
+def test_same_as_isotherm(isotherm):
+    pressure = converted(isotherm, "pressure", pressure_mode="relative")
+    assert np.allclose(pressure, isotherm.pressure(pressure_mode="relative"))
+    loading = converted(isotherm, "loading", branch="des", loading_unit="mol")
+    assert np.allclose(loading, isotherm.loading(branch="des", loading_unit="mol"))
+
+
+def test_repeated_call_is_shared(isotherm):
+    pressure = converted(isotherm, "pressure", branch="ads")
+    assert converted(isotherm, "pressure", branch="ads") is pressure
+    # None arguments are the same as not passing them
+    assert converted(isotherm, "pressure", branch="ads", limits=None) is pressure
+    with pytest.raises(ValueError):
+        pressure[0] = 1
+
+
+def test_different_arguments(isotherm):
+    absolute = converted(isotherm, "pressure")
+    relative = converted(isotherm, "pressure", pressure_mode="relative")
+    assert relative is not absolute
+    limited = converted(isotherm, "pressure", limits=[0.1, 0.5])
+    assert np.all((limited >= 0.1) & (limited <= 0.5))
+
+
+def test_unit_change(isotherm):
+    before = converted(isotherm, "pressure")
+    isotherm.convert_pressure(unit_to="kPa")
+    after = converted(isotherm, "pressure")
+    assert after is not before
+    assert after == pytest.approx(before * 100)
+
+
+def test_modified(isotherm):
+    loading = converted(isotherm, "loading")
+    start = version(isotherm)
+    modified(isotherm)
+    assert version(isotherm) == start + 1
+    assert converted(isotherm, "loading") is not loading
+
+
+def test_isotherm_data_stays_writeable(isotherm):
+    converted(isotherm, "loading")
+    assert isotherm.loading().flags.writeable
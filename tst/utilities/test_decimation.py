@@ -0,0 +1,48 @@
+import numpy as np
+
+from pygapsgui.utilities.decimation import minmax_indices
+
+X = np.linspace(0, 1, 10000)
+Y = np.sin(50 * X)
+
+
+def test_few_points_are_all_kept():
+    x = np.linspace(0, 1, 11)
+    assert np.array_equal(minmax_indices(x, x, buckets=10), np.arange(11))
+    # with the neighbours outside the range
+    assert np.array_equal(minmax_indices(x, x, low=0.25, high=0.55, buckets=10), np.arange(2, 7))
+
+
+def test_empty_range():
+    assert len(minmax_indices(X, Y, low=2, high=3)) == 0
+
+
+def test_many_points_keep_envelope():
+    y = Y.copy()
+    y[1234] = 10
+    y[5678] = -10
+    indices = minmax_indices(X, y, buckets=100)
+    assert len(indices) <= 4 * 100 + 2
+    assert np.all(np.diff(indices) > 0)
+    assert {0, 1234, 5678, len(X) - 1} <= set(indices)
+    # every bucket keeps its extremes
+    for bucket in np.arange(len(X)).reshape(100, -1):
+        assert bucket[y[bucket].argmax()] in indices
+        assert bucket[y[bucket].argmin()] in indices
+
+
+def test_range_keeps_neighbours():
+    indices = minmax_indices(X, Y, low=0.2, high=0.6, buckets=100)
+    visible = np.flatnonzero((X >= 0.2) & (X <= 0.6))
+    assert indices[0] == visible[0] - 1
+    assert indices[-1] == visible[-1] + 1
+    assert visible[0] in indices and visible[-1] in indices
+
+
+def test_missing_values_are_not_extremes():
+    y = Y.copy()
+    y[:100] = np.nan
+    indices = minmax_indices(X, y, buckets=100)
+    first_bucket = [index for index in indices if index < 100]
+    assert first_bucket == [0]
+    assert len(indices) > 2
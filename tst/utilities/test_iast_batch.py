@@ -0,0 +1,58 @@
+import pathlib
+
+import numpy as np
+import pytest
+
+from pygaps.iast.pgiast import iast_point_fraction
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.iast_batch import iast_rows
+from pygapsgui.utilities.iast_batch import solve_point
+from pygapsgui.utilities.iast_batch import split_rows
+
+DATA = pathlib.Path(__file__).parents[1] / "json"
+
+
+@pytest.fixture
+def isotherms():
+    return [isotherm_from_json((DATA / f"MOF-5(Zn) {gas} 303.json").read_text()) for gas in ("CH4", "C2H6")]
+
+
+@pytest.mark.parametrize(
+    "nrows, chunks, expected", [
+        (10, 3, [(0, 4), (4, 8), (8, 10)]),
+        (9, 3, [(0, 3), (3, 6), (6, 9)]),
+        (2, 4, [(0, 1), (1, 2)]),
+        (5, 0, [(0, 5)]),
+        (0, 3, []),
+    ]
+)
+def test_split_rows(nrows, chunks, expected):
+    assert split_rows(nrows, chunks) == expected
+
+
+@pytest.mark.parametrize("fraction, pressure", [([0.5, 0.5], 1), ([0.2, 0.8], 5), ([0.9, 0.1], 20)])
+def test_solve_point_matches_pygaps(isotherms, fraction, pressure):
+    expected = iast_point_fraction(isotherms, fraction, pressure)
+    assert solve_point(isotherms, fraction, pressure) == pytest.approx(expected)
+    # starting from a close guess gives the same result
+    guess = expected / np.sum(expected)
+    assert solve_point(isotherms, fraction, pressure, guess=guess * 0.99 + 0.005) == pytest.approx(expected, rel=1e-4)
+
+
+def test_bad_guess_is_retried(isotherms):
+    guess = [1e-9, 1 - 1e-9]
+    with pytest.raises(Exception):
+        iast_point_fraction(isotherms, [0.5, 0.5], 1, adsorbed_mole_fraction_guess=guess)
+    expected = iast_point_fraction(isotherms, [0.5, 0.5], 1)
+    assert solve_point(isotherms, [0.5, 0.5], 1, guess=guess) == pytest.approx(expected)
+
+
+def test_rows(isotherms):
+    fractions = np.array([[0.5, 0.5], [0.4, 0.6], [0.3, 0.7]])
+    pressures = np.array([1, 1, 1e6])
+    loadings, errors, _ = iast_rows(isotherms, fractions, pressures)
+    for row in range(2):
+        assert loadings[row] == pytest.approx(iast_point_fraction(isotherms, fractions[row], 1), rel=1e-4)
+    # a failed row does not stop the others
+    assert np.all(np.isnan(loadings[2]))
+    assert [row for row, _ in errors] == [2]
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import pygaps
+from pygaps.characterisation.isosteric_enth import isosteric_enthalpy
+from pygaps.utilities.exceptions import CalculationError
+from pygaps.utilities.exceptions import ParameterError
+from pygapsgui.utilities.conversion_cache import modified
+from pygapsgui.utilities.isosteric_cache import PointInverse
+from pygapsgui.utilities.isosteric_cache import clausius_clapeyron
+from pygapsgui.utilities.isosteric_cache import inverse_isotherm
+from pygapsgui.utilities.isosteric_cache import isosteric_enthalpy_at
+from pygapsgui.utilities.isosteric_cache import loading_range
+
+PRESSURE = np.linspace(0.05, 10, 40)
+TEMPERATURES = [280, 300, 320]
+
+
+def langmuir(temperature, material="Test"):
+    """Langmuir isotherm with an enthalpy of adsorption of 20 kJ/mol."""
+    K = 1e-3 * np.exp(20000 / (8.314 * temperature))
+    return pygaps.PointIsotherm(
+        pressure=PRESSURE,
+        loading=5 * K * PRESSURE / (1 + K * PRESSURE),
+        m=material,
+        a="N2",
+        t=temperature,
+    )
+
+
+@pytest.fixture
+def isotherms():
+    return [langmuir(temperature) for temperature in TEMPERATURES]
+
+
+def test_point_isotherms_match_pygaps(isotherms):
+    points = np.linspace(*loading_range(isotherms, "ads"), 20)
+    expected = isosteric_enthalpy(isotherms, loading_points=points)
+    results = isosteric_enthalpy_at(isotherms, points)
+    for key, value in expected.items():
+        assert results[key] == pytest.approx(value)
+
+
+def test_model_isotherms_match_pygaps(isotherms):
+    models = [pygaps.ModelIsotherm.from_pointisotherm(iso, model="Langmuir") for iso in isotherms]
+    points = np.linspace(0.5, 2, 10)
+    expected = isosteric_enthalpy(models, loading_points=points)
+    results = isosteric_enthalpy_at(models, points)
+    for key in ['loading', 'isosteric_enthalpy', 'slopes', 'correlation']:
+        assert results[key] == pytest.approx(expected[key])
+    # the points are on a line, the errors are only numerical noise
+    assert results['std_errs'] == pytest.approx(expected['std_errs'], abs=1e-6)
+    assert results['isosteric_enthalpy'] == pytest.approx(20, rel=1e-3)
+
+
+def test_point_inverse_does_not_extrapolate():
+    inverse = PointInverse([3, 1, 2], [30, 10, 20])
+    assert inverse.pressure_at([1.5, 2.5]) == pytest.approx([15, 25])
+    for point in [0.5, 3.5]:
+        with pytest.raises(CalculationError):
+            inverse.pressure_at(point)
+
+
+def test_model_inverse_remembers_points(isotherms):
+    model = pygaps.ModelIsotherm.from_pointisotherm(isotherms[0], model="Langmuir")
+    inverse = inverse_isotherm(model, "ads", model.loading_unit, model.material_unit)
+    assert inverse.pressure_at([1, 2]) == pytest.approx(model.pressure_at([1, 2]))
+    assert len(inverse.points) == 2
+    inverse.pressure_at([2, 3])
+    assert len(inverse.points) == 3
+
+
+def test_inverse_is_kept_until_modified(isotherms):
+    iso = isotherms[0]
+    inverse = inverse_isotherm(iso, "ads", iso.loading_unit, iso.material_unit)
+    assert inverse_isotherm(iso, "ads", iso.loading_unit, iso.material_unit) is inverse
+    assert inverse_isotherm(iso, "ads", "mol", iso.material_unit) is not inverse
+    modified(iso)
+    assert inverse_isotherm(iso, "ads", iso.loading_unit, iso.material_unit) is not inverse
+
+
+def test_clausius_clapeyron_matches_linregress():
+    rng = np.random.default_rng(0)
+    pressures = rng.uniform(0.1, 10, (5, 3))
+    iso_enth, slopes, correlations, std_errs = clausius_clapeyron(pressures, TEMPERATURES)
+    for row, pressure in enumerate(pressures):
+        expected = stats.linregress(1 / np.asarray(TEMPERATURES), np.log(pressure))
+        assert slopes[row] == pytest.approx(expected.slope)
+        assert correlations[row] == pytest.approx(expected.rvalue)
+        assert iso_enth[row] == pytest.approx(-8.314462618 * expected.slope / 1000)
+        assert std_errs[row] == pytest.approx(8.314462618 * expected.stderr / 1000)
+
+
+def test_check_isotherms(isotherms):
+    with pytest.raises(ParameterError):
+        isosteric_enthalpy_at(isotherms[:1], [1])
+    with pytest.raises(ParameterError):
+        isosteric_enthalpy_at([isotherms[0], langmuir(300, material="Other")], [1])
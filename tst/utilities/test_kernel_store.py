@@ -0,0 +1,106 @@
+import pathlib
+
+import numpy as np
+import pandas
+import pytest
+from scipy import interpolate
+
+import pygaps.characterisation.psd_kernel as psd_kernel
+from pygaps.data import KERNELS
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.kernel_store import kernel_projection
+from pygapsgui.utilities.kernel_store import l_curve_corner
+
+DATA = pathlib.Path(__file__).parents[1] / "json"
+KERNEL = list(KERNELS)[0]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty kernel store in a temporary folder."""
+    monkeypatch.setenv("PYGAPSGUI_KERNEL_DIR", str(tmp_path / "kernels"))
+
+
+@pytest.fixture
+def pygaps_kernel(monkeypatch):
+    """
+    The kernel as loaded by pyGAPS, interpolated the same way.
+
+    pyGAPS reads kernels with ``DataFrame.append``, removed in pandas 2,
+    so it is loaded here and put in the pyGAPS kernel cache.
+    """
+    path = KERNELS[KERNEL]
+    raw_kernel = pandas.read_csv(path, index_col=0)
+    zeros = pandas.DataFrame([np.zeros(len(raw_kernel.columns))], index=[0], columns=raw_kernel.columns)
+    raw_kernel = pandas.concat([raw_kernel, zeros])
+    kernel = {
+        size: interpolate.interp1d(raw_kernel[size].index, raw_kernel[size].values, kind='cubic')
+        for size in raw_kernel
+    }
+    monkeypatch.setitem(psd_kernel._LOADED, path, kernel)
+    return path, kernel
+
+
+@pytest.fixture
+def projection(store):
+    isotherm = isotherm_from_json((DATA / "MCM-41 N2 77.json").read_text())
+    return kernel_projection(isotherm, KERNEL, "ads")
+
+
+def test_projection_matches_pygaps(projection, pygaps_kernel):
+    _, kernel = pygaps_kernel
+    expected = np.asarray([kernel[size](projection.pressure) for size in kernel]).T
+    assert np.allclose(projection.matrix, expected)
+
+
+def test_projection_is_kept(store):
+    isotherm = isotherm_from_json((DATA / "MCM-41 N2 77.json").read_text())
+    assert kernel_projection(isotherm, KERNEL) is kernel_projection(isotherm, KERNEL)
+
+
+@pytest.mark.parametrize("p_limits", [None, (0.05, 0.6)])
+def test_fit_matches_pygaps(projection, pygaps_kernel, p_limits):
+    path, _ = pygaps_kernel
+    results = projection.fit(p_limits=p_limits, bspline_order=2)
+    start, end = results['limits']
+    pressure = projection.pressure[start:end + 1]
+    loading = projection.loading[start:end + 1]
+    pore_widths, _, pore_volume_cumulative, kernel_loading = psd_kernel.psd_dft_kernel_fit(
+        pressure, loading, path, bspline_order=2
+    )
+    assert np.allclose(results['pore_widths'], pore_widths)
+    # the exact least squares solution fits at least as well as the pyGAPS minimiser
+    residual = np.sum((results['kernel_loading'] - loading)**2)
+    assert residual <= np.sum((kernel_loading - loading)**2) * (1 + 1e-6)
+    assert results['kernel_loading'] == pytest.approx(kernel_loading, rel=1e-2, abs=1e-2)
+    assert results['pore_volume_cumulative'][-1] == pytest.approx(pore_volume_cumulative[-1], rel=1e-2)
+
+
+def test_regularisation_smooths(projection):
+    plain = projection.fit()
+    smooth = projection.fit(regularisation=0.1)
+    assert np.all(smooth['pore_distribution'] >= -1e-12)
+    assert np.sum(np.diff(smooth['pore_distribution'])**2) < np.sum(np.diff(plain['pore_distribution'])**2)
+
+
+def test_l_curve_matches_tikhonov(projection):
+    strengths = np.logspace(-6, 0, 7)
+    sweep = projection.l_curve(strengths=strengths)
+    _, block, loading = projection.block()
+    for index, strength in enumerate(strengths):
+        lam = strength * np.linalg.norm(block, 2)
+        solution = np.linalg.lstsq(
+            np.vstack([block, lam * np.eye(block.shape[1])]),
+            np.concatenate([loading, np.zeros(block.shape[1])]),
+            rcond=None,
+        )[0]
+        assert sweep['residual_norm'][index] == pytest.approx(np.linalg.norm(block @ solution - loading))
+        assert sweep['solution_norm'][index] == pytest.approx(np.linalg.norm(solution), rel=1e-6)
+
+
+def test_l_curve_corner():
+    strengths = np.logspace(-6, 0, 61)
+    residual_norm = 1 + (strengths / 1e-3)**2
+    solution_norm = 1 + (1e-3 / strengths)**2
+    assert strengths[l_curve_corner(strengths, residual_norm, solution_norm)] == pytest.approx(1e-3)
+    assert l_curve_corner(strengths[:2], residual_norm[:2], solution_norm[:2]) == 0
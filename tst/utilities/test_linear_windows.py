@@ -0,0 +1,80 @@
+import pathlib
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from pygaps.characterisation.area_bet import area_BET_raw
+from pygaps.characterisation.area_bet import bet_transform
+from pygaps.parsing import isotherm_from_json
+from pygapsgui.utilities.linear_windows import WindowRegression
+from pygapsgui.utilities.linear_windows import limit_window
+from pygapsgui.utilities.linear_windows import window_increasing
+
+DATA = pathlib.Path(__file__).parents[1] / "json"
+
+RNG = np.random.default_rng(0)
+X = np.sort(RNG.uniform(0, 10, 25))
+Y = 3 * X + 2 + RNG.normal(0, 0.5, 25)
+
+
+@pytest.mark.parametrize("start, end", [(0, 24), (0, 2), (5, 17), (20, 24)])
+def test_window_matches_linregress(start, end):
+    slope, intercept, corr_coef = WindowRegression(X, Y).fit(start, end)
+    expected = stats.linregress(X[start:end + 1], Y[start:end + 1])
+    assert slope == pytest.approx(expected.slope)
+    assert intercept == pytest.approx(expected.intercept)
+    assert corr_coef == pytest.approx(expected.rvalue)
+
+
+def test_all_windows():
+    regression = WindowRegression(X, Y)
+    slope, _, _ = regression.fit()
+    assert slope.shape == (25, 25)
+    # too short or reversed windows are not fitted
+    assert np.isnan(slope[3, 4])
+    assert np.isnan(slope[10, 2])
+    assert slope[3, 5] == pytest.approx(stats.linregress(X[3:6], Y[3:6]).slope)
+    assert np.array_equal(np.isnan(regression.points()), np.isnan(slope))
+
+
+def test_invalid_points_only_affect_their_windows():
+    y = Y.copy()
+    y[10] = np.nan
+    slope, _, _ = WindowRegression(X, y).fit()
+    assert np.isnan(slope[8, 12])
+    assert slope[0, 9] == pytest.approx(stats.linregress(X[:10], Y[:10]).slope)
+    assert slope[11, 24] == pytest.approx(stats.linregress(X[11:], Y[11:]).slope)
+
+
+def test_several_datasets():
+    ys = np.stack([Y, 2 * Y, -Y])
+    slope, intercept, _ = WindowRegression(X, ys).fit(4, 15)
+    assert slope.shape == (3, )
+    for row, y in enumerate(ys):
+        expected = stats.linregress(X[4:16], y[4:16])
+        assert slope[row] == pytest.approx(expected.slope)
+        assert intercept[row] == pytest.approx(expected.intercept)
+
+
+@pytest.mark.parametrize("limits", [(0.05, 0.3), (None, 0.2), (0.1, None)])
+def test_bet_window_matches_pygaps(limits):
+    isotherm = isotherm_from_json((DATA / "SiO2 N2 77.json").read_text())
+    pressure = isotherm.pressure(pressure_mode="relative")
+    loading = isotherm.loading(loading_basis="molar", loading_unit="mmol")
+    results = area_BET_raw(pressure, loading, 0.162, p_limits=limits)
+
+    start, end = limit_window(pressure, limits)
+    assert (start, end) == (results[6], results[7])
+    slope, intercept, corr_coef = WindowRegression(pressure, bet_transform(pressure, loading)).fit(start, end)
+    assert slope == pytest.approx(results[4])
+    assert intercept == pytest.approx(results[5])
+    assert corr_coef == pytest.approx(results[8])
+
+
+def test_window_increasing():
+    values = np.array([1, 2, 3, 2, 4, 5])
+    increasing = window_increasing(values)
+    for start in range(len(values)):
+        for end in range(start, len(values)):
+            assert increasing[start, end] == np.all(np.diff(values[start:end + 1]) > 0)
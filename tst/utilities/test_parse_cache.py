@@ -0,0 +1,121 @@
+import os
+import pathlib
+import shutil
+import time
+
+import pytest
+
+import pygaps.parsing as pgp
+from pygapsgui.utilities import parse_cache
+
+DATA = pathlib.Path(__file__).parents[1]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Empty cache in a temporary folder."""
+    monkeypatch.setenv("PYGAPSGUI_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def source(tmp_path):
+    """An isotherm file which is not JSON."""
+    path = tmp_path / "isotherm.aif"
+    shutil.copy(DATA / "aif" / "UiO-66(Zr) N2 77.aif", path)
+    return path
+
+
+class Parser():
+    """Counts how many times a file is actually parsed."""
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return pgp.isotherm_from_aif(self.path)
+
+
+def test_hit(cache, source):
+    parse = Parser(source)
+    first = parse_cache.cached_parse(source, "load.aif", parse)
+    second = parse_cache.cached_parse(source, "load.aif", parse)
+    assert parse.calls == 1
+    assert second.material == first.material
+    assert list(second.pressure()) == pytest.approx(list(first.pressure()))
+    assert list(second.loading()) == pytest.approx(list(first.loading()))
+
+
+def test_hit_after_copy(cache, source, tmp_path):
+    parse = Parser(source)
+    parse_cache.cached_parse(source, "load.aif", parse)
+    copy = tmp_path / "copy.aif"
+    shutil.copy(source, copy)
+    parse_cache.cached_parse(copy, "load.aif", parse)
+    assert parse.calls == 1
+
+
+def test_miss(cache, source):
+    parse = Parser(source)
+    parse_cache.cached_parse(source, "load.aif", parse)
+    # other parser settings
+    parse_cache.cached_parse(source, "import.aif", parse)
+    assert parse.calls == 2
+    # modified file
+    source.write_text(source.read_text() + "\n")
+    parse_cache.cached_parse(source, "load.aif", parse)
+    assert parse.calls == 3
+
+
+def test_corrupt_blob_is_parsed_again(cache, source):
+    parse = Parser(source)
+    parse_cache.cached_parse(source, "load.aif", parse)
+    for blob in (cache / "blobs").iterdir():
+        blob.write_text("not an isotherm")
+    assert parse_cache.cached_parse(source, "load.aif", parse) is not None
+    assert parse.calls == 2
+
+
+def test_json_is_not_cached(cache, tmp_path):
+    path = tmp_path / "isotherm.json"
+    shutil.copy(DATA / "json" / "SiO2 N2 77.json", path)
+    calls = []
+
+    def parse():
+        calls.append(path)
+        return pgp.isotherm_from_json(path)
+
+    parse_cache.cached_parse(path, "load.json", parse)
+    parse_cache.cached_parse(path, "load.json", parse)
+    assert len(calls) == 2
+    assert not cache.exists()
+
+
+def test_evict_by_age(cache, source):
+    parse = Parser(source)
+    parse_cache.cached_parse(source, "load.aif", parse)
+    old = time.time() - 2 * parse_cache.CACHE_MAX_AGE
+    for blob in (cache / "blobs").iterdir():
+        os.utime(blob, (old, old))
+    parse_cache.evict()
+    assert not list((cache / "blobs").iterdir())
+    assert not list((cache / "stat").iterdir())
+    parse_cache.cached_parse(source, "load.aif", parse)
+    assert parse.calls == 2
+
+
+def test_evict_by_size(cache, source):
+    parse = Parser(source)
+    parse_cache.cached_parse(source, "first", parse)
+    parse_cache.cached_parse(source, "second", parse)
+    blobs = {blob.name: blob for blob in (cache / "blobs").iterdir()}
+    assert len(blobs) == 2
+    # the first one is the least recently used
+    old = time.time() - 100
+    first = (cache / "stat" / parse_cache._stat_key(source, "first")).read_text()
+    os.utime(blobs[first], (old, old))
+
+    parse_cache.evict(max_size=blobs[first].stat().st_size)
+    assert [blob.name for blob in (cache / "blobs").iterdir()] == [name for name in blobs if name != first]
+    assert len(list((cache / "stat").iterdir())) == 1
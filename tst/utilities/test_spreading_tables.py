@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import pygaps
+from pygaps.utilities.exceptions import CalculationError
+from pygapsgui.utilities.spreading_tables import SpreadingTable
+from pygapsgui.utilities.spreading_tables import spreading_table
+
+PRESSURE = np.linspace(0.1, 10, 30)
+LOADING = 5 * PRESSURE / (1 + PRESSURE)
+
+
+def test_descending_points_are_sorted():
+    ascending = SpreadingTable(PRESSURE, LOADING)
+    descending = SpreadingTable(PRESSURE[::-1], LOADING[::-1])
+    assert np.all(np.diff(descending.pressure) > 0)
+    points = [0.1, 0.5, 3.3, 10]
+    assert np.allclose(descending.spreading_pressure_at(points), ascending.spreading_pressure_at(points))
+    assert np.allclose(descending.loading_at(points), ascending.loading_at(points))
+    assert np.allclose(descending.pressure_at(descending.spreading), descending.pressure)
+
+
+def test_desorption_branch_table():
+    desorption = LOADING[::-1] * 1.1
+    iso = pygaps.PointIsotherm(
+        pressure=np.concatenate([PRESSURE, PRESSURE[::-1]]),
+        loading=np.concatenate([LOADING, desorption]),
+        m="Test",
+        a="N2",
+        t=303,
+    )
+    # pyGAPS integrates the points in order, so give it increasing pressure
+    reference = pygaps.PointIsotherm(pressure=PRESSURE, loading=desorption[::-1], m="Test", a="N2", t=303)
+    table = spreading_table(iso, branch="des")
+    for point in [0.1, 0.5, 3.3, 9.5]:
+        expected = reference.spreading_pressure_at(point)
+        assert table.spreading_pressure_at(point) == pytest.approx(expected, rel=1e-6)
+
+
+@pytest.mark.parametrize("point", [0.05, 10.5])
+def test_outside_range_raises(point):
+    table = SpreadingTable(PRESSURE, LOADING)
+    with pytest.raises(CalculationError):
+        table.spreading_pressure_at(point)
+    with pytest.raises(CalculationError):
+        table.loading_at([1, point])
+    with pytest.raises(CalculationError):
+        table.pressure_at(table.spreading[0] / 2 if point < 1 else table.spreading[-1] * 2)
+    # pyGAPS refuses as well, once its interpolator is set up
+    iso = pygaps.PointIsotherm(pressure=PRESSURE, loading=LOADING, m="Test", a="N2", t=303)
+    iso.loading_at(1)
+    with pytest.raises(CalculationError):
+        iso.spreading_pressure_at(point)